@@ -32,10 +32,10 @@ void readRail2Power(std::ofstream &output) {
     output << "timestamp,current,voltage\n";
 
     auto startTime = std::chrono::duration_cast<std::chrono::nanoseconds>(
-                             std::chrono::high_resolution_clock::now().time_since_epoch())
+                             std::chrono::system_clock::now().time_since_epoch())
                              .count();
     auto currentTime = std::chrono::duration_cast<std::chrono::nanoseconds>(
-                             std::chrono::high_resolution_clock::now().time_since_epoch())
+                             std::chrono::system_clock::now().time_since_epoch())
                              .count();
     auto ellapsedTime = (currentTime - startTime)*1e-6;
     std::string value;
@@ -44,7 +44,7 @@ void readRail2Power(std::ofstream &output) {
     while (!stopProfilerThread.load())
     {
         currentTime = std::chrono::duration_cast<std::chrono::nanoseconds>(
-                            std::chrono::high_resolution_clock::now().time_since_epoch())
+                            std::chrono::system_clock::now().time_since_epoch())
                             .count();
         output << currentTime << ",";
 
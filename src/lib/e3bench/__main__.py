@@ -0,0 +1,6 @@
+from .cli import main
+
+
+# `python -m e3bench <command> ...`
+if __name__ == "__main__":
+    main()
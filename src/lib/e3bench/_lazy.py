@@ -0,0 +1,23 @@
+import sys
+from importlib import import_module
+from typing import Dict
+
+
+def attach(package_name: str, lazy: Dict[str, str]):
+    # PEP 562 attributes of a package: `lazy` maps each name to the (relative) module defining it,
+    # which is only imported on first access. Returns the package's (__getattr__, __dir__), e.g.
+    #   __getattr__, __dir__ = attach(__name__, {"bootstrap_ci": ".bootstrap"})
+    def __getattr__(name):
+        if name not in lazy:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(import_module(lazy[name], package_name), name)
+        setattr(sys.modules[package_name], name, value)  # next lookups do not go through __getattr__
+        return value
+
+    def __dir__():
+        return sorted(set(vars(sys.modules[package_name])) | set(lazy))
+
+    return __getattr__, __dir__
+
+
+__all__ = ["attach"]
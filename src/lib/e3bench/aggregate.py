@@ -0,0 +1,142 @@
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Pattern, Union
+import pandas as pd
+from loguru import logger
+
+from e3bench.clock import monotonic_ns
+
+
+# Aggregation of a directory of result files into one table, one row per file.
+# Per-file summaries are cached in a manifest next to the table, keyed by the file path.
+# A file is summarized again only if it is new or its content changed: its size and
+# mtime are checked first, then its content hash when they moved (a copy or `touch`
+# keeps the cached summary). New files are summarized in a process pool.
+MANIFEST_VERSION = 1
+
+
+def manifest_path(table_path: Union[str, Path]) -> Path:
+    # e.g. `lat_wrapper.csv` --> `lat_wrapper-manifest.json`
+    table_path = Path(table_path)
+    return table_path.with_name(f"{table_path.stem}-manifest.json")
+
+
+def file_state(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def config_from_name(path: Path, config_re: Optional[Pattern]) -> Optional[dict]:
+    # e.g. `w5_r30_ms100-latency` --> {"warmup": "5", "repeat": "30", "ms": "100"}; None if no match
+    if config_re is None:
+        return {}
+    m = config_re.search(path.stem)
+    return m.groupdict() if m else None
+
+
+def summarize_job(summarize: Callable, path: str, config: dict):
+    # Runs in a worker: content hash and summary of one file
+    path = Path(path)
+    return file_hash(path), summarize(path, config)
+
+
+class Manifest:
+    def __init__(self, path: Union[str, Path], version: str = "1"):
+        self.path = Path(path)
+        self.version = f"{MANIFEST_VERSION}:{version}"
+        self.entries = {}
+        if self.path.exists():
+            try:
+                with self.path.open() as f:
+                    data = json.load(f)
+                if data.get("version") == self.version:
+                    self.entries = data["files"]
+                else:
+                    logger.info(f"Summaries in {self.path} were made by another version; rebuilding.")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Unreadable manifest {self.path} ({e}); rebuilding.")
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("w") as f:
+            # NumPy scalars in the summaries are stored as plain numbers
+            json.dump({"version": self.version, "files": self.entries}, f,
+                      default=lambda o: o.item() if hasattr(o, "item") else str(o))
+        tmp_path.replace(self.path)
+
+
+def aggregate_files(files: Iterable[Union[str, Path]], summarize: Callable[[Path, dict], Optional[dict]],
+                    table_path: Union[str, Path], config_re: Optional[Pattern] = None, version: str = "1",
+                    workers: Optional[int] = None, rebuild: bool = False,
+                    columns: Optional[List[str]] = None) -> pd.DataFrame:
+    # `summarize(path, config)` returns the row of one file (or None to leave the file out).
+    # It must be a module-level function (it is sent to the worker processes).
+    # Change `version` whenever `summarize` changes, so cached summaries are not reused.
+    _start_ns = monotonic_ns()
+    table_path = Path(table_path)
+    manifest = Manifest(manifest_path(table_path), version)
+    if rebuild:
+        manifest.entries = {}
+
+    entries = {}
+    jobs = {}  # path --> config
+    for path in sorted(Path(p).resolve() for p in files):
+        config = config_from_name(path, config_re)
+        if config is None:
+            continue
+        key = str(path)
+        state = file_state(path)
+        entry = manifest.entries.get(key)
+        if entry is not None and entry["size"] == state["size"] and entry["mtime_ns"] == state["mtime_ns"]:
+            entries[key] = entry
+            continue
+        if entry is not None and entry["size"] == state["size"]:
+            content_hash = file_hash(path)
+            if content_hash == entry["hash"]:
+                entries[key] = {**entry, **state}  # touched or copied, same content
+                continue
+        jobs[key] = config
+
+    if jobs:
+        logger.info(f"Summarizing {len(jobs)} new or changed files ({len(entries)} cached)")
+        if workers == 1 or len(jobs) == 1:
+            results = {key: summarize_job(summarize, key, config) for key, config in jobs.items()}
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {key: pool.submit(summarize_job, summarize, key, config)
+                           for key, config in jobs.items()}
+                results = {key: future.result() for key, future in futures.items()}
+        for key, (content_hash, summary) in results.items():
+            entries[key] = {**file_state(Path(key)), "hash": content_hash, "summary": summary}
+
+    # Entries of deleted files are dropped
+    manifest.entries = dict(sorted(entries.items()))
+    manifest.save()
+
+    rows = [entry["summary"] for entry in manifest.entries.values() if entry["summary"] is not None]
+    table = pd.DataFrame(rows, columns=columns)
+    table_path.parent.mkdir(parents=True, exist_ok=True)
+    table.to_csv(table_path, index=False)
+    logger.info(f"{len(table)} rows --> {table_path} ({len(jobs)} files summarized, "
+                f"{(monotonic_ns() - _start_ns)*1e-6:.1f} ms)")
+    return table
+
+
+__all__ = [
+    "manifest_path",
+    "file_hash",
+    "config_from_name",
+    "Manifest",
+    "aggregate_files",
+]
@@ -0,0 +1,172 @@
+import json
+import os
+import time
+from pathlib import Path
+from statistics import median
+from typing import Callable, List, Optional
+from loguru import logger
+
+
+# Same defaults as torch.utils.benchmark
+IQR_WARN_THRESHOLD = 0.1
+MAX_NUMBER_PER_RUN = 2147483647
+
+CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "e3bench/autorange.json"
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    # Linear interpolation between closest ranks (numpy/torch default)
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class Measurement:
+    # Mirrors torch.utils.benchmark.Measurement: `raw_times` are block times (seconds)
+    # and the summary statistics are per call, i.e. divided by `number_per_run`.
+    def __init__(self, number_per_run: int, raw_times: List[float]):
+        self.number_per_run = number_per_run
+        self.raw_times = list(raw_times)
+        self.times = [t / number_per_run for t in self.raw_times]
+
+        sorted_times = sorted(self.times)
+        self.mean = sum(self.times) / len(self.times)
+        self.median = _quantile(sorted_times, 0.5)
+        self.iqr = _quantile(sorted_times, 0.75) - _quantile(sorted_times, 0.25)
+
+    def meets_confidence(self, threshold: float = IQR_WARN_THRESHOLD) -> bool:
+        return self.iqr / self.median < threshold
+
+    def __repr__(self):
+        return (f"Measurement(median={self.median*1e3:.3f} ms, iqr={self.iqr*1e3:.3f} ms, "
+                f"{len(self.raw_times)} measurements, {self.number_per_run} runs per measurement)")
+
+
+def _load_cache(path: Path) -> dict:
+    try:
+        with path.open() as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_cache(path: Path, cache: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class Timer:
+    # Native replacement for the subset of torch.utils.benchmark.Timer used by the
+    # latency wrappers. When `cache_key` is given (e.g. the program command), the
+    # `number_per_run` found by `blocked_autorange` is persisted in `cache_path`.
+    def __init__(self, fn: Callable, cache_key: Optional[str] = None, cache_path: Optional[Path] = CACHE_PATH):
+        self.fn = fn
+        self.cache_key = cache_key
+        self.cache_path = None if cache_path is None else Path(cache_path)
+
+    def timeit(self, number: int) -> float:
+        fn = self.fn
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        return time.perf_counter() - start
+
+    def _estimate_block_size(self, min_run_time: float) -> int:
+        # Grow the block size until the loop overhead is negligible. This also serves as a warmup.
+        overhead = median([self.timeit(0) for _ in range(5)])
+        number = 1
+        while True:
+            time_taken = self.timeit(number)
+            relative_overhead = overhead / time_taken if time_taken > 0 else 1.0
+            if relative_overhead <= 1e-4 and time_taken >= min_run_time / 1000:
+                break
+            if time_taken > min_run_time:
+                break
+            if number * 10 > MAX_NUMBER_PER_RUN:
+                break
+            number *= 10
+        return number
+
+    def _cached_block_size(self, min_run_time: float) -> int:
+        if self.cache_key is None or self.cache_path is None:
+            return self._estimate_block_size(min_run_time)
+
+        key = f"{self.cache_key}|min_run_time={min_run_time}"
+        cache = _load_cache(self.cache_path)
+        if key in cache:
+            logger.debug(f"Using cached number_per_run={cache[key]} for '{key}'")
+            return int(cache[key])
+
+        number = self._estimate_block_size(min_run_time)
+        cache[key] = number
+        _save_cache(self.cache_path, cache)
+        logger.debug(f"Calibrated number_per_run={number} for '{key}' --> {self.cache_path}")
+        return number
+
+    def _measurement_loop(self, number: int, stop_hook: Callable, min_run_time: float,
+                          max_run_time: Optional[float] = None) -> List[float]:
+        total_time = 0.0
+        can_stop = False
+        times = []
+        while (total_time < min_run_time) or (not can_stop):
+            time_spent = self.timeit(number)
+            times.append(time_spent)
+            total_time += time_spent
+            can_stop = stop_hook(times)
+            if max_run_time and total_time > max_run_time:
+                break
+        return times
+
+    def blocked_autorange(self, min_run_time: float = 0.2) -> Measurement:
+        number = self._cached_block_size(min_run_time)
+        times = self._measurement_loop(number, lambda times: True, min_run_time)
+        return Measurement(number, times)
+
+    def adaptive_autorange(self, threshold: float = IQR_WARN_THRESHOLD, *, min_run_time: float = 0.01,
+                           max_run_time: float = 10.0) -> Measurement:
+        number = 1
+
+        def stop_hook(times):
+            if len(times) > 3:
+                return Measurement(number, times).meets_confidence(threshold=threshold)
+            return False
+
+        times = self._measurement_loop(number, stop_hook, min_run_time, max_run_time)
+        return Measurement(number, times)
+
+
+AUTORANGE_METHODS = ["adaptive", "blocked"]
+AUTORANGE_BACKENDS = ["native", "torch"]
+
+
+def make_autorange(fn: Callable, method: str = "adaptive", backend: str = "native", cache_key: Optional[str] = None):
+    # Returns a callable `autorange(min_run_time=...)` producing a Measurement-like object
+    if method not in AUTORANGE_METHODS:
+        raise ValueError(f"Invalid autorange method {method}. Use one of {AUTORANGE_METHODS}")
+
+    if backend == "native":
+        t = Timer(fn, cache_key=cache_key)
+    elif backend == "torch":
+        # Only used to cross-check the native engine
+        import torch.utils.benchmark as torch_bench
+        t = torch_bench.Timer(stmt="fn()", globals={"fn": fn})
+    else:
+        raise ValueError(f"Invalid autorange backend {backend}. Use one of {AUTORANGE_BACKENDS}")
+
+    if method == "adaptive":
+        return getattr(t, "adaptive_autorange", None) or t.blocked_autorange
+    return t.blocked_autorange
+
+
+__all__ = [
+    "AUTORANGE_BACKENDS",
+    "AUTORANGE_METHODS",
+    "CACHE_PATH",
+    "Measurement",
+    "Timer",
+    "make_autorange",
+]
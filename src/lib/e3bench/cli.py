@@ -0,0 +1,275 @@
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import List, Optional
+
+
+# `e3bench <command> ...`: one entry point for the wrappers and the trace processing.
+#
+#   e3bench latency basic|dynamic|mix --prog ... --output-path ...
+#   e3bench power --profiler-name ... --prog ... --output-path ...
+#   e3bench energy --profiler-name ... --prog ... --output-path ...
+#   e3bench process <profiler_name> <raw trace> [--csv] [--compress]
+#
+# Only argparse is imported up front: each command imports its subsystem when it runs,
+# so `e3bench latency basic` loads neither NumPy nor pandas (nor the power profilers).
+# The `reproduce/*_wrapper.py` scripts use the same argument definitions.
+
+
+def warmup_type(value: str):
+    return value if value == "auto" else int(value)
+
+
+# --- shared arguments ---
+
+def add_prog_arguments(parser: ArgumentParser):
+    parser.add_argument("--prog", required=True,
+        help="Program command to run (quote if it has spaces). Example: --prog 'python3 myscript.py'")
+
+
+def add_warmup_arguments(parser: ArgumentParser):
+    parser.add_argument("--warmup", type=warmup_type, default=0,
+                        help="Number of warmup runs, or 'auto' to detect the steady state (default: 0)")
+    parser.add_argument("--max-warmup", type=int, default=50,
+                        help="Maximum number of warmup runs with --warmup auto (default: 50)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Number of measured runs (default: 1)")
+
+
+def add_launch_arguments(parser: ArgumentParser, calibrate: bool = True):
+    parser.add_argument("--worker", action="store_true",
+                        help="Start the program once and time runs through the e3bench harness")
+    parser.add_argument("--launcher", choices=["subprocess", "posix_spawn"], default="subprocess",
+                        help="How each run is spawned (default: subprocess)")
+    if calibrate:
+        parser.add_argument("--calibrate", type=int, default=0,
+                            help="Number of null-command runs used to estimate launch overhead (default: 0, disabled)")
+
+
+def add_autorange_arguments(parser: ArgumentParser):
+    parser.add_argument("--min-ms", type=float, default=100.0,
+                        help="Target minimum total time window in milliseconds (default: 100.0)")
+    parser.add_argument("--method", choices=["adaptive", "blocked"], default="adaptive",
+                        help="Autorange variant (default: adaptive)")
+    parser.add_argument("--backend", choices=["native", "torch"], default="native",
+                        help="Autorange engine; 'torch' is only meant as a cross-check (default: native)")
+
+
+def add_output_arguments(parser: ArgumentParser):
+    parser.add_argument("--columnar", choices=["npz", "parquet"], default=None,
+                        help="Also write a columnar copy of the results with all raw times (default: CSV only)")
+    parser.add_argument("--noise", action="store_true",
+                        help="Sample load, cpufreq and temperatures during each run and flag noisy runs")
+
+
+def add_profiler_arguments(parser: ArgumentParser, after: str = "the program ended"):
+    parser.add_argument("--profiler-name", type=str, required=True,
+                        help="The name of the power profiler. Example: tegrastats")
+    parser.add_argument("--interval", type=int, default=100,
+                        help="Minimum milliseconds between two samples.")
+    parser.add_argument("--ready-timeout", type=float, default=10.0,
+                        help="Maximum seconds to wait for the first profiler sample (and for the post-run samples).")
+    parser.add_argument("--post-samples", type=int, default=2,
+                        help=f"Number of profiler samples to record after {after}.")
+
+
+def add_store_arguments(parser: ArgumentParser):
+    parser.add_argument("--store", type=Path, default=None,
+                        help="SQLite results store to index this session in (default: disabled)")
+    parser.add_argument("--tag", action="append", default=[], metavar="KEY=VALUE",
+                        help="Configuration recorded with the session in the store, e.g. --tag model=resnet50 (repeatable)")
+
+
+def add_output_path_argument(parser: ArgumentParser, help: str = "Output CSV file path"):
+    parser.add_argument("--output-path", required=True, type=Path, help=help)
+
+
+# --- commands ---
+
+def add_basic_latency_arguments(parser: ArgumentParser):
+    add_prog_arguments(parser)
+    add_warmup_arguments(parser)
+    add_launch_arguments(parser)
+    parser.add_argument("--target-ci", type=float, default=None,
+                        help="Stop once the relative CI half-width is below this value, e.g. 0.02 (default: disabled)")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="Confidence level of the CI (default: 0.95)")
+    parser.add_argument("--ci-stat", choices=["median", "mean"], default="median",
+                        help="Statistic the CI is computed on (default: median)")
+    parser.add_argument("--max-repeat", type=int, default=None,
+                        help="Maximum number of measured runs with --target-ci (default: 10x --repeat)")
+    add_output_arguments(parser)
+    add_store_arguments(parser)
+    add_output_path_argument(parser)
+
+
+def run_basic_latency(args: Namespace):
+    from e3bench.utils import parse_tags
+    from e3bench.wrappers.latency.basic import basic_latency_wrap_prog
+    basic_latency_wrap_prog(args.prog, args.output_path, warmup=args.warmup, max_warmup=args.max_warmup, repeat=args.repeat, worker=args.worker,
+        launcher=args.launcher, calibrate=args.calibrate,
+        target_ci=args.target_ci, confidence=args.confidence, ci_stat=args.ci_stat, max_repeat=args.max_repeat,
+        columnar=args.columnar, noise=args.noise,
+        store=args.store, tags=parse_tags(args.tag))
+
+
+def add_dynamic_latency_arguments(parser: ArgumentParser):
+    add_prog_arguments(parser)
+    add_launch_arguments(parser)
+    add_autorange_arguments(parser)
+    add_output_arguments(parser)
+    add_store_arguments(parser)
+    add_output_path_argument(parser)
+
+
+def run_dynamic_latency(args: Namespace):
+    from e3bench.utils import parse_tags
+    from e3bench.wrappers.latency.dynamic import dynamic_latency_wrap_prog
+    dynamic_latency_wrap_prog(args.prog, args.output_path, min_ms=args.min_ms, worker=args.worker,
+        launcher=args.launcher, calibrate=args.calibrate,
+        method=args.method, backend=args.backend,
+        columnar=args.columnar, noise=args.noise,
+        store=args.store, tags=parse_tags(args.tag))
+
+
+def add_mix_latency_arguments(parser: ArgumentParser):
+    add_prog_arguments(parser)
+    add_warmup_arguments(parser)
+    add_launch_arguments(parser)
+    add_autorange_arguments(parser)
+    add_output_arguments(parser)
+    add_store_arguments(parser)
+    add_output_path_argument(parser)
+
+
+def run_mix_latency(args: Namespace):
+    from e3bench.utils import parse_tags
+    from e3bench.wrappers.latency.mix import mix_latency_wrap_prog
+    mix_latency_wrap_prog(args.prog, args.output_path, min_ms=args.min_ms, warmup=args.warmup, max_warmup=args.max_warmup, repeat=args.repeat, worker=args.worker,
+        launcher=args.launcher, calibrate=args.calibrate,
+        method=args.method, backend=args.backend,
+        columnar=args.columnar, noise=args.noise,
+        store=args.store, tags=parse_tags(args.tag))
+
+
+def add_power_arguments(parser: ArgumentParser):
+    add_prog_arguments(parser)
+    add_profiler_arguments(parser)
+    add_store_arguments(parser)
+    add_output_path_argument(parser, "Output text file path")
+
+
+def run_power(args: Namespace):
+    from e3bench.utils import parse_tags
+    from e3bench.wrappers.power.basic import basic_power_wrap_prog
+    basic_power_wrap_prog(args.profiler_name, args.interval, args.prog, args.output_path,
+                          ready_timeout=args.ready_timeout, post_samples=args.post_samples,
+                          store=args.store, tags=parse_tags(args.tag))
+
+
+def add_energy_arguments(parser: ArgumentParser):
+    add_prog_arguments(parser)
+    add_profiler_arguments(parser, after="the last run")
+    parser.add_argument("--power-col", type=str, default=None,
+                        help="Power column to integrate, e.g. VDD_IN_mw_now (default: inferred from the profiler)")
+    add_warmup_arguments(parser)
+    add_launch_arguments(parser, calibrate=False)
+    parser.add_argument("--target-ci", type=float, default=None,
+                        help="Stop once the relative CI half-width is below this value, e.g. 0.02 (default: disabled)")
+    parser.add_argument("--max-repeat", type=int, default=None,
+                        help="Maximum number of measured runs with --target-ci (default: 10x --repeat)")
+    add_store_arguments(parser)
+    add_output_path_argument(parser, "Output CSV file path (the power trace is written next to it)")
+
+
+def run_energy(args: Namespace):
+    from e3bench.utils import parse_tags
+    from e3bench.wrappers.energy.basic import basic_energy_wrap_prog
+    basic_energy_wrap_prog(args.profiler_name, args.interval, args.prog, args.output_path,
+        power_col=args.power_col, ready_timeout=args.ready_timeout, post_samples=args.post_samples,
+        warmup=args.warmup, max_warmup=args.max_warmup, repeat=args.repeat, worker=args.worker,
+        launcher=args.launcher, target_ci=args.target_ci, max_repeat=args.max_repeat,
+        store=args.store, tags=parse_tags(args.tag))
+
+
+def add_process_arguments(parser: ArgumentParser):
+    parser.add_argument("profiler_name", help="Profiler that wrote the trace. Example: tegrastats")
+    parser.add_argument("paths", nargs="+", type=Path, help="Raw profiler output(s)")
+    parser.add_argument("--csv", action="store_true",
+                        help="Also write a CSV next to each trace (slower to write and to read back)")
+    parser.add_argument("--compress", action="store_true", help="zlib-compress the columns of the e3bench traces")
+
+
+def run_process(args: Namespace):
+    # Raw profiler output --> e3bench trace (see `convert_trace`), with its sampling report
+    from loguru import logger
+    from e3bench.profilers.quality import sampling_report
+    from e3bench.profilers.tracefile import convert_trace, read_trace
+
+    for path in args.paths:
+        trace_path = convert_trace(args.profiler_name, path, compression="zlib" if args.compress else None)
+        if trace_path is None:
+            continue
+        df = read_trace(trace_path)
+        if args.csv:
+            out_path = path.parent / f"{path.stem}.csv"
+            df.to_csv(out_path, index=False)
+            logger.info(f"{len(df)} rows --> {out_path}")
+        report = sampling_report(df["timestamp_ns"].to_numpy())
+        logger.info(f"{path} --> {trace_path}: {report['nb_samples']} samples, "
+                    f"{report.get('freq_Hz') or 0:.1f} Hz, {report.get('nb_gaps', 0)} gaps")
+
+
+def get_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="e3bench", description="Measure the latency, power and energy of a program.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="COMMAND")
+
+    latency = commands.add_parser("latency", help="Run a command repeatedly and log the duration of each run.")
+    modes = latency.add_subparsers(dest="mode", required=True, metavar="MODE")
+    for name, add_arguments, run, help in [
+        ("basic", add_basic_latency_arguments, run_basic_latency, "One process per run."),
+        ("dynamic", add_dynamic_latency_arguments, run_dynamic_latency,
+         "Repeat the command until --min-ms is filled (autorange)."),
+        ("mix", add_mix_latency_arguments, run_mix_latency, "Warmup and repeated autorange runs."),
+    ]:
+        p = modes.add_parser(name, help=help, description=help)
+        add_arguments(p)
+        p.set_defaults(run=run)
+
+    for name, add_arguments, run, help in [
+        ("power", add_power_arguments, run_power, "Run a command once while a power profiler samples."),
+        ("energy", add_energy_arguments, run_energy,
+         "Run a command repeatedly inside one power sampling session and log latency and energy per run."),
+        ("process", add_process_arguments, run_process,
+         "Parse raw power traces into e3bench traces (memory-mapped on later reads)."),
+    ]:
+        p = commands.add_parser(name, help=help, description=help)
+        add_arguments(p)
+        p.set_defaults(run=run)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None):
+    args = get_parser().parse_args(argv)
+    args.run(args)
+
+
+__all__ = [
+    "add_basic_latency_arguments",
+    "add_dynamic_latency_arguments",
+    "add_mix_latency_arguments",
+    "add_power_arguments",
+    "add_energy_arguments",
+    "add_process_arguments",
+    "run_basic_latency",
+    "run_dynamic_latency",
+    "run_mix_latency",
+    "run_power",
+    "run_energy",
+    "run_process",
+    "get_parser",
+    "main",
+]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional, Union
+
+
+# Durations are always measured with the monotonic clock (it never jumps with NTP).
+# Timestamps written by e3bench are Unix epoch nanoseconds in a *session timebase*:
+# monotonic readings shifted by a (wall, monotonic) anchor taken at session start.
+# This is the timebase of the power profilers (tegrastats, inaprof and smiprof stamp
+# samples with the wall clock), so latency windows and power samples can be joined.
+monotonic_ns = time.monotonic_ns
+
+
+class ClockAnchor(NamedTuple):
+    wall_ns: int
+    mono_ns: int
+    uncertainty_ns: int
+
+
+def take_anchor(tries: int = 10) -> ClockAnchor:
+    # Read the wall clock between two monotonic readings and keep the tightest pair
+    best = None
+    for _ in range(tries):
+        before = time.monotonic_ns()
+        wall = time.time_ns()
+        after = time.monotonic_ns()
+        if best is None or after - before < best.uncertainty_ns:
+            best = ClockAnchor(wall, (before + after) // 2, after - before)
+    return best
+
+
+class Timebase:
+    def __init__(self):
+        self.start = take_anchor()
+        self.end: Optional[ClockAnchor] = None
+
+    def to_wall_ns(self, mono_ns: int) -> int:
+        return self.start.wall_ns + (mono_ns - self.start.mono_ns)
+
+    def now_ns(self) -> int:
+        return self.to_wall_ns(time.monotonic_ns())
+
+    def close(self) -> ClockAnchor:
+        self.end = take_anchor()
+        return self.end
+
+    @property
+    def drift_ns(self) -> Optional[int]:
+        # How much the wall clock moved relative to the monotonic one during the session (NTP slew/steps)
+        if self.end is None:
+            return None
+        return (self.end.wall_ns - self.start.wall_ns) - (self.end.mono_ns - self.start.mono_ns)
+
+    def to_dict(self) -> dict:
+        return {
+            "timebase": "unix_epoch_ns_from_monotonic",
+            "start": self.start._asdict(),
+            "end": None if self.end is None else self.end._asdict(),
+            "drift_ns": self.drift_ns,
+        }
+
+    def write(self, path: Union[str, Path]) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def clock_path(output_path: Union[str, Path]) -> Path:
+    # e.g. `w5_r30_ms100-latency.csv` --> `w5_r30_ms100-latency-clock.json`
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}-clock.json")
+
+
+def read_timebase(path: Union[str, Path]) -> dict:
+    with Path(path).open() as f:
+        return json.load(f)
+
+
+__all__ = [
+    "monotonic_ns",
+    "ClockAnchor",
+    "take_anchor",
+    "Timebase",
+    "clock_path",
+    "read_timebase",
+]
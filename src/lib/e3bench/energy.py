@@ -0,0 +1,126 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+
+# Columns added to the latency runs by `join_energy`
+ENERGY_FIELDS = [
+    "energy_mj",     # energy over the part of the run covered by the trace
+    "avg_power_mw",  # energy_mj / covered duration
+    "coverage",      # covered fraction of the run window (0..1)
+    "nb_samples",    # power samples falling inside the run window
+]
+
+
+def power_column(trace: pd.DataFrame) -> str:
+    # Single-rail inaprof traces carry `power_mw`; tegrastats has one `<RAIL>_mw_now`
+    # column per rail and multi-rail inaprof traces one `<RAIL>_power_mw` column per rail
+    if "power_mw" in trace.columns:
+        return "power_mw"
+    rails = [c for c in trace.columns if c.endswith(("_mw_now", "_power_mw"))]
+    if len(rails) == 1:
+        return rails[0]
+    for board_input in ("VDD_IN_mw_now", "VDD_IN_power_mw"):
+        if board_input in rails:
+            return board_input  # board input, covers the whole module
+    raise ValueError(f"Cannot choose the power column among {rails or list(trace.columns)}; pass `power_col`.")
+
+
+def _sorted_trace(t_ns, p_mw):
+    t_ns = np.asarray(t_ns, dtype=np.int64)
+    p_mw = np.asarray(p_mw, dtype=np.float64)
+    if t_ns.shape != p_mw.shape or t_ns.ndim != 1:
+        raise ValueError("Timestamps and power must be 1-D arrays of the same length.")
+    if t_ns.size and np.any(t_ns[1:] < t_ns[:-1]):
+        order = np.argsort(t_ns, kind="stable")
+        t_ns, p_mw = t_ns[order], p_mw[order]
+    return t_ns, p_mw
+
+
+def integrate_windows(t_ns, p_mw, start_ns, end_ns) -> dict:
+    # Integrate the power trace (t_ns, p_mw) over each [start_ns, end_ns] window.
+    # The trace is treated as piecewise linear: trapezoids between samples and
+    # interpolated power at the window boundaries. Everything is vectorized over
+    # the windows; the only O(samples) work is one cumulative sum.
+    t_ns, p_mw = _sorted_trace(t_ns, p_mw)
+    start_ns = np.asarray(start_ns, dtype=np.int64)
+    end_ns = np.asarray(end_ns, dtype=np.int64)
+    nb_windows = start_ns.size
+
+    result = {
+        "energy_mj": np.full(nb_windows, np.nan),
+        "avg_power_mw": np.full(nb_windows, np.nan),
+        "coverage": np.zeros(nb_windows),
+        "nb_samples": np.zeros(nb_windows, dtype=np.int64),
+    }
+    if t_ns.size < 2 or nb_windows == 0:
+        return result
+
+    # Work relative to the first sample: epoch nanoseconds do not fit exactly in a float64
+    t0 = t_ns[0]
+    t = (t_ns - t0).astype(np.float64)
+
+    # Cumulative energy at each sample (mW * ns), relative to the first sample
+    cum = np.concatenate(([0.0], np.cumsum(np.diff(t) * (p_mw[1:] + p_mw[:-1]) * 0.5)))
+
+    def cumulative_at(x):
+        # Energy from the first sample to x, for x within the trace span
+        i = np.clip(np.searchsorted(t, x, side="right") - 1, 0, t.size - 2)
+        p_x = np.interp(x, t, p_mw)
+        return cum[i] + (x - t[i]) * (p_mw[i] + p_x) * 0.5
+
+    # Overlap between each window and the trace span
+    lo = (np.clip(start_ns, t_ns[0], t_ns[-1]) - t0).astype(np.float64)
+    hi = (np.clip(end_ns, t_ns[0], t_ns[-1]) - t0).astype(np.float64)
+    hi = np.maximum(hi, lo)
+    covered_ns = hi - lo
+
+    energy = (cumulative_at(hi) - cumulative_at(lo)) * 1e-9  # mW * ns --> mJ
+    has_overlap = covered_ns > 0
+    result["energy_mj"] = np.where(has_overlap, energy, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result["avg_power_mw"] = np.where(has_overlap, energy * 1e9 / covered_ns, np.nan)
+        duration_ns = (end_ns - start_ns).astype(np.float64)
+        result["coverage"] = np.where(duration_ns > 0, covered_ns / duration_ns, np.nan)
+
+    result["nb_samples"] = (np.searchsorted(t_ns, end_ns, side="right")
+                            - np.searchsorted(t_ns, start_ns, side="left"))
+    return result
+
+
+def join_energy(runs: pd.DataFrame, trace: pd.DataFrame, power_col: Optional[str] = None,
+                time_col: str = "timestamp_ns") -> pd.DataFrame:
+    # `runs` is a latency output (`timestamp_ns` start, `duration_ns`), `trace` a post-processed
+    # power trace in the same timebase. Returns a copy of `runs` with `ENERGY_FIELDS` added.
+    power_col = power_col or power_column(trace)
+
+    # Interrupted or failed runs may have no window
+    valid = (runs["timestamp_ns"].notna() & runs["duration_ns"].notna()).to_numpy()
+    start_ns = runs["timestamp_ns"].to_numpy()[valid].astype(np.int64)
+    end_ns = start_ns + runs["duration_ns"].to_numpy()[valid].astype(np.int64)
+
+    energy = integrate_windows(trace[time_col].to_numpy(), trace[power_col].to_numpy(), start_ns, end_ns)
+
+    runs = runs.copy()
+    for field in ENERGY_FIELDS:
+        column = np.full(len(runs), np.nan)
+        column[valid] = energy[field]
+        runs[field] = column
+    runs["nb_samples"] = runs["nb_samples"].astype("Int64")
+    return runs
+
+
+def tag_samples(t_ns, start_ns, end_ns) -> np.ndarray:
+    # Index of the window each sample falls in, -1 between windows. Windows must be sorted and disjoint.
+    t_ns = np.asarray(t_ns, dtype=np.int64)
+    start_ns = np.asarray(start_ns, dtype=np.int64)
+    end_ns = np.asarray(end_ns, dtype=np.int64)
+    if start_ns.size == 0:
+        return np.full(t_ns.size, -1, dtype=np.int64)
+
+    idx = np.searchsorted(start_ns, t_ns, side="right") - 1
+    inside = (idx >= 0) & (t_ns <= end_ns[np.maximum(idx, 0)])
+    return np.where(inside, idx, -1)
+
+
+__all__ = ["ENERGY_FIELDS", "power_column", "integrate_windows", "join_energy", "tag_samples"]
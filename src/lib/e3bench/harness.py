@@ -0,0 +1,76 @@
+import json
+import os
+import resource
+import signal
+import time
+from typing import Callable, Optional
+
+from e3bench.usage import usage_delta
+
+
+# Environment variable used by the latency wrappers to hand the protocol pipes to the worker.
+# Format: "<command_fd>,<result_fd>"
+HARNESS_FDS_ENV = "E3BENCH_HARNESS_FDS"
+
+
+def _timed_run(run: Callable) -> dict:
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    start_ns = time.monotonic_ns()
+    try:
+        rc = run()
+        rc = 0 if rc is None else int(rc)
+    except Exception:
+        rc = -1
+    end_ns = time.monotonic_ns()
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    return {
+        "start_mono_ns": start_ns,  # CLOCK_MONOTONIC is system-wide, the wrapper maps it to its timebase
+        "duration_ns": end_ns - start_ns,
+        "returncode": rc,
+        **usage_delta(usage_before, usage_after),
+    }
+
+
+def serve(run: Callable, init: Optional[Callable] = None, warm: Optional[Callable] = None):
+    # Not started by a latency wrapper in worker mode: behave like a one-shot program
+    fds = os.environ.get(HARNESS_FDS_ENV)
+    if fds is None:
+        if init is not None:
+            init()
+        run()
+        return
+
+    # The wrapper owns Ctrl+C handling and sends "shutdown" when it is done
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    cmd_fd, res_fd = (int(fd) for fd in fds.split(","))
+    with os.fdopen(cmd_fd, "r") as commands, os.fdopen(res_fd, "w", buffering=1) as results:
+        for line in commands:
+            line = line.strip()
+            if not line:
+                continue
+
+            reply = {"ok": True}
+            try:
+                msg = json.loads(line)
+                op = msg.get("op")
+                if op == "init":
+                    if init is not None:
+                        init()
+                elif op == "warm":
+                    # Warmup runs are timed like "run", with the target's `warm` when it has one
+                    reply["runs"] = [_timed_run(warm or run) for _ in range(int(msg.get("n", 1)))]
+                elif op == "run":
+                    reply["runs"] = [_timed_run(run) for _ in range(int(msg.get("n", 1)))]
+                elif op == "shutdown":
+                    results.write(json.dumps(reply) + "\n")
+                    break
+                else:
+                    reply = {"ok": False, "error": f"Unknown op {op!r}"}
+            except Exception as e:
+                reply = {"ok": False, "error": repr(e)}
+
+            results.write(json.dumps(reply) + "\n")
+
+
+__all__ = ["HARNESS_FDS_ENV", "serve"]
@@ -0,0 +1,180 @@
+import glob
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Union
+from loguru import logger
+
+
+NOISE_FIELDS = [
+    "loadavg_1m",       # 1-minute load average at the end of the run
+    "cpu_busy_pct",     # share of non-idle CPU time during the run (all cores, workload included)
+    "cpufreq_min_mhz",  # lowest frequency seen on any core during the run
+    "cpufreq_max_mhz",  # highest frequency seen on any core during the run
+    "cpufreq_changed",  # 1 if any core's frequency moved by more than `freq_threshold` during the run
+    "temp_max_c",       # hottest thermal zone during the run
+    "noisy",            # 1 if any of the indicators flags the run as contaminated
+    "noise_reasons",    # e.g. "cpufreq|thermal"
+]
+
+
+def _read_fd(fd: int, size: int = 64) -> bytes:
+    return os.pread(fd, size, 0)
+
+
+def _read_cpu_times(fd: int):
+    # First line of /proc/stat: "cpu user nice system idle iowait irq softirq steal ..."
+    line = _read_fd(fd, 256).split(b"\n", 1)[0]
+    values = [int(v) for v in line.split()[1:]]
+    idle = values[3] + (values[4] if len(values) > 4 else 0)
+    return sum(values[:8]), idle
+
+
+class NoiseMonitor:
+    # Optional sidecar thread sampling system state while the measured runs execute.
+    # Call `begin_run()` right before a run and `end_run()` right after it; the latter
+    # returns one value per field of `NOISE_FIELDS`. `root` lets tests point at a fake tree.
+    # `freq_threshold` is relative to the highest frequency of the core: small steps of
+    # schedutil/ondemand are expected, a large drop (e.g. throttling) is not.
+    def __init__(self, interval: float = 0.1, temp_threshold_c: float = 85.0,
+                 load_threshold: Optional[float] = None, freq_threshold: float = 0.1,
+                 root: Union[str, Path] = "/"):
+        self.interval = interval
+        self.temp_threshold_c = temp_threshold_c
+        self.freq_threshold = freq_threshold
+        self.load_threshold = load_threshold if load_threshold is not None else float(os.cpu_count() or 1)
+        self.root = Path(root)
+
+        self._stat_fd = self._open("proc/stat")
+        self._loadavg_fd = self._open("proc/loadavg")
+        self._freq_fds = self._open_all("sys/devices/system/cpu/cpu[0-9]*/cpufreq/scaling_cur_freq")
+        self._temp_fds = self._open_all("sys/devices/virtual/thermal/thermal_zone[0-9]*/temp")
+        logger.debug(f"Noise monitor: {len(self._freq_fds)} cpufreq files, {len(self._temp_fds)} thermal zones")
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset_window()
+
+    def _open(self, rel_path: str) -> Optional[int]:
+        try:
+            return os.open(self.root / rel_path, os.O_RDONLY)
+        except OSError:
+            return None
+
+    def _open_all(self, pattern: str) -> List[int]:
+        fds = []
+        for path in sorted(glob.glob(str(self.root / pattern))):
+            try:
+                fds.append(os.open(path, os.O_RDONLY))
+            except OSError:
+                pass
+        return fds
+
+    def _reset_window(self):
+        self._freq_min = [None] * len(self._freq_fds)
+        self._freq_max = [None] * len(self._freq_fds)
+        self._temp_max = None
+        self._cpu_times = None
+
+    def _sample(self):
+        freqs = []
+        for fd in self._freq_fds:
+            try:
+                freqs.append(int(_read_fd(fd)))  # kHz
+            except (OSError, ValueError):
+                freqs.append(None)
+
+        temps = []
+        for fd in self._temp_fds:
+            try:
+                temp = int(_read_fd(fd)) / 1000  # millidegree Celsius
+            except (OSError, ValueError):
+                continue
+            if temp > -200:  # some zones report -256C when unavailable
+                temps.append(temp)
+
+        with self._lock:
+            for i, freq in enumerate(freqs):
+                if freq is None:
+                    continue
+                if self._freq_min[i] is None or freq < self._freq_min[i]:
+                    self._freq_min[i] = freq
+                if self._freq_max[i] is None or freq > self._freq_max[i]:
+                    self._freq_max[i] = freq
+            if temps:
+                temp_max = max(temps)
+                if self._temp_max is None or temp_max > self._temp_max:
+                    self._temp_max = temp_max
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample_loop, name="e3bench-noise", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        for fd in [self._stat_fd, self._loadavg_fd, *self._freq_fds, *self._temp_fds]:
+            if fd is not None:
+                os.close(fd)
+        self._stat_fd = self._loadavg_fd = None
+        self._freq_fds, self._temp_fds = [], []
+
+    def begin_run(self):
+        with self._lock:
+            self._reset_window()
+        self._sample()
+        if self._stat_fd is not None:
+            self._cpu_times = _read_cpu_times(self._stat_fd)
+
+    def end_run(self) -> dict:
+        self._sample()
+        row = {}
+
+        if self._stat_fd is not None and self._cpu_times is not None:
+            total, idle = _read_cpu_times(self._stat_fd)
+            d_total = total - self._cpu_times[0]
+            d_idle = idle - self._cpu_times[1]
+            row["cpu_busy_pct"] = 100 * (d_total - d_idle) / d_total if d_total > 0 else None
+        if self._loadavg_fd is not None:
+            row["loadavg_1m"] = float(_read_fd(self._loadavg_fd).split()[0])
+
+        with self._lock:
+            freq_min = [f for f in self._freq_min if f is not None]
+            freq_max = [f for f in self._freq_max if f is not None]
+            changed = any(hi - lo > self.freq_threshold * hi
+                          for lo, hi in zip(self._freq_min, self._freq_max) if lo is not None)
+            temp_max = self._temp_max
+
+        if freq_min:
+            row["cpufreq_min_mhz"] = min(freq_min) / 1000
+            row["cpufreq_max_mhz"] = max(freq_max) / 1000
+            row["cpufreq_changed"] = int(changed)
+        if temp_max is not None:
+            row["temp_max_c"] = temp_max
+
+        reasons = []
+        if row.get("cpufreq_changed"):
+            reasons.append("cpufreq")
+        if temp_max is not None and temp_max >= self.temp_threshold_c:
+            reasons.append("thermal")
+        if row.get("loadavg_1m", 0) > self.load_threshold:
+            reasons.append("load")
+        row["noisy"] = int(bool(reasons))
+        row["noise_reasons"] = "|".join(reasons)
+        return row
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+__all__ = ["NOISE_FIELDS", "NoiseMonitor"]
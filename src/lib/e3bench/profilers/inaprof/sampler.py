@@ -0,0 +1,222 @@
+from argparse import ArgumentParser, Namespace
+import os
+import queue
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import List, Union
+import numpy as np
+from loguru import logger
+
+from e3bench.clock import Timebase, monotonic_ns
+from e3bench.profilers.tracewriter import TraceWriter, is_trace_path
+
+
+# Same device and channels as the compiled profiler (see ina_profiler/src/profiler/power/ina3221.h).
+# E3BENCH_INA_DEVICE_PATH points the sampler at another hwmon directory (e.g. a fake tree in tests).
+INA_DEVICE_PATH = os.environ.get("E3BENCH_INA_DEVICE_PATH", "/sys/bus/i2c/drivers/ina3221/1-0040/hwmon/hwmon3")
+INA_RAILS = {"VDD_IN": 1, "VDD_CPU_GPU_CV": 2, "VDD_SOC": 3}
+
+
+_stop_requested = False
+
+
+def handle_sigint(sig, frame):
+    global _stop_requested
+    _stop_requested = True
+
+
+def rail_channel(rail_name: str) -> int:
+    # "vdd_in" / "VDD_IN" --> 1; a bare channel number is accepted too
+    if rail_name.isdigit():
+        return int(rail_name)
+    try:
+        return INA_RAILS[rail_name.upper()]
+    except KeyError:
+        raise ValueError(f"Unknown INA rail {rail_name}. Use one of {list(INA_RAILS)}")
+
+
+class InaSampler:
+    # Samples current (mA) and voltage (mV) of INA3221 channels at a fixed rate.
+    # The hwmon files stay open and are read with pread; samples go to preallocated
+    # chunks handed to a writer thread. Deadlines are absolute (start + k * period):
+    # a late sample does not shift the following ones, and missed slots are counted
+    # as overruns instead of being made up in a burst.
+    def __init__(self, rails: List[str], interval_ms: float, device_path: Union[str, Path] = INA_DEVICE_PATH,
+                 chunk_size: int = 4096, flush_interval: float = 0.1):
+        self.rails = list(rails)
+        self.period_ns = int(interval_ms * 1e6)
+        self.device_path = Path(device_path)
+        self.chunk_size = chunk_size
+        self.flush_interval_ns = int(flush_interval * 1e9)  # partial chunks are handed over at least this often
+
+        self._fds = []
+        for rail in self.rails:
+            channel = rail_channel(rail)
+            for name in (f"curr{channel}_input", f"in{channel}_input"):
+                self._fds.append(os.open(self.device_path / name, os.O_RDONLY))
+
+        # One chunk being filled, the others waiting for (or being written by) the writer thread
+        self._free = queue.Queue()
+        for _ in range(4):
+            self._free.put((np.empty(chunk_size, dtype=np.int64),
+                            np.empty((chunk_size, len(self._fds)), dtype=np.int64)))
+        self._filled = queue.Queue()
+
+        self.nb_samples = 0
+        self.nb_overruns = 0     # deadlines skipped because a read came too late
+        self.max_lateness_ns = 0
+        self._writer_error = None
+
+    def header(self) -> str:
+        # One row per tick: all rails share the timestamp
+        if len(self.rails) == 1:
+            return "timestamp,current,voltage"  # same as the compiled profiler
+        return "timestamp," + ",".join(f"{rail.upper()}_current,{rail.upper()}_voltage" for rail in self.rails)
+
+    def trace_columns(self, timestamps: np.ndarray, values: np.ndarray) -> dict:
+        # Same columns as `load_power_trace` gives for the CSV output
+        prefixes = [""] if len(self.rails) == 1 else [f"{rail.upper()}_" for rail in self.rails]
+        columns = {"timestamp_ns": timestamps}
+        for k, prefix in enumerate(prefixes):
+            cur_ma, vol_mv = values[:, 2 * k].astype(np.int32), values[:, 2 * k + 1].astype(np.int32)
+            columns[f"{prefix}cur_ma"] = cur_ma
+            columns[f"{prefix}vol_mv"] = vol_mv
+            columns[f"{prefix}power_mw"] = (cur_ma * vol_mv.astype(np.float64) * 1e-3).astype(np.float32)
+        return columns
+
+    def _write_loop(self, f):
+        try:
+            while True:
+                item = self._filled.get()
+                if item is None:
+                    return
+                timestamps, values, n = item
+                if isinstance(f, TraceWriter):
+                    f.append(self.trace_columns(timestamps[:n], values[:n]))
+                else:
+                    block = np.column_stack((timestamps[:n], values[:n]))
+                    f.write("".join(",".join(map(str, row)) + "\n" for row in block.tolist()))
+                f.flush()
+                self._free.put((timestamps, values))
+        except BaseException as e:
+            # e.g. disk full: the sampling loop re-raises it instead of waiting for a free chunk
+            self._writer_error = e
+
+    def _free_chunk(self, writer: threading.Thread):
+        # Next empty chunk; fails as soon as the writer thread is gone (it returns no more chunks)
+        while True:
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                if not writer.is_alive():
+                    raise self._writer_error or RuntimeError("INA sampler writer thread exited")
+
+    def open_output(self, output_path: Path, timebase: Timebase):
+        # CSV like the compiled profiler, or an e3bench trace for a `.e3t` path
+        if is_trace_path(output_path):
+            return TraceWriter(output_path, profiler="inapy", rails=[rail.upper() for rail in self.rails],
+                               interval_ms=self.period_ns * 1e-6, clock=timebase.to_dict())
+        f = output_path.open("w")
+        f.write(self.header() + "\n")
+        f.flush()
+        return f
+
+    def run(self, output_path: Union[str, Path], stop=lambda: _stop_requested):
+        timebase = Timebase()
+        fds = self._fds
+        nb_fds = len(fds)
+        period_ns = self.period_ns
+
+        f = self.open_output(Path(output_path), timebase)
+        try:
+            writer = threading.Thread(target=self._write_loop, args=(f,), name="e3bench-inapy-writer")
+            writer.start()
+
+            timestamps, values = self._free_chunk(writer)
+            i = 0
+            deadline_ns = monotonic_ns()
+            flush_ns = deadline_ns + self.flush_interval_ns
+            try:
+                while not stop():
+                    remaining_ns = deadline_ns - monotonic_ns()
+                    if remaining_ns > 0:
+                        time.sleep(remaining_ns * 1e-9)
+
+                    now_ns = monotonic_ns()
+                    timestamps[i] = timebase.to_wall_ns(now_ns)
+                    for k in range(nb_fds):
+                        values[i, k] = int(os.pread(fds[k], 16, 0))
+                    i += 1
+                    self.nb_samples += 1
+                    if i == self.chunk_size or now_ns >= flush_ns:
+                        self._filled.put((timestamps, values, i))
+                        timestamps, values = self._free_chunk(writer)
+                        i = 0
+                        flush_ns = now_ns + self.flush_interval_ns
+
+                    # Next absolute deadline; skip the slots we are already late for
+                    lateness_ns = now_ns - deadline_ns
+                    if lateness_ns > self.max_lateness_ns:
+                        self.max_lateness_ns = lateness_ns
+                    deadline_ns += period_ns
+                    late_ns = monotonic_ns() - deadline_ns
+                    if late_ns >= period_ns:
+                        missed = late_ns // period_ns
+                        self.nb_overruns += missed
+                        deadline_ns += missed * period_ns
+            finally:
+                if i:
+                    self._filled.put((timestamps, values, i))
+                self._filled.put(None)
+                writer.join()
+            if self._writer_error is not None:
+                raise self._writer_error  # failed on the last chunks
+        finally:
+            if isinstance(f, TraceWriter):
+                timebase.close()
+                f.header["clock"] = timebase.to_dict()
+                f.header["nb_overruns"] = self.nb_overruns
+            f.close()
+
+        return self.nb_samples
+
+    def close(self):
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = []
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Sample INA3221 rails from sysfs at a fixed rate until Ctrl+C.")
+    parser.add_argument("rails", help=f"Comma-separated rail names among {list(INA_RAILS)} (case-insensitive)")
+    parser.add_argument("interval", type=float, help="Interval between samples in milliseconds")
+    parser.add_argument("output_path", type=Path, help="Output CSV file path (or an e3bench trace directory for a .e3t path)")
+    parser.add_argument("--device-path", type=Path, default=INA_DEVICE_PATH,
+                        help="hwmon directory of the INA3221 (a fake tree can be used for testing)")
+    return parser.parse_args()
+
+
+def main(args: Namespace):
+    signal.signal(signal.SIGINT, handle_sigint)
+
+    sampler = InaSampler(args.rails.split(","), args.interval, args.device_path)
+    logger.info(f"Sampling {args.rails} every {args.interval} ms --> {args.output_path}")
+    _start_ns = monotonic_ns()
+    try:
+        nb_samples = sampler.run(args.output_path)
+    finally:
+        sampler.close()
+
+    elapsed_s = (monotonic_ns() - _start_ns) * 1e-9
+    logger.info(f"{nb_samples} samples in {elapsed_s:.3f} s ({nb_samples / elapsed_s:.1f} Hz), "
+                f"{sampler.nb_overruns} overruns, max lateness {sampler.max_lateness_ns*1e-6:.3f} ms")
+
+
+__all__ = ["INA_DEVICE_PATH", "INA_RAILS", "rail_channel", "InaSampler"]
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
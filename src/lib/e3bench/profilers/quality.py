@@ -0,0 +1,39 @@
+from typing import Optional
+import numpy as np
+
+
+def sampling_report(timestamps_ns, interval_ms: Optional[float] = None, values=None) -> dict:
+    # How well a profiler kept its sampling rate: achieved frequency, interval statistics,
+    # gaps (intervals over twice the expected one) and repeated timestamps. With `values`,
+    # also the share of samples repeating the previous reading (stale sensor updates, e.g.
+    # nvidia-smi power refreshed slower than the query loop).
+    t = np.asarray(timestamps_ns, dtype=np.int64)
+    report = {"nb_samples": int(len(t))}
+    if len(t) < 2:
+        return report
+
+    dt_ms = np.diff(t) * 1e-6
+    expected_ms = interval_ms if interval_ms is not None else float(np.median(dt_ms))
+    duration_s = (t[-1] - t[0]) * 1e-9
+    report.update({
+        "duration_s": duration_s,
+        "freq_Hz": (len(t) - 1) / duration_s if duration_s > 0 else None,
+        "interval_expected_ms": expected_ms,
+        "interval_mean_ms": float(dt_ms.mean()),
+        "interval_median_ms": float(np.median(dt_ms)),
+        "interval_std_ms": float(dt_ms.std()),
+        "interval_p99_ms": float(np.percentile(dt_ms, 99)),
+        "interval_max_ms": float(dt_ms.max()),
+        "nb_gaps": int((dt_ms > 2 * expected_ms).sum()),
+        "nb_duplicates": int((dt_ms == 0).sum()),
+        "nb_backwards": int((dt_ms < 0).sum()),
+    })
+
+    if values is not None:
+        v = np.asarray(values, dtype=np.float64)
+        same = v[1:] == v[:-1]
+        report["stale_pct"] = float(same.mean() * 100)
+    return report
+
+
+__all__ = ["sampling_report"]
@@ -1,7 +1,13 @@
 from argparse import ArgumentParser, Namespace
+import signal
+import threading
 import time
-from loguru import logger
 from pathlib import Path
+from typing import List, Optional, Tuple, Union
+import numpy as np
+from loguru import logger
+
+from e3bench.clock import Timebase, monotonic_ns
 
 try:
     import serial
@@ -10,83 +16,204 @@ except Exception as e:
     raise
 
 
-def get_args() -> Namespace:
-    p = ArgumentParser(description="Read lines from a serial port at a fixed interval and log to file.")
-    p.add_argument("--port", required=True, help="Serial port (e.g. COM5")
-    p.add_argument("--interval", type=float, required=True, help="Interval between reads in milliseconds")
-    p.add_argument("--output-path", required=True, type=Path, help="Output file path")
-    p.add_argument("--baudrate", type=int, default=921600, help="Baud rate (default: 921600)")
-    p.add_argument("--timeout", type=float, default=0.0, help="Serial read timeout in seconds (default: 0)")
-    return p.parse_args()
+# One SmartPower3 log line: device time (ms), input then channel 0 and channel 1 readings
+# in mV, mA, mW. Newer firmwares append two checksums, which are ignored.
+SP3_FIELDS = [
+    "time",
+    "voltage_in", "current_in", "power_in", "on_off_in",
+    "voltage_c0", "current_c0", "power_c0", "on_off_c0", "interrupts_c0",
+    "voltage_c1", "current_c1", "power_c1", "on_off_c1", "interrupts_c1",
+]
+SP3_DEFAULT_PORT = "/dev/ttyUSB0"
+SP3_BAUDRATE = 921600
 
 
-def main(args: Namespace):
-    args = get_args()
+_stop_requested = False
+
+
+def handle_sigint(sig, frame):
+    global _stop_requested
+    _stop_requested = True
+
+
+def parse_sp3_line(line: bytes) -> Optional[List[float]]:
+    # b"0012345,15023,0412,06189,1,05102,..." --> numbers; None for partial or garbled lines
+    fields = line.strip().split(b",")
+    if len(fields) < len(SP3_FIELDS):
+        return None
+    try:
+        return [float(field) for field in fields[:len(SP3_FIELDS)]]
+    except ValueError:
+        return None
+
+
+class RingBuffer:
+    # Fixed-capacity sample buffer between the reader thread (push) and the writer (drain).
+    # If the writer falls behind by more than `capacity` samples, the oldest are dropped and counted.
+    def __init__(self, capacity: int, width: int):
+        self.capacity = capacity
+        self.timestamps = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty((capacity, width), dtype=np.float64)
+        self.nb_dropped = 0
+        self._head = 0  # number of samples pushed
+        self._tail = 0  # number of samples drained
+        self._lock = threading.Lock()
+
+    def push(self, timestamp_ns: int, values: List[float]):
+        with self._lock:
+            i = self._head % self.capacity
+            self.timestamps[i] = timestamp_ns
+            self.values[i] = values
+            self._head += 1
+            if self._head - self._tail > self.capacity:
+                self._tail += 1
+                self.nb_dropped += 1
+
+    def drain(self) -> Tuple[np.ndarray, np.ndarray]:
+        # Samples pushed since the last drain, oldest first
+        with self._lock:
+            start, end = self._tail, self._head
+            self._tail = end
+            idx = np.arange(start, end) % self.capacity
+            return self.timestamps[idx], self.values[idx]
+
+    def __len__(self):
+        return self._head - self._tail
+
+
+class SerialReader(threading.Thread):
+    # Drains the serial port continuously with bulk reads, so lines never wait in the OS buffer.
+    # Lines completed by one read are stamped with its arrival time, back-dated with the device
+    # clock (`time` field) for the lines that arrived earlier in the same read.
+    def __init__(self, ser, buffer: RingBuffer, timebase: Timebase, read_timeout: float = 0.05):
+        super().__init__(name="e3bench-smartpower3-reader", daemon=True)
+        self.ser = ser
+        self.buffer = buffer
+        self.timebase = timebase
+        self.read_timeout = read_timeout
+        self.nb_lines = 0
+        self.nb_invalid = 0
+        self.error = None
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def run(self):
+        partial = b""
+        try:
+            while not self._stop_event.is_set():
+                data = self.ser.read(self.ser.in_waiting or 1)  # blocks at most `read_timeout`
+                if not data:
+                    continue
+                if self.ser.in_waiting:
+                    data += self.ser.read(self.ser.in_waiting)
+                arrival_ns = self.timebase.now_ns()
+
+                *lines, partial = (partial + data).split(b"\n")
+                rows = [row for row in map(parse_sp3_line, lines) if row is not None]
+                self.nb_invalid += len(lines) - len(rows)
+                if not rows:
+                    continue
+                last_ms = rows[-1][0]
+                for row in rows:
+                    back_ms = last_ms - row[0]
+                    if not 0 <= back_ms < 1000:
+                        back_ms = 0  # device clock wrapped or garbled
+                    self.buffer.push(arrival_ns - int(back_ms * 1e6), row)
+                self.nb_lines += len(rows)
+        except Exception as e:
+            self.error = e
 
-    wait_s = max(0.0, args.interval_ms / 1000.0)
-    args.out.parent.mkdir(parents=True, exist_ok=True)
 
-    # Open serial
+def format_rows(timestamps: np.ndarray, values: np.ndarray) -> str:
+    # Readings are integers on the wire; keep them so
+    text = []
+    for ts, row in zip(timestamps.tolist(), values.tolist()):
+        text.append(f"{ts}," + ",".join(str(int(v)) if v.is_integer() else str(v) for v in row) + "\n")
+    return "".join(text)
+
+
+def open_serial(port: str, baudrate: int = SP3_BAUDRATE, rtscts: bool = True, read_timeout: float = 0.05):
     ser = serial.Serial(
-        port=args.port,
-        baudrate=args.baudrate,
+        port=port,
+        baudrate=baudrate,
         bytesize=8,
         parity=serial.PARITY_NONE,
-        rtscts=True,
-        timeout=args.timeout,
+        rtscts=rtscts,
+        timeout=read_timeout,
     )
-
     if not ser.is_open:
         ser.open()
+    ser.reset_input_buffer()  # stale lines would be stamped now
+    return ser
 
-    logger.debug(f"Reading {args.port} @ {args.baudrate} baud. Interval={args.interval} ms --> {args.out_path}")
-    logger.info("Press Ctrl+C to stop.")
 
-    # Create or truncate output file and write a CSV header
-    f = args.out.open("w", buffering=1, encoding="utf-8")
-    header = (
-        "timestamp_ns,time,"
-        "voltage_in,current_in,power_in,on_off_in,"
-        "voltage_c0,current_c0,power_c0,on_off_c0,interrupts_c0,"
-        "voltage_c1,current_c1,power_c1,on_off_c1,interrupts_c1"
-    )
-    f.write(f"{header}\n")
+def record(ser, output_path: Union[str, Path], flush_interval_ms: float = 100, capacity: int = 1 << 16,
+           stop=lambda: _stop_requested) -> Tuple[SerialReader, RingBuffer]:
+    # Reader thread --> ring buffer --> CSV, written every `flush_interval_ms`
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    timebase = Timebase()
+    buffer = RingBuffer(capacity, len(SP3_FIELDS))
+    reader = SerialReader(ser, buffer, timebase)
+
+    with output_path.open("w", encoding="utf-8") as f:
+        f.write("timestamp_ns," + ",".join(SP3_FIELDS) + "\n")
+        f.flush()
+        reader.start()
+        try:
+            while not stop() and reader.is_alive():
+                time.sleep(flush_interval_ms * 1e-3)
+                timestamps, values = buffer.drain()
+                if len(timestamps):
+                    f.write(format_rows(timestamps, values))
+                    f.flush()
+        finally:
+            reader.stop()
+            reader.join(timeout=1.0)
+            timestamps, values = buffer.drain()
+            f.write(format_rows(timestamps, values))
+
+    if reader.error is not None:
+        logger.error(f"Serial reader stopped: {reader.error}")
+    return reader, buffer
+
+
+def get_args() -> Namespace:
+    p = ArgumentParser(description="Record the SmartPower3 serial log (all lines, stamped on arrival) until Ctrl+C.")
+    p.add_argument("interval", type=float,
+                   help="Interval between writes to the output in milliseconds. The sampling rate itself "
+                        "is the log interval set on the SmartPower3.")
+    p.add_argument("output_path", type=Path, help="Output CSV file path")
+    p.add_argument("--port", default=SP3_DEFAULT_PORT, help=f"Serial port (default: {SP3_DEFAULT_PORT})")
+    p.add_argument("--baudrate", type=int, default=SP3_BAUDRATE, help=f"Baud rate (default: {SP3_BAUDRATE})")
+    p.add_argument("--no-rtscts", action="store_true", help="Disable RTS/CTS flow control")
+    p.add_argument("--capacity", type=int, default=1 << 16,
+                   help="Ring buffer capacity in samples (default: 65536)")
+    return p.parse_args()
+
 
-    lines_written = 0
-    t_next = time.monotonic()
+def main(args: Namespace):
+    signal.signal(signal.SIGINT, handle_sigint)
+
+    ser = open_serial(args.port, args.baudrate, rtscts=not args.no_rtscts)
+    logger.debug(f"Reading {args.port} @ {args.baudrate} baud --> {args.output_path}")
+    logger.info("Press Ctrl+C to stop.")
 
+    _start_ns = monotonic_ns()
     try:
-        while True:
-            start_ns = time.time_ns()
-            raw = ser.readline()  # reads until '\n' or timeout
-            if raw:
-                # Decode safely; replace undecodable bytes
-                line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
-                f.write(f"{start_ns},{line}\n")
-                lines_written += 1
-
-            # Sleep until next tick (fixed-rate scheduling)
-            t_next += wait_s
-            now = time.monotonic()
-            delay = t_next - now
-            if delay > 0:
-                time.sleep(delay)
-            else:
-                # We're behind schedule; catch up next iteration
-                t_next = now
-    except KeyboardInterrupt:
-        print("\n[INFO] Ctrl+C received. Stopping...")
+        reader, buffer = record(ser, args.output_path, args.interval, args.capacity)
     finally:
-        try:
-            f.flush()
-            f.close()
-        except Exception:
-            pass
-        try:
-            ser.close()
-        except Exception:
-            pass
-        print(f"[INFO] Closed serial and file. Lines written: {lines_written}")
+        ser.close()
+
+    elapsed_s = (monotonic_ns() - _start_ns) * 1e-9
+    logger.info(f"{reader.nb_lines} samples in {elapsed_s:.3f} s ({reader.nb_lines / elapsed_s:.1f} Hz), "
+                f"{reader.nb_invalid} invalid lines, {buffer.nb_dropped} dropped")
+
+
+__all__ = ["SP3_FIELDS", "SP3_DEFAULT_PORT", "parse_sp3_line", "RingBuffer", "SerialReader", "open_serial", "record"]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,7 @@
+from .post_process import normalize_smi_frame, post_process_smiprof
+
+
+__all__ = [
+    "normalize_smi_frame",
+    "post_process_smiprof",
+]
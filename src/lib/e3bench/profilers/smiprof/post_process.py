@@ -0,0 +1,213 @@
+import io
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from itertools import islice
+from typing import Iterator, Union
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from ..quality import sampling_report
+
+
+# `nvidia-smi --query-gpu=... --format=csv` writes a header with the units of each field
+# ("power.draw.instant [W]", "utilization.gpu [%]") and repeats the unit in every value
+# ("52.34 W", "12 %"). Unavailable values read "[N/A]" or "[Not Supported]".
+SMI_TS_FORMAT = "%Y/%m/%d %H:%M:%S.%f"
+SMI_NA_VALUES = ["[N/A]", "[Not Supported]", "[Unknown Error]", "[Insufficient Permissions]"]
+TS_WIDTH = 23  # "2025/11/27 15:42:01.123"
+TS_SEPARATORS = {4: "/", 7: "/", 10: " ", 13: ":", 16: ":", 19: "."}
+TS_DIGITS = [i for i in range(TS_WIDTH) if i not in TS_SEPARATORS]
+NO_TIMESTAMP = np.iinfo(np.int64).min
+HEADER_RE = re.compile(r'^(?P<field>[\w.]+)(?: \[(?P<unit>[^\]]+)\])?$')
+
+# nvidia-smi field --> column of the normalized schema (tegrastats-like names)
+SMI_COLUMNS = {
+    "power.draw.instant": "power_mw",
+    "power.draw.average": "power_avg_mw",
+    "power.draw": "power_mw",
+    "temperature.gpu": "temp_gpu_C",
+    "temperature.memory": "temp_mem_C",
+    "utilization.gpu": "gpu_pct",
+    "utilization.memory": "mem_pct",
+    "memory.used": "mem_used_mb",
+    "memory.total": "mem_total_mb",
+    "clocks.sm": "sm_mhz",
+    "clocks.gr": "gr3d_mhz",
+    "clocks.mem": "emc_mhz",
+    "index": "gpu_index",
+    "name": "gpu_name",
+}
+UNIT_SCALES = {"W": 1e3}  # to mW; other units (%, MiB, MHz, C) are kept
+
+
+def parse_header(column: str):
+    # "power.draw.instant [W]" --> ("power.draw.instant", "W")
+    m = HEADER_RE.match(column.strip())
+    if not m:
+        return column.strip(), None
+    return m.group('field'), m.group('unit')
+
+
+def column_name(field: str, unit: str, taken: set) -> str:
+    name = SMI_COLUMNS.get(field)
+    if name is None or name in taken:
+        suffix = {"%": "pct", "W": "mw", "MiB": "mb", "MHz": "mhz"}.get(unit, unit.lower() if unit else "")
+        name = field.replace(".", "_") + (f"_{suffix}" if suffix else "")
+    return name
+
+
+def strip_unit(values: pd.Series, unit: str) -> pd.Series:
+    # Bulk string ops on the whole column; "[N/A]" and the like become NaN
+    if values.dtype.kind in "iufb":
+        return values
+    values = values.astype(str).str.strip()
+    if unit:
+        values = values.str.removesuffix(unit).str.rstrip()
+    return pd.to_numeric(values, errors='coerce')
+
+
+def naive_ns_from_bytes(raw: np.ndarray):
+    # b"2025/11/27 15:42:01.123" --> ns since epoch (as if UTC), computed from the digit bytes
+    n = len(raw)
+    b = np.frombuffer(raw.astype(f"S{TS_WIDTH}").tobytes(), dtype=np.uint8).reshape(n, TS_WIDTH).astype(np.int64)
+    valid = np.ones(n, dtype=bool)
+    for pos, char in TS_SEPARATORS.items():
+        valid &= b[:, pos] == ord(char)
+    digits = b - ord("0")
+    valid &= ((digits[:, TS_DIGITS] >= 0) & (digits[:, TS_DIGITS] <= 9)).all(axis=1)
+
+    def number(start, end):
+        value = np.zeros(n, dtype=np.int64)
+        for pos in range(start, end):
+            value = value * 10 + digits[:, pos]
+        return np.where(valid, value, 0)
+
+    year, month, day = number(0, 4), number(5, 7), number(8, 10)
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    month = np.where(valid, month, 1)
+    day = np.where(valid, day, 1)
+    days = ((np.where(valid, year, 1970) - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1))
+    days = (days.astype('datetime64[D]') + (day - 1)).astype(np.int64)
+
+    seconds = days * 86400 + number(11, 13) * 3600 + number(14, 16) * 60 + number(17, 19)
+    return seconds * 1_000_000_000 + number(20, 23) * 1_000_000, valid
+
+
+def smi_timestamps_ns(values) -> np.ndarray:
+    # Local time with ms resolution --> epoch ns, as `datetime.strptime(...).timestamp()` would give.
+    # Parsed in bulk as if UTC, then shifted by the local UTC offset computed once per distinct minute.
+    # Unparsable values get the int64 minimum.
+    values = np.asarray(values)
+    if values.dtype.kind == "S":
+        naive_ns, valid = naive_ns_from_bytes(values)
+    else:
+        naive = pd.to_datetime(pd.Series(values).astype(str).str.strip(), format=SMI_TS_FORMAT, errors='coerce')
+        naive_ns = naive.to_numpy().astype('datetime64[ns]').astype(np.int64)
+        valid = naive.notna().to_numpy()
+
+    minutes = naive_ns[valid] // 60_000_000_000
+    unique_minutes, inverse = np.unique(minutes, return_inverse=True)
+    offsets_ns = np.array([int(round((datetime(1970, 1, 1) + timedelta(minutes=int(m))).timestamp() - int(m) * 60))
+                           for m in unique_minutes], dtype=np.int64) * 1_000_000_000
+
+    timestamps = np.full(len(naive_ns), NO_TIMESTAMP, dtype=np.int64)
+    timestamps[valid] = naive_ns[valid] + offsets_ns[inverse.reshape(-1)]
+    return timestamps
+
+
+def text_column(values) -> pd.Categorical:
+    values = np.asarray(values)
+    if values.dtype.kind == "S":
+        # GPU names: a handful of distinct values in long runs, decoded once each
+        starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+        uniques, codes = np.unique(values[starts], return_inverse=True)
+        names = [u.decode(errors="replace").strip() for u in uniques]
+        run_lengths = np.diff(np.r_[starts, len(values)])
+        return pd.Categorical.from_codes(np.repeat(codes.reshape(-1), run_lengths), categories=names)
+    return pd.Categorical(pd.Series(values).astype(str).str.strip())
+
+
+def normalize_smi_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Raw nvidia-smi CSV --> `timestamp_ns` (epoch ns), `power_mw` and tegrastats-like columns
+    data = {}
+    taken = set()
+    for column in df.columns:
+        field, unit = parse_header(column)
+        if field == "timestamp":
+            data['timestamp_ns'] = smi_timestamps_ns(df[column].to_numpy())
+            continue
+        name = column_name(field, unit, taken)
+        taken.add(name)
+        if field == "name":
+            data[name] = text_column(df[column].to_numpy())
+            continue
+        values = strip_unit(df[column], unit)
+        scale = UNIT_SCALES.get(unit)
+        data[name] = (values * scale if scale else values).to_numpy()
+
+    if 'timestamp_ns' not in data:
+        raise ValueError("No timestamp column in the nvidia-smi output")
+
+    out = pd.DataFrame(data)
+    out = out[out['timestamp_ns'] != NO_TIMESTAMP]  # unparsable lines (e.g. a repeated header)
+    out['row_idx'] = np.arange(len(out), dtype=np.int64)
+    return out.reset_index(drop=True)
+
+
+def read_smi_bytes(data: bytes) -> pd.DataFrame:
+    # The units are removed from the whole text at once (" W," --> ","), so the C parser reads
+    # the values as numbers directly; timestamps and names stay fixed-width bytes
+    header, _, body = data.partition(b"\n")
+    columns = [c.strip() for c in header.decode(errors="replace").split(",")]
+    for unit in {parse_header(c)[1] for c in columns} - {None}:
+        for end in (b",", b"\r\n", b"\n"):
+            body = body.replace(b" " + unit.encode() + end, end)
+
+    dtypes = {c: f"S{TS_WIDTH}" if parse_header(c)[0] == "timestamp" else "S64"
+              for c in columns if parse_header(c)[0] in ("timestamp", "name")}
+    return pd.read_csv(io.BytesIO(header + b"\n" + body), skipinitialspace=True, na_values=SMI_NA_VALUES,
+                       on_bad_lines="skip",
+                       dtype=dtypes)
+
+
+def iter_smi_chunks(path: Union[str, Path], chunk_size: int = 65536) -> Iterator[pd.DataFrame]:
+    # Normalized frames of `chunk_size` lines, with `row_idx` continuing across chunks
+    row_offset = 0
+    with open(path, "rb") as f:
+        header = f.readline()
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                return
+            df = normalize_smi_frame(read_smi_bytes(header + b"".join(lines)))
+            df['row_idx'] += row_offset
+            row_offset += len(df)
+            yield df
+
+
+def post_process_smiprof(path: Union[str, Path]) -> pd.DataFrame:
+    path = Path(path).resolve()
+    logger.debug(f'Processing power from {path}')
+    df = normalize_smi_frame(read_smi_bytes(path.read_bytes()))
+
+    report = sampling_report(df['timestamp_ns'], values=df['power_mw'] if 'power_mw' in df.columns else None)
+    if report['nb_samples'] > 1:
+        logger.debug(f"Parsed {report['nb_samples']} rows: {report['freq_Hz'] or 0:.1f} Hz, "
+                     f"p99 interval {report['interval_p99_ms']:.1f} ms, {report['nb_gaps']} gaps, "
+                     f"{report.get('stale_pct', float('nan')):.1f}% repeated power readings")
+    return df
+
+
+__all__ = [
+    "SMI_TS_FORMAT",
+    "SMI_COLUMNS",
+    "parse_header",
+    "strip_unit",
+    "smi_timestamps_ns",
+    "normalize_smi_frame",
+    "read_smi_bytes",
+    "iter_smi_chunks",
+    "post_process_smiprof",
+]
@@ -1,4 +1,14 @@
 from .post_process import post_process_tegra_jon
+from .chunks import iter_tegra_chunks, iter_tegra_power_long
+from .stream import RollingStats, stream_tegrastats
+from .summary import TegraSummary
 
 
-__all__ = ["post_process_tegra_jon"]
+__all__ = [
+    "post_process_tegra_jon",
+    "iter_tegra_chunks",
+    "iter_tegra_power_long",
+    "RollingStats",
+    "stream_tegrastats",
+    "TegraSummary",
+]
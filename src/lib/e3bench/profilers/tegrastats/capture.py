@@ -0,0 +1,120 @@
+from argparse import ArgumentParser, Namespace
+import os
+import shutil
+import signal
+import subprocess
+from pathlib import Path
+from typing import List, Union
+from loguru import logger
+
+from e3bench.clock import Timebase, monotonic_ns
+from .regex import ARRIVAL_SEP
+
+
+# tegrastats prints its timestamp with a 1 s resolution. In capture mode e3bench reads the
+# tegrastats stdout through a pipe (instead of `--logfile`) and writes every line prefixed
+# with its arrival time, in epoch ns of the session timebase:
+#
+#   1764254521123456789<TAB>11-27-2025 15:42:01 RAM 2345/7620MB ... VDD_IN 5012mW/5012mW ...
+#
+# The raw line is kept as is for `parse_line`; the post-processing uses the arrival
+# times instead of spreading the samples of each second evenly (`adjust_timestamp`).
+
+
+_stop_requested = False
+
+
+def handle_sigint(sig, frame):
+    global _stop_requested
+    _stop_requested = True
+
+
+def tegrastats_command(interval) -> List[str]:
+    # Line-buffered stdout: with a pipe, stdio would otherwise hold lines back in 4 KB blocks
+    command = ["tegrastats", "--interval", str(interval)]
+    if shutil.which("stdbuf") is not None:
+        command = ["stdbuf", "-oL"] + command
+    return command
+
+
+def stamp_lines(lines: List[bytes], arrival_ns: int, interval_ns: int) -> bytes:
+    # Lines completed by one read arrived together: the earlier ones are back-dated
+    # by one interval each (the pipe delivered them late, tegrastats did not sample late)
+    last = len(lines) - 1
+    return b"".join(b"%d%s%s\n" % (arrival_ns - (last - i) * interval_ns, ARRIVAL_SEP.encode(), line.rstrip(b"\r"))
+                    for i, line in enumerate(lines))
+
+
+def capture(proc: subprocess.Popen, output_path: Union[str, Path], interval_ms: float,
+            timebase: Timebase, stop=lambda: _stop_requested) -> dict:
+    # Read the tegrastats stdout until it closes and write the stamped lines, one write per read.
+    # Once `stop()` is true, tegrastats is asked to stop and its last lines are still drained.
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = proc.stdout.fileno()
+    interval_ns = int(interval_ms * 1e6)
+
+    stats = {"nb_lines": 0, "nb_reads": 0, "nb_batched": 0}
+    partial = b""
+    with output_path.open("wb") as f:
+        while True:
+            data = os.read(fd, 65536)  # returns as soon as a line is written
+            arrival_ns = timebase.now_ns()
+            if not data:
+                break
+            if stop() and proc.poll() is None:
+                proc.terminate()
+            *lines, partial = (partial + data).split(b"\n")
+            lines = [line for line in lines if line.strip()]
+            if not lines:
+                continue
+            f.write(stamp_lines(lines, arrival_ns, interval_ns))
+            f.flush()
+            stats["nb_lines"] += len(lines)
+            stats["nb_reads"] += 1
+            stats["nb_batched"] += len(lines) > 1
+        if partial.strip():
+            f.write(stamp_lines([partial], timebase.now_ns(), interval_ns))
+            stats["nb_lines"] += 1
+    return stats
+
+
+def get_args() -> Namespace:
+    p = ArgumentParser(description="Run tegrastats and record its output with per-line arrival timestamps until Ctrl+C.")
+    p.add_argument("interval", type=int, help="Sampling interval in milliseconds")
+    p.add_argument("output_path", type=Path, help="Output file path")
+    return p.parse_args()
+
+
+def main(args: Namespace):
+    signal.signal(signal.SIGINT, handle_sigint)
+
+    command = tegrastats_command(args.interval)
+    logger.debug(f"Capturing `{' '.join(command)}` --> {args.output_path}")
+    logger.info("Press Ctrl+C to stop.")
+
+    timebase = Timebase()
+    _start_ns = monotonic_ns()
+    # Same process group: Ctrl+C (or the wrapper's SIGINT to the group) also stops tegrastats,
+    # which closes the pipe and ends the capture
+    proc = subprocess.Popen(command, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL)
+    try:
+        stats = capture(proc, args.output_path, args.interval, timebase)
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+
+    elapsed_s = (monotonic_ns() - _start_ns) * 1e-9
+    logger.info(f"{stats['nb_lines']} samples in {elapsed_s:.3f} s ({stats['nb_lines'] / elapsed_s:.1f} Hz)")
+    if stats["nb_batched"]:
+        logger.warning(f"{stats['nb_batched']}/{stats['nb_reads']} reads returned several lines "
+                       f"(back-dated by {args.interval} ms each); is tegrastats stdout buffered?")
+
+
+__all__ = ["tegrastats_command", "stamp_lines", "capture"]
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
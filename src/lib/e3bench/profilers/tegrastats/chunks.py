@@ -0,0 +1,144 @@
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .fast import parse_lines
+from .post_process import adjust_timestamp, has_arrival, use_arrival
+from .summary import TegraSummary
+
+
+def column_dtype(col: str) -> str:
+    # Fixed schema of the chunked loader: epoch ns and row index on 64 bits, temperatures
+    # as float32, every other field (MB, %, MHz, mW) as nullable int32
+    if col in ('timestamp_ns', 'row_idx'):
+        return 'int64'
+    if col.startswith('temp_'):
+        return 'float32'
+    return 'Int32'
+
+
+class TegraSchema:
+    # Columns are fixed by the first chunk; later chunks are reindexed to them
+    def __init__(self, columns: List[str]):
+        fields = sorted(c for c in columns if c not in ('timestamp_raw', 'timestamp_ns', 'row_idx'))
+        self.columns = ['timestamp_ns', 'row_idx'] + fields
+        self.dtypes = {c: column_dtype(c) for c in self.columns}
+        self._warned = set()
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        extra = set(df.columns) - set(self.columns) - {'timestamp_raw'} - self._warned
+        if extra:
+            logger.warning(f"Columns missing from the first chunk are dropped: {sorted(extra)}")
+            self._warned |= extra
+
+        data = {}
+        for col in self.columns:
+            dtype = self.dtypes[col]
+            if col not in df.columns:
+                data[col] = pd.array([None] * len(df), dtype=dtype) if dtype != 'float32' \
+                    else np.full(len(df), np.nan, dtype=np.float32)
+            elif dtype == 'Int32':
+                data[col] = pd.to_numeric(df[col], errors='coerce').astype('Int32')
+            else:
+                data[col] = pd.to_numeric(df[col], errors='coerce').to_numpy().astype(dtype)
+        return pd.DataFrame(data, index=df.index)
+
+
+def iter_tegra_chunks(log_path: Union[str, Path], chunk_size: int = 65536,
+                      summary: Optional[TegraSummary] = None) -> Iterator[pd.DataFrame]:
+    # Yield the post-processed trace (same values as `post_process_tegra_jon`, fixed dtypes,
+    # no `timestamp_raw`) in blocks of about `chunk_size` lines. Peak memory does not
+    # depend on the log length.
+    #
+    # `adjust_timestamp` spreads the samples of each second evenly, so it needs every
+    # sample of that second: the rows of the last second of a chunk are held back and
+    # processed with the next chunk. Logs captured through a pipe (see `capture`) carry
+    # arrival times and need neither: the first chunk decides for the whole log.
+    log_path = Path(log_path).resolve()
+    logger.debug(f'Processing power from {log_path} by chunks of {chunk_size} lines')
+
+    schema = None
+    stamped = None
+    carry = None
+    row_offset = 0
+    with open(log_path) as f:
+        while True:
+            lines = list(islice(f, chunk_size))
+            at_end = not lines
+
+            if lines:
+                df = parse_lines(lines)
+                df['row_idx'] += row_offset
+                row_offset += len(df)
+                if stamped is None and not df.empty:
+                    stamped = has_arrival(df)
+                if stamped:
+                    df = use_arrival(df) if 'arrival_ns' in df.columns else df.iloc[:0]
+                else:
+                    df = df.drop(columns=['arrival_ns'], errors='ignore')
+                if schema is None and not df.empty:
+                    schema = TegraSchema(list(df.columns))
+                df = schema.apply(df) if schema is not None else None
+            else:
+                df = None
+
+            if carry is not None:
+                df = carry if df is None else pd.concat([carry, df], ignore_index=True)
+                carry = None
+            if df is None or df.empty:
+                if at_end:
+                    break
+                continue
+
+            df = df.sort_values(['timestamp_ns', 'row_idx'], kind='stable').reset_index(drop=True)
+            if not at_end and not stamped:
+                last_second = df['timestamp_ns'].iloc[-1]
+                held = (df['timestamp_ns'] == last_second).to_numpy()
+                carry = df[held].reset_index(drop=True)
+                df = df[~held].reset_index(drop=True)
+
+            if not df.empty:
+                if not stamped:
+                    df = adjust_timestamp(df)
+                if summary is not None:
+                    summary.update(df)
+                yield df
+            if at_end:
+                break
+
+
+def to_long_power(df: pd.DataFrame, rails: List[str]) -> pd.DataFrame:
+    # Wide `<RAIL>_mw_now` / `<RAIL>_mw_avg` columns --> one row per (sample, rail)
+    # with `rail` as a categorical over the fixed `rails` list
+    parts = []
+    for code, rail in enumerate(rails):
+        if f'{rail}_mw_now' not in df.columns:
+            continue
+        parts.append(pd.DataFrame({
+            'timestamp_ns': df['timestamp_ns'].to_numpy(),
+            'row_idx': df['row_idx'].to_numpy(),
+            'rail': pd.Categorical.from_codes(np.full(len(df), code), categories=rails),
+            'power_mw': df[f'{rail}_mw_now'].astype('Int32').array,
+            'power_avg_mw': df[f'{rail}_mw_avg'].astype('Int32').array,
+        }))
+    if not parts:
+        return pd.DataFrame({'timestamp_ns': np.array([], dtype=np.int64), 'row_idx': np.array([], dtype=np.int64),
+                             'rail': pd.Categorical([], categories=rails),
+                             'power_mw': pd.array([], dtype='Int32'), 'power_avg_mw': pd.array([], dtype='Int32')})
+    return pd.concat(parts, ignore_index=True)
+
+
+def iter_tegra_power_long(log_path: Union[str, Path], chunk_size: int = 65536,
+                          summary: Optional[TegraSummary] = None) -> Iterator[pd.DataFrame]:
+    # Power rails only, in long format (timestamp_ns, row_idx, rail, power_mw, power_avg_mw)
+    rails = None
+    for df in iter_tegra_chunks(log_path, chunk_size, summary):
+        if rails is None:
+            rails = [c[:-len('_mw_now')] for c in df.columns if c.endswith('_mw_now')]
+        yield to_long_power(df, rails)
+
+
+__all__ = ["column_dtype", "TegraSchema", "iter_tegra_chunks", "to_long_power", "iter_tegra_power_long"]
@@ -0,0 +1,184 @@
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+from .regex import ARRIVAL_SEP, TS_RE, FIELDS_RE, CPU_PAIR_RE
+
+
+# Standalone numbers of a line (not the digits inside names such as `soc2@` or `12x4MB`)
+NUMBER = r'(-?\d+(?:\.\d+)?)'
+NUM_RE = re.compile(r'(?<![A-Za-z0-9_.])' + NUMBER)
+
+# Lines of one tegrastats log almost all share the same *shape*: the same text once the
+# numbers are removed. The fields of a shape are located once (with the usual regexes)
+# and a full-line regex is compiled for it, so each line costs a single `match` that
+# returns its timestamp and numbers. The numbers are converted column by column with
+# NumPy; no dict is built per line.
+
+
+def split_arrival(line: str) -> Tuple[Optional[int], str]:
+    # "<arrival_ns>\t<tegrastats line>" (capture mode) --> (arrival_ns, line); (None, line) otherwise
+    head, sep, rest = line.partition(ARRIVAL_SEP)
+    if sep and head.isdigit():
+        return int(head), rest
+    return None, line
+
+
+def shape_template(literals) -> re.Pattern:
+    # Timestamp, then the literal parts of the shape with a number between each of them
+    body = NUMBER.join(re.escape(literal) for literal in literals)
+    return re.compile(r'(\d{2}-\d{2}-\d{4} \d{2}:\d{2}:\d{2})' + body + r'\Z')
+
+
+def line_plan(rest: str) -> dict:
+    # column --> (kind, token, value): `token` is the index of the number holding the value
+    # in the line, or None when the value is part of the shape (e.g. "off", the 4 of "12x4MB")
+    token_index = {m.start(): i for i, m in enumerate(NUM_RE.finditer(rest))}
+    plan = {}
+
+    def add(column, kind, start, value):
+        plan[column] = (kind, token_index.get(start), value)
+
+    def add_int(column, m, group):
+        add(column, "int", m.start(group), int(m.group(group)))
+
+    seen = set()
+    for m in FIELDS_RE.finditer(rest):
+        kind = m.lastgroup
+        if kind not in ("temp", "pwr"):
+            if kind in seen:
+                continue  # like `re.search`, only the first occurrence counts
+            seen.add(kind)
+
+        if kind == "pwr":
+            rail = m.group('rail')
+            add_int(f'{rail}_mw_now', m, 'now_mw')
+            add_int(f'{rail}_mw_avg', m, 'avg_mw')
+        elif kind == "temp":
+            temp = float(m.group('temp_c'))
+            add(f"temp_{m.group('temp_name')}_C", "temp", m.start('temp_c'), None if temp <= -200 else temp)
+        elif kind == "cpu":
+            offset = m.start('cpu_body')
+            for (i, pair) in enumerate(CPU_PAIR_RE.finditer(m.group('cpu_body'))):
+                if pair.group('off'):
+                    plan[f'cpu{i}_pct'] = ("int", None, None)
+                    plan[f'cpu{i}_mhz'] = ("int", None, None)
+                else:
+                    add(f'cpu{i}_pct', "int", offset + pair.start('pct'), int(pair.group('pct')))
+                    add(f'cpu{i}_mhz', "int", offset + pair.start('mhz'), int(pair.group('mhz')))
+        elif kind == "ram":
+            add_int('ram_used_mb', m, 'ram_used')
+            add_int('ram_total_mb', m, 'ram_total')
+            add_int('lfb_blocks', m, 'lfb_blocks')
+            add_int('lfb_block_mb', m, 'lfb_mb')
+        elif kind == "swap":
+            add_int('swap_used_mb', m, 'swap_used')
+            add_int('swap_total_mb', m, 'swap_total')
+            add_int('swap_cached_mb', m, 'swap_cached')
+        elif kind == "emc":
+            add_int('emc_pct', m, 'emc_pct')
+            add_int('emc_mhz', m, 'emc_mhz')
+        elif kind == "gr3d":
+            add_int('gr3d_pct', m, 'gr3d_pct')
+            add_int('gr3d_mhz', m, 'gr3d_mhz_plain' if m.group('gr3d_mhz_plain') else 'gr3d_mhz_bracket')
+        elif kind == "vic":
+            add_int('vic_mhz', m, 'vic_mhz')
+        elif kind == "ape":
+            add_int('ape_mhz', m, 'ape_mhz')
+    return plan
+
+
+def parse_lines(lines: Iterable[str]) -> pd.DataFrame:
+    # Same columns and dtypes as a DataFrame of `parse_line` rows, plus `row_idx`
+    timestamps_raw = []
+    timestamps_ns = []
+    arrivals_ns = []  # capture mode only (see `split_arrival`)
+    ts_cache = {}
+    shapes = {}  # shape --> (template, plan, numbers of each line, row index of each line)
+    entry = None  # shape of the previous line
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        arrival_ns, line = split_arrival(line)
+
+        m = entry[0].match(line) if entry is not None else None
+        if m is not None:
+            ts, *numbers = m.groups()
+        else:
+            # New shape (or a line tegrastats did not finish writing)
+            tm = TS_RE.search(line)
+            if not tm:
+                continue
+            ts = tm.group('ts')
+            rest = line[tm.end():]
+            parts = NUM_RE.split(rest)
+            shape = "\0".join(parts[::2])
+            entry = shapes.get(shape)
+            if entry is None:
+                entry = shapes[shape] = (shape_template(parts[::2]), line_plan(rest), [], [])
+            numbers = parts[1::2]
+
+        entry[2].append(numbers)
+        entry[3].append(len(timestamps_raw))
+
+        # strptime only once per second
+        ts_ns = ts_cache.get(ts)
+        if ts_ns is None:
+            ts_ns = ts_cache[ts] = datetime.strptime(ts, '%m-%d-%Y %H:%M:%S').timestamp() * 1e9
+
+        timestamps_raw.append(ts)
+        timestamps_ns.append(ts_ns)
+        arrivals_ns.append(arrival_ns)
+
+    # Column-wise conversion into typed arrays
+    nb_rows = len(timestamps_raw)
+    columns = {}
+    kinds = {}
+    covered = {}  # number of rows whose line has the column
+    for _, plan, numbers, rows in shapes.values():
+        numbers = np.array(numbers, dtype=np.float64)
+        rows = np.asarray(rows, dtype=np.int64)
+        for column, (kind, token, value) in plan.items():
+            if column not in columns:
+                columns[column] = np.full(nb_rows, np.nan)
+                kinds[column] = kind
+                covered[column] = 0
+            covered[column] += len(rows)
+            if token is None:
+                columns[column][rows] = np.nan if value is None else value
+                continue
+            values = numbers[:, token]
+            if kind == "temp":
+                # Some sensors report -256C when unavailable
+                values = np.where(values <= -200, np.nan, values)
+            columns[column][rows] = values
+
+    data = {
+        'timestamp_raw': timestamps_raw,
+        'timestamp_ns': np.asarray(timestamps_ns, dtype=np.float64),
+    }
+    for column, values in columns.items():
+        if np.isnan(values).all() and covered[column] == nb_rows:
+            # e.g. an always offline core. Like pd.DataFrame(rows), a column missing from
+            # some lines (mixed boards) stays float64 NaN.
+            values = np.full(nb_rows, None, dtype=object)
+        elif kinds[column] == "int" and not np.isnan(values).any():
+            values = values.astype(np.int64)
+        data[column] = values
+    if any(a is not None for a in arrivals_ns):
+        data['arrival_ns'] = pd.array(arrivals_ns, dtype='Int64')
+    data['row_idx'] = np.arange(nb_rows, dtype=np.int64)
+    return pd.DataFrame(data)
+
+
+def parse_log(log_path: Union[str, Path]) -> pd.DataFrame:
+    with open(log_path) as f:
+        return parse_lines(f)
+
+
+__all__ = ["NUM_RE", "split_arrival", "shape_template", "line_plan", "parse_lines", "parse_log"]
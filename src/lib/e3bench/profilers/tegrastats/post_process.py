@@ -1,15 +1,18 @@
 from pathlib import Path
 from typing import Union
 from datetime import datetime
-from collections import defaultdict
+import numpy as np
 import pandas as pd
 from loguru import logger
 from .regex import *
+from .fast import parse_log, split_arrival
+from .summary import TegraSummary
 
 
 
 def parse_line(line: str):
     row = {}
+    arrival_ns, line = split_arrival(line)
 
     # Timestamp
     tm = TS_RE.search(line)
@@ -19,6 +22,8 @@ def parse_line(line: str):
     # Conversion to ISO dt (can be localized if you needed)
     row['timestamp_raw'] = tm.group('ts')
     row['timestamp_ns'] = datetime.strptime(tm.group('ts'), '%m-%d-%Y %H:%M:%S').timestamp() * 1e9
+    if arrival_ns is not None:
+        row['arrival_ns'] = arrival_ns
 
     # RAM / SWAP
     if m := RAM_RE.search(line):
@@ -98,11 +103,24 @@ def adjust_timestamp(dataframe: pd.DataFrame) -> pd.DataFrame:
     return dataframe
 
 
+def has_arrival(dataframe: pd.DataFrame) -> bool:
+    # Every line was stamped on arrival (see `capture`)
+    return 'arrival_ns' in dataframe.columns and bool(dataframe['arrival_ns'].notna().all())
 
-def post_process_tegra_jon(log_path: Union[str, Path]):
-    log_path = Path(log_path).resolve()
-    logger.debug(f'Processing power from {log_path}')
 
+def use_arrival(dataframe: pd.DataFrame) -> pd.DataFrame:
+    # Arrival times replace the 1 s tegrastats timestamps; lines without one are dropped
+    missing = dataframe['arrival_ns'].isna()
+    if missing.any():
+        logger.warning(f"{int(missing.sum())} lines without an arrival timestamp are dropped.")
+        dataframe = dataframe[~missing]
+    dataframe = dataframe.copy()
+    dataframe['timestamp_ns'] = dataframe.pop('arrival_ns').to_numpy().astype(np.int64)
+    return dataframe.sort_values(['timestamp_ns', 'row_idx'], kind='stable').reset_index(drop=True)
+
+
+def parse_log_rows(log_path: Union[str, Path]) -> pd.DataFrame:
+    # Reference implementation: one `parse_line` dict per row
     rows = []
     with open(log_path) as f:
         row_idx = 0
@@ -116,44 +134,37 @@ def post_process_tegra_jon(log_path: Union[str, Path]):
                 clean_row['row_idx'] = row_idx
                 rows.append(clean_row)
                 row_idx += 1
+    return pd.DataFrame(rows)
+
+
+def post_process_tegra_jon(log_path: Union[str, Path], fast: bool = True):
+    log_path = Path(log_path).resolve()
+    logger.debug(f'Processing power from {log_path}')
+
+    # The fast path gives the same columns and dtypes, without building a dict per line
+    df = parse_log(log_path) if fast else parse_log_rows(log_path)
 
-    if not rows:
+    if df.empty:
         logger.info("No parsable lines found.")
         return
     
     # Normalize to DataFrame
-    df = pd.DataFrame(rows).sort_values(['timestamp_ns','row_idx']).reset_index(drop=True)
+    df = df.sort_values(['timestamp_ns','row_idx']).reset_index(drop=True)
 
     cols = ['timestamp_raw', 'timestamp_ns', 'row_idx']
     cols += sorted([c for c in df.columns if (c not in cols)])
     df = df[cols]
 
-    # Adjust timestamp from seconds to nanoseconds
-    df = adjust_timestamp(df)
+    if has_arrival(df):
+        # Captured through a pipe: each line has its own arrival time
+        df = use_arrival(df)
+    else:
+        # Adjust timestamp from seconds to nanoseconds
+        df = adjust_timestamp(df.drop(columns=['arrival_ns'], errors='ignore'))
 
     # Small summary preview
-    try:
-        summary = defaultdict(dict)
-        if 'VDD_SOC_mw_now' in df.columns:
-            summary['power']['VDD_SOC_mw_now_mean'] = float(df['VDD_SOC_mw_now'].mean())
-            summary['power']['VDD_SOC_mw_now_max']  = int(df['VDD_SOC_mw_now'].max())
-        if 'emc_pct' in df:
-            summary['emc']['emc_pct_mean'] = float(df['emc_pct'].mean())
-        if any(c.startswith('cpu0_pct') for c in df.columns):
-            summary['cpu']['cpu0_pct_mean'] = float(df['cpu0_pct'].mean())
-
-        # Compute sampling frequency as: N / (t_last - t_first)
-        tcol = 'timestamp_ns'
-        nb_samples = len(df)
-        duration_s = (df[tcol].iloc[-1] - df[tcol].iloc[0]) / 1e9  # ns → s
-        freq_Hz = nb_samples / duration_s if duration_s > 0 else float('nan')
-        summary['sampling'] = {
-            'nb_samples': int(nb_samples),
-            'duration_s': float(duration_s),
-            'freq_Hz': float(freq_Hz),
-        }
-        logger.info(f'Quick summary: {dict(summary)}')
-    except Exception:
-        pass
+    summary = TegraSummary()
+    summary.update(df)
+    logger.info(f'Quick summary: {summary.result()}')
 
     return df
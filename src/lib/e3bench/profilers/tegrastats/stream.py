@@ -0,0 +1,158 @@
+from argparse import ArgumentParser, Namespace
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple, Union
+from loguru import logger
+
+from .post_process import parse_line
+
+
+def follow(path: Union[str, Path], poll_interval: float = 0.1, stop: Optional[Callable[[], bool]] = None,
+           from_start: bool = True) -> Iterator[str]:
+    # Yield complete lines as they are appended to `path` (like `tail -F`).
+    # Waits for the file to appear and starts over if it is truncated.
+    path = Path(path)
+    stop = stop or (lambda: False)
+
+    fd = None
+    offset = 0
+    partial = b""
+    try:
+        while not stop():
+            if fd is None:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except FileNotFoundError:
+                    time.sleep(poll_interval)
+                    continue
+                if not from_start:
+                    offset = os.fstat(fd).st_size
+
+            if os.fstat(fd).st_size < offset:
+                offset, partial = 0, b""
+
+            chunk = os.pread(fd, 65536, offset)
+            if not chunk:
+                time.sleep(poll_interval)
+                continue
+            offset += len(chunk)
+            *lines, partial = (partial + chunk).split(b"\n")
+            for line in lines:
+                yield line.decode(errors="replace")
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+
+class RollingWindow:
+    # Mean and max over the last `size` values in O(1) amortized per update
+    def __init__(self, size: int):
+        self.values = deque(maxlen=size)
+        self._sum = 0.0
+        self._max = deque()  # (index, value), values decreasing
+        self._index = 0
+
+    def update(self, value: float):
+        if len(self.values) == self.values.maxlen:
+            self._sum -= self.values[0]
+        self.values.append(value)
+        self._sum += value
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self._index, value))
+        if self._max[0][0] <= self._index - self.values.maxlen:
+            self._max.popleft()
+        self._index += 1
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._sum / len(self.values) if self.values else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self._max[0][1] if self._max else None
+
+
+def tracked(key: str) -> bool:
+    # Power per rail, GPU load and temperatures
+    return key.endswith("_mw_now") or key == "gr3d_pct" or (key.startswith("temp_") and key.endswith("_C"))
+
+
+class RollingStats:
+    # Bounded rolling windows over the last `window` samples of every tracked metric
+    def __init__(self, window: int = 50):
+        self.window = window
+        self.windows = {}
+        self.nb_samples = 0
+        self.last_timestamp_ns = None
+
+    def update(self, row: dict):
+        self.nb_samples += 1
+        self.last_timestamp_ns = row.get("arrival_ns", row.get("timestamp_ns"))
+        for key, value in row.items():
+            if value is None or not tracked(key):
+                continue
+            if key not in self.windows:
+                self.windows[key] = RollingWindow(self.window)
+            self.windows[key].update(value)
+
+    def snapshot(self) -> dict:
+        # e.g. {"VDD_IN_mw_now_mean": 5012.3, "VDD_IN_mw_now_max": 5400, "gr3d_pct_mean": ..., ...}
+        stats = {"nb_samples": self.nb_samples, "timestamp_ns": self.last_timestamp_ns}
+        for key, window in self.windows.items():
+            stats[f"{key}_mean"] = window.mean
+            stats[f"{key}_max"] = window.max
+        return stats
+
+
+def stream_tegrastats(log_path: Union[str, Path], window: int = 50,
+                      callback: Optional[Callable[[dict, dict], Optional[bool]]] = None,
+                      stop: Optional[Callable[[], bool]] = None, poll_interval: float = 0.1,
+                      from_start: bool = True) -> Iterator[Tuple[dict, dict]]:
+    # Parse the tegrastats log while it grows and yield (row, rolling stats) per sample.
+    # `callback(row, stats)` returning False ends the stream, e.g. to abort a run whose power looks wrong.
+    stats = RollingStats(window)
+    for line in follow(log_path, poll_interval, stop, from_start):
+        line = line.strip()
+        if not line:
+            continue
+        row = parse_line(line)
+        if row is None:
+            continue
+
+        stats.update(row)
+        snapshot = stats.snapshot()
+        yield row, snapshot
+        if callback is not None and callback(row, snapshot) is False:
+            logger.warning("Stream stopped by callback.")
+            return
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Follow a tegrastats log and print rolling statistics.")
+    parser.add_argument("log_path", type=Path, help="tegrastats --logfile output")
+    parser.add_argument("--window", type=int, default=50, help="Number of samples in the rolling windows (default: 50)")
+    parser.add_argument("--every", type=int, default=10, help="Print the statistics every N samples (default: 10)")
+    return parser.parse_args()
+
+
+def main(args: Namespace):
+    logger.info(f"Following {args.log_path} (Ctrl+C to stop)")
+    try:
+        for row, stats in stream_tegrastats(args.log_path, args.window):
+            if stats["nb_samples"] % args.every == 0:
+                summary = {k: round(v, 1) for k, v in stats.items() if k.endswith("_mean") and v is not None}
+                logger.info(f"[{stats['nb_samples']} samples] {summary}")
+    except KeyboardInterrupt:
+        pass
+
+
+__all__ = ["follow", "RollingWindow", "RollingStats", "stream_tegrastats"]
+
+
+if __name__ == "__main__":
+    args = get_args()
+    main(args)
@@ -0,0 +1,63 @@
+from collections import defaultdict
+import pandas as pd
+
+
+class TegraSummary:
+    # Quick summary of a tegrastats trace, updated chunk by chunk (constant memory).
+    # Chunks must arrive in time order with adjusted timestamps.
+    def __init__(self):
+        self.nb_samples = 0
+        self.first_ns = None
+        self.last_ns = None
+        self._sums = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._max = {}
+
+    def _accumulate(self, df: pd.DataFrame, col: str, with_max: bool = False):
+        if col not in df.columns:
+            return
+        values = pd.to_numeric(df[col], errors='coerce').dropna()
+        if values.empty:
+            return
+        self._sums[col] += float(values.sum())
+        self._counts[col] += len(values)
+        if with_max:
+            self._max[col] = max(self._max.get(col, values.max()), values.max())
+
+    def update(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        self.nb_samples += len(df)
+        if self.first_ns is None:
+            self.first_ns = df['timestamp_ns'].iloc[0]
+        self.last_ns = df['timestamp_ns'].iloc[-1]
+
+        self._accumulate(df, 'VDD_SOC_mw_now', with_max=True)
+        self._accumulate(df, 'emc_pct')
+        self._accumulate(df, 'cpu0_pct')
+
+    def mean(self, col: str) -> float:
+        return self._sums[col] / self._counts[col] if self._counts[col] else float('nan')
+
+    def result(self) -> dict:
+        summary = defaultdict(dict)
+        if 'VDD_SOC_mw_now' in self._max:
+            summary['power']['VDD_SOC_mw_now_mean'] = self.mean('VDD_SOC_mw_now')
+            summary['power']['VDD_SOC_mw_now_max']  = int(self._max['VDD_SOC_mw_now'])
+        if self._counts['emc_pct']:
+            summary['emc']['emc_pct_mean'] = self.mean('emc_pct')
+        if self._counts['cpu0_pct']:
+            summary['cpu']['cpu0_pct_mean'] = self.mean('cpu0_pct')
+
+        # Compute sampling frequency as: N / (t_last - t_first)
+        duration_s = (self.last_ns - self.first_ns) / 1e9 if self.nb_samples else 0.0  # ns → s
+        freq_Hz = self.nb_samples / duration_s if duration_s > 0 else float('nan')
+        summary['sampling'] = {
+            'nb_samples': int(self.nb_samples),
+            'duration_s': float(duration_s),
+            'freq_Hz': float(freq_Hz),
+        }
+        return dict(summary)
+
+
+__all__ = ["TegraSummary"]
@@ -0,0 +1,135 @@
+import json
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .tracewriter import (TRACE_SUFFIX, TRACE_FORMAT, TRACE_VERSION, HEADER_NAME, is_trace_path,
+                          trace_file_path, spec_files, TraceWriter, read_trace_header)
+
+
+# e3bench traces (see `tracewriter` for the format): reading them into pandas and
+# converting the raw profiler outputs.
+
+
+class TraceReader:
+    # Columns are memory-mapped (uncompressed traces) or decompressed once (zlib)
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        with (self.path / HEADER_NAME).open() as f:
+            self.header = json.load(f)
+        if self.header.get("format") != TRACE_FORMAT:
+            raise ValueError(f"{self.path} is not an e3bench trace")
+        if self.header["version"] > TRACE_VERSION:
+            raise ValueError(f"Trace version {self.header['version']} is newer than supported ({TRACE_VERSION})")
+
+        self.specs = {spec["name"]: spec for spec in self.header["columns"] or []}
+        self.nb_rows = self.header["nb_rows"]
+        if self.nb_rows is None:
+            # Still being written: complete rows only
+            if self.header["compression"]:
+                raise ValueError(f"Compressed trace {self.path} is not complete")
+            self.nb_rows = min((self._file(name, suffix).stat().st_size // np.dtype(dtype).itemsize
+                                for name, spec in self.specs.items() for suffix, dtype in spec_files(spec)),
+                               default=0)
+        self._cache = {}
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.specs)
+
+    def _file(self, name: str, suffix: str) -> Path:
+        return self.path / (name + suffix + (".z" if self.header["compression"] else ""))
+
+    def _raw(self, name: str, suffix: str, dtype) -> np.ndarray:
+        key = (name, suffix)
+        if key not in self._cache:
+            dtype = np.dtype(dtype)
+            if self.nb_rows == 0:
+                array = np.empty(0, dtype=dtype)
+            elif self.header["compression"] == "zlib":
+                array = np.frombuffer(zlib.decompress(self._file(name, suffix).read_bytes()), dtype=dtype)
+                array = array[:self.nb_rows]
+            else:
+                # Plain ndarray view of the map (no copy)
+                array = np.memmap(self._file(name, suffix), dtype=dtype, mode="r", shape=(self.nb_rows,)).view(np.ndarray)
+            self._cache[key] = array
+        return self._cache[key]
+
+    def column(self, name: str, rows: slice = slice(None)):
+        # NumPy array (a view of the memory map for plain columns) or pandas array
+        spec = self.specs[name]
+        values = self._raw(name, ".bin", spec["dtype"])[rows]
+        if spec["kind"] == "masked":
+            mask = self._raw(name, ".mask", np.bool_)[rows]
+            return pd.arrays.IntegerArray(np.asarray(values), np.asarray(mask))
+        if spec["kind"] == "category":
+            return pd.Categorical.from_codes(np.asarray(values), categories=spec["categories"])
+        return values
+
+    def time_slice(self, start_ns: Optional[int] = None, end_ns: Optional[int] = None,
+                   time_col: str = "timestamp_ns") -> slice:
+        # Rows with start_ns <= time < end_ns (the time column is sorted)
+        t = self._raw(time_col, ".bin", self.specs[time_col]["dtype"])
+        lo = 0 if start_ns is None else int(np.searchsorted(t, start_ns, side="left"))
+        hi = len(t) if end_ns is None else int(np.searchsorted(t, end_ns, side="left"))
+        return slice(lo, max(lo, hi))
+
+    def to_frame(self, columns: Optional[Iterable[str]] = None, start_ns: Optional[int] = None,
+                 end_ns: Optional[int] = None) -> pd.DataFrame:
+        rows = self.time_slice(start_ns, end_ns) if (start_ns is not None or end_ns is not None) else slice(None)
+        columns = self.columns if columns is None else list(columns)
+        return pd.DataFrame({name: self.column(name, rows) for name in columns}, copy=False)
+
+
+def write_trace(path: Union[str, Path], df: pd.DataFrame, **header) -> Path:
+    with TraceWriter(path, **header) as writer:
+        writer.append(df)
+    return Path(path)
+
+
+def read_trace(path: Union[str, Path], columns: Optional[Iterable[str]] = None,
+               start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> pd.DataFrame:
+    return TraceReader(path).to_frame(columns, start_ns, end_ns)
+
+
+def convert_trace(profiler_name: str, text_path: Union[str, Path], out_path: Union[str, Path, None] = None,
+                  chunk_size: int = 65536, compression: Optional[str] = None, **header) -> Optional[Path]:
+    # Raw profiler output --> e3bench trace, parsed once by chunks (bounded memory)
+    from .traces import iter_power_trace
+
+    text_path = Path(text_path)
+    out_path = trace_file_path(text_path) if out_path is None else Path(out_path)
+    writer = None
+    try:
+        for df in iter_power_trace(profiler_name, text_path, chunk_size):
+            if writer is None:
+                rails = [c[:-len(suffix)] for c in df.columns for suffix in ("_mw_now", "_power_mw")
+                         if c.endswith(suffix)]
+                header = {"profiler": profiler_name, "rails": rails or None, "source": text_path.name, **header}
+                writer = TraceWriter(out_path, compression=compression, **header)
+            writer.append(df)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if writer is None:
+        logger.warning(f"No samples in {text_path}; no trace written.")
+        return None
+    logger.debug(f"{text_path} --> {out_path} ({writer.nb_rows} rows)")
+    return out_path
+
+
+__all__ = [
+    "TRACE_SUFFIX",
+    "is_trace_path",
+    "trace_file_path",
+    "TraceWriter",
+    "TraceReader",
+    "write_trace",
+    "read_trace",
+    "read_trace_header",
+    "convert_trace",
+]
@@ -0,0 +1,103 @@
+from pathlib import Path
+from typing import Iterator, Union
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .tracefile import is_trace_path, read_trace
+
+
+def inaprof_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # Single rail: "timestamp,current,voltage" with epoch ns, mA and mV
+    # Multi-rail:  "timestamp,<RAIL>_current,<RAIL>_voltage,..." --> `<RAIL>_cur_ma`, `<RAIL>_vol_mv`, `<RAIL>_power_mw`
+    if "current" in df.columns:
+        df = df.rename(columns={"timestamp": "timestamp_ns", "current": "cur_ma", "voltage": "vol_mv"})
+        df["power_mw"] = df["cur_ma"] * df["vol_mv"] * 1e-3
+        return df
+
+    df = df.rename(columns={"timestamp": "timestamp_ns"})
+    rails = [c[:-len("_current")] for c in df.columns if c.endswith("_current")]
+    for rail in rails:
+        df = df.rename(columns={f"{rail}_current": f"{rail}_cur_ma", f"{rail}_voltage": f"{rail}_vol_mv"})
+        df[f"{rail}_power_mw"] = df[f"{rail}_cur_ma"] * df[f"{rail}_vol_mv"] * 1e-3
+    return df
+
+
+def load_inaprof(path: Union[str, Path]) -> pd.DataFrame:
+    return inaprof_frame(pd.read_csv(path))
+
+
+def smiprof_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # nvidia-smi CSV: "timestamp, power.draw.instant [W], temperature.gpu, ..." (local time, ms resolution)
+    from .smiprof.post_process import normalize_smi_frame
+    return normalize_smi_frame(df)
+
+
+def load_smiprof(path: Union[str, Path]) -> pd.DataFrame:
+    from .smiprof.post_process import post_process_smiprof
+    return post_process_smiprof(path)
+
+
+def smartpower3_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # "timestamp_ns,time,voltage_in,current_in,power_in,..." (mV, mA, mW); `power_mw` is the input power
+    df["power_mw"] = df["power_in"]
+    return df
+
+
+def load_smartpower3(path: Union[str, Path]) -> pd.DataFrame:
+    return smartpower3_frame(pd.read_csv(path))
+
+
+def load_power_trace(profiler_name: str, path: Union[str, Path]) -> pd.DataFrame:
+    # Raw profiler output --> DataFrame with `timestamp_ns` (epoch ns) and power column(s) in mW
+    path = Path(path)
+    logger.debug(f"Loading {profiler_name} trace from {path}")
+    if is_trace_path(path):
+        return read_trace(path)  # already parsed (see `convert_trace`)
+    if profiler_name.startswith(("inaprof", "inapy")):
+        return load_inaprof(path)
+    elif profiler_name == "smiprof":
+        return load_smiprof(path)
+    elif profiler_name.startswith("smartpower3"):
+        return load_smartpower3(path)
+    elif profiler_name.startswith("tegrastats"):
+        from .tegrastats import post_process_tegra_jon
+        return post_process_tegra_jon(path)
+    raise ValueError(f"No trace loader for profiler {profiler_name}")
+
+
+def iter_power_trace(profiler_name: str, path: Union[str, Path], chunk_size: int = 65536) -> Iterator[pd.DataFrame]:
+    # Same as `load_power_trace`, by blocks of `chunk_size` samples with fixed dtypes
+    # (int64 epoch ns, int32 raw readings, float32 power), so memory stays bounded
+    path = Path(path)
+    logger.debug(f"Loading {profiler_name} trace from {path} by chunks of {chunk_size} samples")
+    if profiler_name.startswith(("inaprof", "inapy")):
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            df = inaprof_frame(chunk)
+            yield df.astype({c: np.int64 if c == "timestamp_ns" else np.float32 if c.endswith("power_mw") else np.int32
+                             for c in df.columns})
+    elif profiler_name == "smiprof":
+        from .smiprof.post_process import iter_smi_chunks
+        for df in iter_smi_chunks(path, chunk_size):
+            yield df.astype({c: np.float32 for c in df.columns if c.endswith(("_mw", "_pct", "_C"))})
+    elif profiler_name.startswith("smartpower3"):
+        for chunk in pd.read_csv(path, chunksize=chunk_size):
+            df = smartpower3_frame(chunk)
+            yield df.astype({c: np.int64 if c in ("timestamp_ns", "time") else np.float32 for c in df.columns})
+    elif profiler_name.startswith("tegrastats"):
+        from .tegrastats.chunks import iter_tegra_chunks
+        yield from iter_tegra_chunks(path, chunk_size)
+    else:
+        raise ValueError(f"No trace loader for profiler {profiler_name}")
+
+
+__all__ = [
+    "inaprof_frame",
+    "load_inaprof",
+    "smiprof_frame",
+    "load_smiprof",
+    "smartpower3_frame",
+    "load_smartpower3",
+    "load_power_trace",
+    "iter_power_trace",
+]
@@ -0,0 +1,227 @@
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import numpy as np
+from loguru import logger
+
+
+# e3bench trace format: a directory (`<name>.e3t`) with one raw little-endian file per
+# column and a `header.json` holding the dtypes and the metadata of the session
+# (profiler, rails, interval, clock anchors). Columns are appended chunk by chunk, so a
+# sampler can write it while sampling. Uncompressed columns are memory-mapped by the
+# reader: slicing a time window reads only the pages of that window and parses nothing.
+# With `compression="zlib"` each column is a zlib stream (smaller on disk, decompressed
+# entirely on read).
+#
+# This module only needs NumPy, so the samplers can write traces without loading pandas;
+# the reader and the conversion of raw profiler outputs are in `tracefile`.
+TRACE_SUFFIX = ".e3t"
+TRACE_FORMAT = "e3bench-trace"
+TRACE_VERSION = 1
+HEADER_NAME = "header.json"
+COMPRESSIONS = (None, "zlib")
+
+
+def is_trace_path(path: Union[str, Path]) -> bool:
+    return Path(path).suffix == TRACE_SUFFIX
+
+
+def trace_file_path(path: Union[str, Path]) -> Path:
+    # e.g. `w5_r30_ms100-power.txt` --> `w5_r30_ms100-power.e3t`
+    return Path(path).with_suffix(TRACE_SUFFIX)
+
+
+def column_spec(name: str, values) -> Optional[dict]:
+    # How a column is stored; None for columns that cannot be (strings, objects)
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype):
+        if dtype.kind in "iufb":
+            return {"name": name, "kind": "plain", "dtype": dtype.newbyteorder("<").str}
+        return None
+    # pandas extension dtypes: the values come from pandas, which is already loaded
+    import pandas as pd
+    if isinstance(dtype, pd.CategoricalDtype):
+        return {"name": name, "kind": "category", "dtype": "<i2", "categories": [str(c) for c in dtype.categories]}
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and dtype.kind in "iub":
+        # Nullable integers: values + validity mask
+        return {"name": name, "kind": "masked", "dtype": np.dtype(dtype.numpy_dtype).newbyteorder("<").str}
+    return None
+
+
+def spec_files(spec: dict) -> List[tuple]:
+    # (file suffix, dtype) of the files of a column
+    if spec["kind"] == "masked":
+        return [(".bin", spec["dtype"]), (".mask", "|b1")]
+    return [(".bin", spec["dtype"])]
+
+
+def column_buffers(spec: dict, values) -> Dict[str, np.ndarray]:
+    # file suffix --> array to append
+    dtype = np.dtype(spec["dtype"])
+    if spec["kind"] == "plain":
+        return {".bin": np.asarray(values, dtype=dtype)}
+    import pandas as pd
+    if spec["kind"] == "category":
+        codes = pd.Categorical(values, categories=spec["categories"]).codes
+        return {".bin": np.asarray(codes, dtype=dtype)}
+    if spec["kind"] == "masked":
+        values = pd.array(values)
+        return {".bin": np.asarray(values.to_numpy(dtype=dtype, na_value=0), dtype=dtype),
+                ".mask": np.asarray(pd.isna(values), dtype=np.bool_)}
+    raise ValueError(f"Unknown column kind {spec['kind']}")
+
+
+def clear_trace(path: Union[str, Path]):
+    # Remove a previous trace at `path` (its files only), but never a directory that is not one
+    path = Path(path)
+    if not path.exists():
+        return
+    if not path.is_dir():
+        raise FileExistsError(f"{path} exists and is not an e3bench trace")
+    try:
+        is_trace = read_trace_header(path).get("format") == TRACE_FORMAT
+    except (OSError, ValueError):
+        is_trace = False
+    if not is_trace:
+        if any(path.iterdir()):
+            raise FileExistsError(f"{path} is not empty and not an e3bench trace; not overwriting it")
+        return
+    for old in path.iterdir():
+        if old.is_file():
+            old.unlink()  # stale columns of the previous trace
+
+
+class TraceWriter:
+    # Streaming writer: `append` DataFrames (or dicts of arrays) with the same columns.
+    # The header is written when the trace is opened and updated on `close`.
+    def __init__(self, path: Union[str, Path], profiler: Optional[str] = None, rails: Optional[List[str]] = None,
+                 interval_ms: Optional[float] = None, clock: Optional[dict] = None,
+                 compression: Optional[str] = None, **metadata):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression {compression}. Use one of {COMPRESSIONS}")
+        self.path = Path(path)
+        clear_trace(self.path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self.header = {
+            "format": TRACE_FORMAT,
+            "version": TRACE_VERSION,
+            "profiler": profiler,
+            "rails": rails,
+            "interval_ms": interval_ms,
+            "clock": clock,
+            "compression": compression,
+            "nb_rows": None,  # None while the trace is being written
+            "columns": None,
+            **metadata,
+        }
+        self.nb_rows = 0
+        self._files = {}
+        self._compressors = {}
+        self._write_header()
+
+    def _write_header(self):
+        tmp_path = self.path / f"{HEADER_NAME}.tmp"
+        with tmp_path.open("w") as f:
+            json.dump(self.header, f, indent=2)
+        tmp_path.replace(self.path / HEADER_NAME)
+
+    def _open_columns(self, columns: Dict[str, object]):
+        specs = []
+        for name, values in columns.items():
+            spec = column_spec(name, values)
+            if spec is None:
+                logger.warning(f"Column {name} ({values.dtype}) is not stored in the trace")
+                continue
+            specs.append(spec)
+        self.header["columns"] = specs
+
+        for spec in specs:
+            for suffix, _ in spec_files(spec):
+                file_name = spec["name"] + suffix + (".z" if self.header["compression"] else "")
+                self._files[(spec["name"], suffix)] = (self.path / file_name).open("wb")
+                if self.header["compression"]:
+                    self._compressors[(spec["name"], suffix)] = zlib.compressobj(6)
+        self._write_header()
+
+    def _extend_categories(self, spec: dict, values):
+        # Values first seen in a later chunk (e.g. a second GPU name) get new codes. Categories
+        # are only appended, so the codes already written keep their meaning; the header is
+        # rewritten so that readers of the trace being written see them too.
+        import pandas as pd
+        dtype = getattr(values, "dtype", None)
+        categories = dtype.categories if isinstance(dtype, pd.CategoricalDtype) else pd.Categorical(values).categories
+        known = set(spec["categories"])
+        new = [str(c) for c in categories if str(c) not in known]
+        if not new:
+            return
+        spec["categories"].extend(new)
+        if len(spec["categories"]) > np.iinfo(spec["dtype"]).max:
+            raise ValueError(f"Too many categories in column {spec['name']} ({len(spec['categories'])})")
+        self._write_header()
+
+    def append(self, data: Union["pd.DataFrame", Dict[str, np.ndarray]]):
+        columns = {name: data[name] for name in data}
+        if self.header["columns"] is None:
+            self._open_columns({name: (values if hasattr(values, "dtype") else np.asarray(values))
+                                for name, values in columns.items()})
+
+        nb_rows = None
+        for spec in self.header["columns"]:
+            name = spec["name"]
+            if name not in columns:
+                raise ValueError(f"Column {name} missing from the appended data")
+            if spec["kind"] == "category":
+                self._extend_categories(spec, columns[name])
+            for suffix, array in column_buffers(spec, columns[name]).items():
+                nb_rows = len(array)
+                buffer = np.ascontiguousarray(array).tobytes()
+                key = (name, suffix)
+                if key in self._compressors:
+                    buffer = self._compressors[key].compress(buffer)
+                self._files[key].write(buffer)
+        self.nb_rows += nb_rows or 0
+
+    def flush(self):
+        for f in self._files.values():
+            f.flush()
+
+    def close(self):
+        for key, f in self._files.items():
+            if key in self._compressors:
+                f.write(self._compressors[key].flush())
+            f.close()
+        self._files = {}
+        self.header["nb_rows"] = self.nb_rows
+        if self.header["columns"] is None:
+            self.header["columns"] = []
+        self._write_header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def read_trace_header(path: Union[str, Path]) -> dict:
+    with (Path(path) / HEADER_NAME).open() as f:
+        return json.load(f)
+
+
+__all__ = [
+    "TRACE_SUFFIX",
+    "TRACE_FORMAT",
+    "TRACE_VERSION",
+    "HEADER_NAME",
+    "COMPRESSIONS",
+    "is_trace_path",
+    "trace_file_path",
+    "column_spec",
+    "spec_files",
+    "column_buffers",
+    "clear_trace",
+    "TraceWriter",
+    "read_trace_header",
+]
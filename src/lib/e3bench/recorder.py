@@ -0,0 +1,245 @@
+import csv
+import threading
+from array import array
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+from loguru import logger
+
+
+COLUMNAR_FORMATS = ["npz", "parquet"]
+
+
+class _Column:
+    # One column of a chunk of written rows. Ints and floats are kept in a preallocated typed
+    # array with a presence mask; the column falls back to a list once a value does not fit
+    # (strings such as `stop_reason`, bools, NumPy scalars, ints and floats mixed), so every
+    # value comes back exactly as it was appended.
+    __slots__ = ("kind", "values", "present")
+
+    def __init__(self, value, size: int):
+        kind = type(value)
+        if kind is int or kind is float:
+            self.kind = kind
+            self.values = array("q" if kind is int else "d", bytes(8 * size))
+            self.present = bytearray(size)
+        else:
+            self.kind = None
+            self.values = [None] * size
+            self.present = None
+
+    def set(self, slot: int, value):
+        if self.present is not None:
+            if type(value) is self.kind:
+                try:
+                    self.values[slot] = value
+                    self.present[slot] = 1
+                    return
+                except OverflowError:  # int beyond int64
+                    pass
+            self.kind = None
+            self.values = [v if p else None for v, p in zip(self.values, self.present)]
+            self.present = None
+        self.values[slot] = value
+
+    def get(self, slot: int):
+        if self.present is None or self.present[slot]:
+            return self.values[slot]
+        return None
+
+
+class RunRecorder:
+    # Low-perturbation result writer for the measured loops.
+    #
+    # `append` only stores the row in a preallocated slot; a background thread formats the
+    # rows and writes them to `output_path` (CSV) every `flush_interval` seconds, then drops
+    # them. On `close`, the same rows and every raw per-iteration time (see `add_raw`) can
+    # also be written in a columnar format next to the CSV: for it, the flush thread moves
+    # the written rows into typed columns (`_Column`), so a long session does not keep one
+    # dict per run.
+    def __init__(self, output_path: Union[str, Path], fieldnames: List[str], chunk_size: int = 1024,
+                 flush_interval: float = 1.0, columnar: Optional[str] = None):
+        if columnar is not None and columnar not in COLUMNAR_FORMATS:
+            raise ValueError(f"Invalid columnar format {columnar}. Use one of {COLUMNAR_FORMATS}")
+
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.fieldnames = list(fieldnames)
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.columnar = columnar
+
+        self._chunks = [[None] * chunk_size]  # rows not written yet
+        self._columns = []  # per chunk of written rows: name --> _Column (columnar output only)
+        self._nb_rows = 0
+        self._nb_written = 0
+        self._raw_run_idx = array("q")
+        self._raw_times = array("d")
+
+        self._file = self.output_path.open("w", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+        self._writer.writeheader()
+
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._flush_loop, name="e3bench-recorder", daemon=True)
+        self._thread.start()
+
+    def append(self, row: dict):
+        chunk_idx, slot = divmod(self._nb_rows, self.chunk_size)
+        if chunk_idx == len(self._chunks):
+            self._chunks.append([None] * self.chunk_size)
+        self._chunks[chunk_idx][slot] = row
+        # Publish the row only once it is stored
+        self._nb_rows += 1
+
+    def extend(self, rows: Iterable[dict]):
+        for row in rows:
+            self.append(row)
+
+    def add_raw(self, run_idx: int, values: Iterable[float]):
+        # Raw per-iteration times behind a summarized row (e.g. autorange block times)
+        values = array("d", values)
+        self._raw_run_idx.extend(array("q", [run_idx]) * len(values))
+        self._raw_times.extend(values)
+
+    def _rows(self, start: int, stop: int):
+        for i in range(start, stop):
+            chunk_idx, slot = divmod(i, self.chunk_size)
+            yield self._chunks[chunk_idx][slot]
+
+    def flush(self):
+        with self._lock:
+            nb_rows = self._nb_rows
+            if nb_rows == self._nb_written:
+                return
+            self._writer.writerows(self._rows(self._nb_written, nb_rows))
+            self._file.flush()
+            if self.columnar is not None:
+                self._pack(self._nb_written, nb_rows)
+
+            # The written rows are not needed anymore. `append` only touches the slots after nb_rows.
+            for i in range(self._nb_written, nb_rows):
+                chunk_idx, slot = divmod(i, self.chunk_size)
+                self._chunks[chunk_idx][slot] = None
+            for chunk_idx in range(self._nb_written // self.chunk_size, nb_rows // self.chunk_size):
+                self._chunks[chunk_idx] = None
+            self._nb_written = nb_rows
+
+    def _pack(self, start: int, stop: int):
+        for i in range(start, stop):
+            chunk_idx, slot = divmod(i, self.chunk_size)
+            if chunk_idx == len(self._columns):
+                self._columns.append({})
+            columns = self._columns[chunk_idx]
+            for name, value in self._chunks[chunk_idx][slot].items():
+                if value is None:
+                    continue  # written as an empty cell, like a missing key
+                column = columns.get(name)
+                if column is None:
+                    column = columns[name] = _Column(value, self.chunk_size)
+                column.set(slot, value)
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush results to {self.output_path}: {e}")
+
+    def close(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
+
+        if self.columnar is not None:
+            path = self.write_columnar()
+            logger.debug(f"Wrote {self._nb_rows} rows and {len(self._raw_times)} raw times --> {path}")
+
+    def columns(self) -> dict:
+        # Every row appended so far, column by column (only kept with a columnar output)
+        if self.columnar is None:
+            raise ValueError("Rows are only kept with a columnar output")
+        self.flush()
+        sizes = [min(self.chunk_size, self._nb_written - chunk_idx * self.chunk_size)
+                 for chunk_idx in range(len(self._columns))]
+        data = {}
+        for name in self.fieldnames:
+            values = data[name] = []
+            for columns, size in zip(self._columns, sizes):
+                column = columns.get(name)
+                values.extend([None] * size if column is None else map(column.get, range(size)))
+        return data
+
+    def write_columnar(self) -> Path:
+        if self.columnar == "npz":
+            return _write_npz(self.output_path.with_suffix(".npz"), self.columns(),
+                              self._raw_run_idx, self._raw_times)
+        return _write_parquet(self.output_path.with_suffix(".parquet"), self.columns(),
+                              self._raw_run_idx, self._raw_times)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _to_numpy(values: list):
+    import numpy as np
+
+    present = [v for v in values if v is not None]
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in present):
+        if len(present) == len(values) and all(isinstance(v, int) for v in present):
+            return np.asarray(values, dtype=np.int64)
+        return np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+    return np.asarray(["" if v is None else str(v) for v in values])
+
+
+def _write_npz(path: Path, columns: dict, raw_run_idx: array, raw_times: array) -> Path:
+    import numpy as np
+
+    arrays = {name: _to_numpy(values) for name, values in columns.items()}
+    arrays["raw__run_idx"] = np.frombuffer(raw_run_idx, dtype=np.int64) if raw_run_idx else np.empty(0, np.int64)
+    arrays["raw__time_s"] = np.frombuffer(raw_times, dtype=np.float64) if raw_times else np.empty(0, np.float64)
+    np.savez(path, **arrays)
+    return path
+
+
+def _write_parquet(path: Path, columns: dict, raw_run_idx: array, raw_times: array) -> Path:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        logger.error("pyarrow is not installed. Install with: pip install pyarrow")
+        raise
+
+    pq.write_table(pa.table(columns), path)
+    raw_path = path.with_name(f"{path.stem}-raw.parquet")
+    pq.write_table(pa.table({"run_idx": raw_run_idx.tolist(), "time_s": raw_times.tolist()}), raw_path)
+    return path
+
+
+def export_csv(columnar_path: Union[str, Path], csv_path: Optional[Union[str, Path]] = None) -> Path:
+    # Rebuild the CSV schema from a columnar output (raw times are not part of it)
+    import pandas as pd
+
+    columnar_path = Path(columnar_path)
+    csv_path = Path(csv_path) if csv_path is not None else columnar_path.with_suffix(".csv")
+
+    if columnar_path.suffix == ".npz":
+        import numpy as np
+        with np.load(columnar_path) as data:
+            df = pd.DataFrame({k: data[k] for k in data.files if not k.startswith("raw__")})
+    elif columnar_path.suffix == ".parquet":
+        df = pd.read_parquet(columnar_path)
+    else:
+        raise ValueError(f"Unsupported columnar file {columnar_path}. Use one of {COLUMNAR_FORMATS}")
+
+    df.to_csv(csv_path, index=False)
+    return csv_path
+
+
+__all__ = ["COLUMNAR_FORMATS", "RunRecorder", "export_csv"]
@@ -0,0 +1,32 @@
+from e3bench._lazy import attach
+
+from .sequential import CI_STATS, MIN_SAMPLES, median_ci, mean_ci, relative_ci_halfwidth, SequentialStop
+from .warmup import mser_truncation, WarmupDetector
+
+
+# The bootstrap needs NumPy and pandas: it is imported on first access (PEP 562), so the
+# latency wrappers can use the sequential rules without loading them
+_LAZY = {
+    "BOOTSTRAP_STATS": ".bootstrap",
+    "bootstrap_groups": ".bootstrap",
+    "bootstrap_ci": ".bootstrap",
+    "grouped_bootstrap_ci": ".bootstrap",
+}
+
+__getattr__, __dir__ = attach(__name__, _LAZY)
+
+
+__all__ = [
+    "CI_STATS",
+    "MIN_SAMPLES",
+    "median_ci",
+    "mean_ci",
+    "relative_ci_halfwidth",
+    "SequentialStop",
+    "mser_truncation",
+    "WarmupDetector",
+    "BOOTSTRAP_STATS",
+    "bootstrap_groups",
+    "bootstrap_ci",
+    "grouped_bootstrap_ci",
+]
@@ -0,0 +1,199 @@
+from typing import Dict, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+
+# Percentile bootstrap CIs computed for many groups (configs, sessions, files) at once.
+# Groups of the same size n are stacked in a (groups, n) matrix, sorted, and share the
+# resampling indices, drawn in chunks of at most `max_elements` indices:
+# - the groups are sorted, so the k-th smallest index of a resample points at its k-th
+#   smallest value: the median and the quartiles need one partition of the indices;
+# - the mean (and std) is a product with the resample counts.
+# No resample is materialized and memory stays bounded by `max_elements`, whatever n is.
+# The only Python loops are over the distinct group sizes and the chunks.
+BOOTSTRAP_STATS = ["median", "mean", "iqr", "std"]
+
+
+def _quantile_positions(n: int, q: float):
+    # Linear interpolation of np.quantile: value at `pos`, between sorted ranks `lo` and `hi`
+    pos = q * (n - 1)
+    lo = int(np.floor(pos))
+    return lo, min(lo + 1, n - 1), pos - lo
+
+
+def _quantile_sorted(s: np.ndarray, q: float) -> np.ndarray:
+    # Same as np.quantile(..., axis=-1) on values sorted along the last axis
+    lo, hi, frac = _quantile_positions(s.shape[-1], q)
+    return s[..., lo] + frac * (s[..., hi] - s[..., lo])
+
+
+def _statistic(s: np.ndarray, stat: str) -> np.ndarray:
+    # `stat` of each row of `s` (sorted along the last axis)
+    if stat == "median":
+        return _quantile_sorted(s, 0.5)
+    if stat == "iqr":
+        return _quantile_sorted(s, 0.75) - _quantile_sorted(s, 0.25)
+    if stat == "mean":
+        return s.mean(axis=-1)
+    if stat == "std":
+        return s.std(axis=-1, ddof=1) if s.shape[-1] > 1 else np.full(s.shape[:-1], np.nan)
+    raise ValueError(f"Invalid statistic {stat}. Use one of {BOOTSTRAP_STATS}")
+
+
+def _stat_quantiles(stats: Sequence[str]) -> list:
+    # Quantiles of the resamples needed by `stats`
+    quantiles = []
+    if "median" in stats:
+        quantiles.append(0.5)
+    if "iqr" in stats:
+        quantiles += [0.25, 0.75]
+    return quantiles
+
+
+def _take_quantile(x: np.ndarray, part: np.ndarray, position: tuple, out: np.ndarray, scratch: np.ndarray):
+    # out <- quantile of each resample, interpolated between the values at ranks lo and hi
+    lo, hi, frac = position
+    np.take(x, part[:, lo], axis=1, out=out, mode="clip")
+    if frac:
+        np.take(x, part[:, hi], axis=1, out=scratch, mode="clip")
+        scratch -= out
+        scratch *= frac
+        out += scratch
+
+
+def _resampled_statistics(x: np.ndarray, stats: Sequence[str], n_resamples: int,
+                          rng: np.random.Generator, max_elements: int) -> Dict[str, np.ndarray]:
+    # x: (groups, n) sorted --> {stat: (groups, B)}, the statistics of B resamples of each row.
+    # Results are written in place: large temporaries cost more in page faults than in arithmetic.
+    nb_groups, n = x.shape
+    out = {stat: np.empty((nb_groups, n_resamples)) for stat in stats}
+    positions = {q: _quantile_positions(n, q) for q in _stat_quantiles(stats)}
+    kth = sorted({rank for lo, hi, _ in positions.values() for rank in (lo, hi)})
+    if "mean" in stats or "std" in stats:
+        center = x.mean(axis=1, keepdims=True)
+        centered = x - center  # centered on each group's mean for accuracy
+
+    # Chunks of resamples: the indices (nb, n), with their int64 copy and the counts, and
+    # the scratch (groups, nb) stay under max_elements elements in total
+    chunk = max(1, max_elements // (4 * max(n, nb_groups)))
+    scratch = None
+    for start in range(0, n_resamples, chunk):
+        nb = min(chunk, n_resamples - start)
+        cols = slice(start, start + nb)
+        if scratch is None or scratch.shape[2] != nb:
+            scratch = np.empty((2, nb_groups, nb))
+        idx = rng.integers(0, n, size=(nb, n), dtype=np.int32)
+
+        if kth:
+            # Only the ranks of the quantiles are put in place, O(n) per resample
+            part = np.partition(idx, kth, axis=1)
+            if "median" in stats:
+                _take_quantile(x, part, positions[0.5], out["median"][:, cols], scratch[0])
+            if "iqr" in stats:
+                iqr = out["iqr"][:, cols]
+                _take_quantile(x, part, positions[0.75], iqr, scratch[0])
+                _take_quantile(x, part, positions[0.25], scratch[1], scratch[0])
+                iqr -= scratch[1]
+
+        if "mean" in stats or "std" in stats:
+            idx += np.arange(0, nb * n, n, dtype=np.int32)[:, None]  # flat positions, in place
+            counts = np.bincount(idx.ravel(), minlength=nb * n).reshape(nb, n).astype(np.float64)
+            mean = np.matmul(centered, counts.T, out=scratch[0])
+            mean /= n
+            if "std" in stats:
+                var = np.matmul(centered ** 2, counts.T, out=scratch[1])
+                var /= n
+                var -= np.square(mean, out=out["std"][:, cols])
+                var *= n / (n - 1)
+                np.maximum(var, 0, out=var)
+                np.sqrt(var, out=out["std"][:, cols])
+            if "mean" in stats:
+                np.add(mean, center, out=out["mean"][:, cols])
+    return out
+
+
+def bootstrap_groups(values, sizes, stats: Sequence[str] = ("median",), n_resamples: int = 10_000,
+                     confidence: float = 0.95, seed: Optional[int] = 0,
+                     max_elements: int = 1 << 24) -> Dict[str, np.ndarray]:
+    # `values` holds the groups one after the other, `sizes` their lengths.
+    # Returns {stat: (nb_groups, 3)} with the point estimate and the CI bounds
+    # (NaN bounds for groups of less than two values). `max_elements` bounds the
+    # size of one batch of resampled statistics (groups x resamples x stats) and
+    # of one chunk of resampling indices (resamples x n).
+    for stat in stats:
+        if stat not in BOOTSTRAP_STATS:
+            raise ValueError(f"Invalid statistic {stat}. Use one of {BOOTSTRAP_STATS}")
+    values = np.asarray(values, dtype=np.float64)
+    sizes = np.asarray(sizes, dtype=np.int64)
+    starts = np.r_[0, np.cumsum(sizes)[:-1]] if len(sizes) else sizes
+    rng = np.random.default_rng(seed)
+    alpha = 1 - confidence
+
+    out = {stat: np.full((len(sizes), 3), np.nan) for stat in stats}
+    for n in np.unique(sizes):
+        members = np.flatnonzero(sizes == n)
+        if n == 0:
+            continue
+        x = np.sort(values[starts[members, None] + np.arange(n)], axis=1)  # (groups, n)
+        for stat in stats:
+            out[stat][members, 0] = _statistic(x, stat)
+        if n == 1:
+            continue
+
+        chunk = max(1, max_elements // (n_resamples * len(stats)))
+        for i in range(0, len(members), chunk):
+            rows = members[i:i+chunk]
+            resampled = _resampled_statistics(x[i:i+chunk], stats, n_resamples, rng, max_elements)
+            for stat in stats:
+                # Sorting the rows (in place) is faster than np.quantile over (groups, B)
+                estimates = resampled[stat]
+                estimates.sort(axis=1)
+                out[stat][rows, 1] = _quantile_sorted(estimates, alpha / 2)
+                out[stat][rows, 2] = _quantile_sorted(estimates, 1 - alpha / 2)
+    return out
+
+
+def bootstrap_ci(values, stats: Sequence[str] = ("median",), n_resamples: int = 10_000,
+                 confidence: float = 0.95, seed: Optional[int] = 0) -> Dict[str, tuple]:
+    # One group: {stat: (estimate, ci_lo, ci_hi)}
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    out = bootstrap_groups(values, [len(values)], stats, n_resamples, confidence, seed)
+    return {stat: tuple(float(v) for v in out[stat][0]) for stat in stats}
+
+
+def grouped_bootstrap_ci(df: pd.DataFrame, by: Union[str, Sequence[str]], columns: Union[str, Sequence[str]],
+                         stats: Sequence[str] = ("median",), n_resamples: int = 10_000,
+                         confidence: float = 0.95, seed: Optional[int] = 0,
+                         max_elements: int = 1 << 24) -> pd.DataFrame:
+    # One row per group of `by`, e.g. the runs of a results store grouped by session or config.
+    # For each column and stat: `<column>__<stat>`, `<column>__<stat>__ci_lo`, `<column>__<stat>__ci_hi`.
+    # NaN values (e.g. `energy_mj` of runs not covered by the trace) are left out of their group.
+    by = [by] if isinstance(by, str) else list(by)
+    columns = [columns] if isinstance(columns, str) else list(columns)
+
+    result = None
+    for column in columns:
+        data = df[by + [column]].dropna(subset=[column])
+        data = data.sort_values(by, kind="stable")
+        groups = data.groupby(by, sort=False, dropna=False)
+        sizes = groups.size()
+        out = bootstrap_groups(data[column].to_numpy(), sizes.to_numpy(), stats, n_resamples,
+                               confidence, seed, max_elements)
+
+        table = pd.DataFrame(index=sizes.index)
+        table[f"{column}__nb_samples"] = sizes.to_numpy()
+        for stat in stats:
+            table[f"{column}__{stat}"] = out[stat][:, 0]
+            table[f"{column}__{stat}__ci_lo"] = out[stat][:, 1]
+            table[f"{column}__{stat}__ci_hi"] = out[stat][:, 2]
+        result = table if result is None else result.join(table, how="outer")
+    return result.reset_index()
+
+
+__all__ = [
+    "BOOTSTRAP_STATS",
+    "bootstrap_groups",
+    "bootstrap_ci",
+    "grouped_bootstrap_ci",
+]
@@ -0,0 +1,120 @@
+import math
+from statistics import NormalDist, mean, median, stdev
+from typing import List, Sequence, Tuple
+
+
+CI_STATS = ["median", "mean"]
+# Fewest values a stopping rule may stop at: below 6 values no order statistics cover the
+# median at 95%, and the t interval of the mean is too unstable below 4 (3 degrees of freedom)
+MIN_SAMPLES = {"median": 6, "mean": 4}
+# Up to this many values the median CI ranks come from the exact binomial distribution
+EXACT_MEDIAN_MAX_N = 100
+
+
+def _z_quantile(confidence: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def _t_quantile(confidence: float, dof: int) -> float:
+    # Closed forms for 1 and 2 degrees of freedom, otherwise a Cornish-Fisher expansion
+    # of the Student t quantile around the normal one (good to ~1e-3 for dof >= 3)
+    p = 0.5 + confidence / 2
+    if dof == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if dof == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = _z_quantile(confidence)
+    return (z
+            + (z**3 + z) / (4 * dof)
+            + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * dof**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * dof**3))
+
+
+def _median_ci_rank(n: int, confidence: float) -> int:
+    # Largest rank r such that [x_(r), x_(n-r+1)] covers the median with at least `confidence`,
+    # i.e. P(Binomial(n, 1/2) <= r-1) <= alpha/2; 0 if even [x_(1), x_(n)] is too short
+    alpha = 1 - confidence
+    cdf = 0
+    for r in range(n // 2 + 1):
+        cdf += math.comb(n, r)
+        if cdf / 2**n > alpha / 2:
+            return r
+    return n // 2
+
+
+def median_ci(values: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+    # Distribution-free CI from order statistics: exact binomial ranks for small samples,
+    # normal approximation of the binomial above `EXACT_MEDIAN_MAX_N` values.
+    # (-inf, inf) when there are too few values for any pair of ranks to reach `confidence`.
+    x = sorted(values)
+    n = len(x)
+    if n <= EXACT_MEDIAN_MAX_N:
+        r = _median_ci_rank(n, confidence)
+        if r == 0:
+            return -math.inf, math.inf
+        return x[r - 1], x[n - r]
+    half_width = _z_quantile(confidence) * math.sqrt(n) / 2
+    lo_rank = max(1, math.floor(n / 2 - half_width))
+    hi_rank = min(n, math.ceil(n / 2 + 1 + half_width))
+    return x[lo_rank - 1], x[hi_rank - 1]
+
+
+def mean_ci(values: Sequence[float], confidence: float = 0.95) -> Tuple[float, float]:
+    n = len(values)
+    m = mean(values)
+    half_width = _t_quantile(confidence, n - 1) * stdev(values) / math.sqrt(n)
+    return m - half_width, m + half_width
+
+
+def relative_ci_halfwidth(values: Sequence[float], stat: str = "median", confidence: float = 0.95) -> float:
+    # Half-width of the CI divided by the point estimate, e.g. 0.02 means +/- 2%
+    if len(values) < 2:
+        return math.inf
+
+    if stat == "median":
+        lo, hi = median_ci(values, confidence)
+        center = median(values)
+    elif stat == "mean":
+        lo, hi = mean_ci(values, confidence)
+        center = (lo + hi) / 2
+    else:
+        raise ValueError(f"Invalid statistic {stat}. Use one of {CI_STATS}")
+
+    if center == 0:
+        return math.inf
+    return (hi - lo) / 2 / abs(center)
+
+
+class SequentialStop:
+    # Stopping rule for sequential sampling: stop as soon as the relative CI half-width
+    # of `stat` is below `target`, after at least `min_samples` values (and never
+    # before `MIN_SAMPLES[stat]`, where the CI would not hold its confidence).
+    def __init__(self, target: float, confidence: float = 0.95, stat: str = "median", min_samples: int = 5):
+        if stat not in CI_STATS:
+            raise ValueError(f"Invalid statistic {stat}. Use one of {CI_STATS}")
+        self.target = target
+        self.confidence = confidence
+        self.stat = stat
+        self.min_samples = max(MIN_SAMPLES[stat], min_samples)
+        self.values: List[float] = []
+        self.precision = math.inf
+
+    def update(self, value: float) -> bool:
+        self.values.append(value)
+        if len(self.values) >= 2:
+            self.precision = relative_ci_halfwidth(self.values, self.stat, self.confidence)
+        return self.converged
+
+    @property
+    def converged(self) -> bool:
+        return len(self.values) >= self.min_samples and self.precision <= self.target
+
+
+__all__ = [
+    "CI_STATS",
+    "MIN_SAMPLES",
+    "median_ci",
+    "mean_ci",
+    "relative_ci_halfwidth",
+    "SequentialStop",
+]
@@ -0,0 +1,60 @@
+from typing import List, Optional, Sequence
+
+
+def mser_truncation(values: Sequence[float], batch_size: int = 5, min_batches: int = 4) -> Optional[int]:
+    # MSER-m (MSER-5 by default): truncate the first d batches so that the remaining batch
+    # means have the smallest squared standard error. Returns the number of values to drop,
+    # or None while the optimum is not in the first half (steady state not reached yet).
+    nb_batches = len(values) // batch_size
+    if nb_batches < min_batches:
+        return None
+
+    means = [sum(values[j*batch_size:(j+1)*batch_size]) / batch_size for j in range(nb_batches)]
+
+    # Suffix sums so that each candidate truncation point costs O(1)
+    suffix_sum = [0.0] * (nb_batches + 1)
+    suffix_sq = [0.0] * (nb_batches + 1)
+    for j in range(nb_batches - 1, -1, -1):
+        suffix_sum[j] = suffix_sum[j + 1] + means[j]
+        suffix_sq[j] = suffix_sq[j + 1] + means[j] ** 2
+
+    best_d, best_stat = 0, float("inf")
+    for d in range(nb_batches - 1):  # keep at least two batches
+        k = nb_batches - d
+        sse = suffix_sq[d] - suffix_sum[d] ** 2 / k
+        stat = sse / k**2
+        if stat < best_stat:
+            best_d, best_stat = d, stat
+
+    if best_d >= nb_batches // 2:
+        return None
+    return best_d * batch_size
+
+
+class WarmupDetector:
+    # Online steady-state detector fed with one duration per run. `update` returns the
+    # number of warmup runs once the MSER truncation point is found, None before that.
+    # If nothing is found after 2 * `max_warmup` values, `max_warmup` is used.
+    def __init__(self, batch_size: int = 5, min_batches: int = 4, max_warmup: int = 50):
+        self.batch_size = batch_size
+        self.min_batches = min_batches
+        self.max_warmup = max_warmup
+        self.values: List[float] = []
+        self.warmup: Optional[int] = None
+
+    def update(self, value: float) -> Optional[int]:
+        if self.warmup is not None:
+            return self.warmup
+
+        self.values.append(value)
+        # Only re-run MSER on batch boundaries, intermediate values cannot change the batches
+        if len(self.values) % self.batch_size == 0:
+            d = mser_truncation(self.values, self.batch_size, self.min_batches)
+            if d is not None:
+                self.warmup = min(d, self.max_warmup)
+            elif len(self.values) >= 2 * self.max_warmup:
+                self.warmup = self.max_warmup
+        return self.warmup
+
+
+__all__ = ["mser_truncation", "WarmupDetector"]
@@ -0,0 +1,284 @@
+import json
+import os
+import socket
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from e3bench.utils import parse_tags  # kept importable from here
+
+
+# Embedded results store (one SQLite file) filled by the wrappers next to their CSV outputs.
+#
+#   sessions        one row per wrapper call (wrapper, command, output path, start/end, clock anchors)
+#   session_config  key/value configuration of each session, indexed on (key, value) and (key, num):
+#                   the wrapper parameters (warmup, repeat, min_ms, ...) and user tags (model, rail, ...)
+#   runs            per-run rows; the common columns are real columns, the others a JSON object
+#   traces          files belonging to a session (power traces, clock anchors, columnar copies)
+#
+# Queries filter sessions on their configuration with the indexes instead of parsing file names.
+STORE_PATH = Path(os.environ.get("E3BENCH_STORE", "e3bench.sqlite"))
+
+RUN_COLUMNS = ["run_idx", "timestamp_ns", "duration_ns", "returncode", "is_warmup"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id   INTEGER PRIMARY KEY,
+    wrapper      TEXT NOT NULL,
+    command      TEXT,
+    output_path  TEXT,
+    host         TEXT,
+    started_ns   INTEGER,
+    finished_ns  INTEGER,
+    clock        TEXT
+);
+CREATE TABLE IF NOT EXISTS session_config (
+    session_id   INTEGER NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    key          TEXT NOT NULL,
+    value        TEXT,
+    num          REAL,
+    PRIMARY KEY (session_id, key)
+);
+CREATE INDEX IF NOT EXISTS session_config_value ON session_config(key, value);
+CREATE INDEX IF NOT EXISTS session_config_num ON session_config(key, num);
+CREATE TABLE IF NOT EXISTS runs (
+    session_id   INTEGER NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    run_idx      INTEGER NOT NULL,
+    timestamp_ns INTEGER,
+    duration_ns  INTEGER,
+    returncode   INTEGER,
+    is_warmup    INTEGER,
+    extra        TEXT,
+    PRIMARY KEY (session_id, run_idx)
+);
+CREATE TABLE IF NOT EXISTS traces (
+    session_id   INTEGER NOT NULL REFERENCES sessions(session_id) ON DELETE CASCADE,
+    kind         TEXT NOT NULL,
+    path         TEXT NOT NULL,
+    profiler     TEXT,
+    PRIMARY KEY (session_id, kind, path)
+);
+CREATE INDEX IF NOT EXISTS sessions_wrapper ON sessions(wrapper);
+"""
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _plain(value):
+    # SQLite/JSON-friendly scalar (NumPy scalars, NaN)
+    if value is None:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+class ResultStore:
+    def __init__(self, path: Union[str, Path] = STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=30.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # readers do not block a running wrapper
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # no fsync per commit (safe with WAL)
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    # --- writing ---
+
+    def add_session(self, wrapper: str, config: Optional[dict] = None, command: Optional[str] = None,
+                    output_path: Union[str, Path, None] = None, started_ns: Optional[int] = None,
+                    finished_ns: Optional[int] = None, clock: Optional[dict] = None) -> int:
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO sessions (wrapper, command, output_path, host, started_ns, finished_ns, clock) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (wrapper, command, None if output_path is None else str(Path(output_path).resolve()),
+                 socket.gethostname(), started_ns, finished_ns, None if clock is None else json.dumps(clock)))
+            session_id = cur.lastrowid
+            self.set_config(session_id, config or {})
+        return session_id
+
+    def set_config(self, session_id: int, config: dict):
+        rows = [(session_id, str(key), None if value is None else str(_plain(value)), _number(_plain(value)))
+                for key, value in config.items()]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO session_config VALUES (?, ?, ?, ?)", rows)
+
+    def add_runs(self, session_id: int, runs: Union[pd.DataFrame, Iterable[dict]]):
+        if isinstance(runs, pd.DataFrame):
+            runs = runs.to_dict("records")
+        rows = []
+        for run in runs:
+            run = {k: _plain(v) for k, v in run.items()}
+            extra = {k: v for k, v in run.items() if k not in RUN_COLUMNS and v is not None}
+            rows.append((session_id, *[run.get(c) for c in RUN_COLUMNS], json.dumps(extra) if extra else None))
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def add_trace(self, session_id: int, kind: str, path: Union[str, Path], profiler: Optional[str] = None):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO traces VALUES (?, ?, ?, ?)",
+                              (session_id, kind, str(Path(path).resolve()), profiler))
+
+    def delete_session(self, session_id: int):
+        with self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    # --- queries ---
+
+    def _where(self, wrapper: Optional[str], config: dict):
+        # Every config filter is an indexed lookup in session_config
+        clauses, params = [], []
+        if wrapper is not None:
+            clauses.append("s.wrapper = ?")
+            params.append(wrapper)
+        for key, value in config.items():
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            numbers = [_number(v) for v in values]
+            if all(n is not None for n in numbers) and not any(isinstance(v, str) for v in values):
+                column, values = "num", numbers
+            else:
+                column, values = "value", [str(v) for v in values]
+            marks = ", ".join("?" * len(values))
+            clauses.append(f"s.session_id IN (SELECT session_id FROM session_config "
+                           f"WHERE key = ? AND {column} IN ({marks}))")
+            params.extend([key, *values])
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def session_ids(self, wrapper: Optional[str] = None, **config) -> np.ndarray:
+        where, params = self._where(wrapper, config)
+        rows = self.conn.execute(f"SELECT s.session_id FROM sessions s{where} ORDER BY s.session_id", params)
+        return np.fromiter((r[0] for r in rows), dtype=np.int64)
+
+    def sessions(self, wrapper: Optional[str] = None, **config) -> pd.DataFrame:
+        # One row per session, with its configuration as columns
+        where, params = self._where(wrapper, config)
+        df = pd.read_sql_query(f"SELECT s.* FROM sessions s{where} ORDER BY s.session_id", self.conn, params=params)
+        if df.empty:
+            return df
+        conf = pd.read_sql_query(
+            f"SELECT c.session_id, c.key, c.value, c.num FROM session_config c "
+            f"JOIN sessions s ON s.session_id = c.session_id{where}", self.conn, params=params)
+        if not conf.empty:
+            # Numeric values as numbers
+            conf["value"] = conf["num"].astype(object).where(conf["num"].notna(), conf["value"])
+            df = df.merge(conf.pivot(index="session_id", columns="key", values="value"),
+                          left_on="session_id", right_index=True, how="left")
+        return df
+
+    def runs(self, wrapper: Optional[str] = None, measured_only: bool = False, with_config: bool = True,
+             **config) -> pd.DataFrame:
+        # Per-run rows of the matching sessions (extra columns expanded), optionally with the session config
+        where, params = self._where(wrapper, config)
+        if measured_only:
+            where += (" AND " if where else " WHERE ") + "COALESCE(r.is_warmup, 0) = 0 AND r.returncode = 0"
+        df = pd.read_sql_query(
+            f"SELECT r.* FROM runs r JOIN sessions s ON s.session_id = r.session_id{where} "
+            f"ORDER BY r.session_id, r.run_idx", self.conn, params=params)
+        if df.empty:
+            return df.drop(columns="extra")
+
+        extra = df.pop("extra")
+        if extra.notna().any():
+            expanded = pd.DataFrame([json.loads(e) if e else {} for e in extra], index=df.index)
+            df = pd.concat([df, expanded], axis=1)
+        if with_config:
+            sessions = self.sessions(wrapper, **config)
+            conf_cols = [c for c in sessions.columns if c not in df.columns and c not in
+                         ("wrapper", "command", "output_path", "host", "started_ns", "finished_ns", "clock")]
+            df = df.merge(sessions[["session_id", *conf_cols]], on="session_id", how="left")
+        return df
+
+    def traces(self, kind: Optional[str] = None, wrapper: Optional[str] = None, **config) -> pd.DataFrame:
+        where, params = self._where(wrapper, config)
+        if kind is not None:
+            where += (" AND " if where else " WHERE ") + "t.kind = ?"
+            params.append(kind)
+        return pd.read_sql_query(f"SELECT t.* FROM traces t JOIN sessions s ON s.session_id = t.session_id{where} "
+                                 f"ORDER BY t.session_id", self.conn, params=params)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_store(store: Union[ResultStore, str, Path, None]) -> Optional[ResultStore]:
+    # Wrappers accept a store or its path
+    if store is None or isinstance(store, ResultStore):
+        return store
+    return ResultStore(store)
+
+
+def record_session(store: Union[ResultStore, str, Path], wrapper: str, output_path: Union[str, Path],
+                   config: dict, command: Optional[str] = None, started_ns: Optional[int] = None,
+                   finished_ns: Optional[int] = None, clock: Optional[dict] = None,
+                   traces: Optional[Dict[str, Union[str, Path]]] = None, profiler: Optional[str] = None) -> int:
+    # Called by the wrappers once their CSV is complete (outside of the measured loop)
+    owned = not isinstance(store, ResultStore)
+    store = open_store(store)
+    try:
+        session_id = store.add_session(wrapper, config, command, output_path, started_ns, finished_ns, clock)
+        output_path = Path(output_path)
+        if output_path.suffix == ".csv" and output_path.exists():
+            store.add_runs(session_id, pd.read_csv(output_path))
+            store.add_trace(session_id, "results", output_path)
+        for kind, path in (traces or {}).items():
+            if path is not None and Path(path).exists():
+                store.add_trace(session_id, kind, path, profiler if kind.startswith("power") else None)
+        logger.debug(f"Session {session_id} recorded in {store.path}")
+        return session_id
+    finally:
+        if owned:
+            store.close()
+
+
+def import_results(store: Union[ResultStore, str, Path], files: Iterable[Union[str, Path]], wrapper: str,
+                   config_re=None, config: Optional[dict] = None) -> int:
+    # Backfill results written before the store existed; the config comes from the file name
+    from e3bench.aggregate import config_from_name
+
+    nb_sessions = 0
+    owned = not isinstance(store, ResultStore)
+    store = open_store(store)
+    try:
+        known = set(store.traces(kind="results")["path"])
+        for path in sorted(Path(p).resolve() for p in files):
+            name_config = config_from_name(path, config_re)
+            if name_config is None or str(path) in known:
+                continue
+            record_session(store, wrapper, path, {**name_config, **(config or {})})
+            nb_sessions += 1
+    finally:
+        if owned:
+            store.close()
+    logger.info(f"Imported {nb_sessions} {wrapper} sessions")
+    return nb_sessions
+
+
+__all__ = [
+    "STORE_PATH",
+    "ResultStore",
+    "open_store",
+    "record_session",
+    "import_results",
+    "parse_tags",
+]
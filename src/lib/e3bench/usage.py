@@ -0,0 +1,49 @@
+import resource
+
+
+# Per-run OS resource accounting columns (see getrusage(2))
+USAGE_FIELDS = [
+    "ru_utime_ns",   # user CPU time
+    "ru_stime_ns",   # system CPU time
+    "ru_maxrss_kb",  # peak resident set size
+    "ru_majflt",     # page faults requiring I/O
+    "ru_minflt",     # page faults served without I/O
+    "ru_nvcsw",      # voluntary context switches (blocking, sleeping)
+    "ru_nivcsw",     # involuntary context switches (preemption)
+]
+
+
+def usage_from_rusage(ru: resource.struct_rusage) -> dict:
+    return {
+        "ru_utime_ns": int(ru.ru_utime * 1e9),
+        "ru_stime_ns": int(ru.ru_stime * 1e9),
+        "ru_maxrss_kb": ru.ru_maxrss,
+        "ru_majflt": ru.ru_majflt,
+        "ru_minflt": ru.ru_minflt,
+        "ru_nvcsw": ru.ru_nvcsw,
+        "ru_nivcsw": ru.ru_nivcsw,
+    }
+
+
+def usage_delta(before: resource.struct_rusage, after: resource.struct_rusage) -> dict:
+    # Counters are cumulative for a live process; the peak RSS is not, so it is kept as is
+    usage = usage_from_rusage(after)
+    for name, value in usage_from_rusage(before).items():
+        if name != "ru_maxrss_kb":
+            usage[name] -= value
+    return usage
+
+
+def usage_accumulate(total: dict, usage: dict) -> dict:
+    # Sum of several runs (peak RSS is the max over the runs)
+    for name in USAGE_FIELDS:
+        if name not in usage:
+            continue
+        if name == "ru_maxrss_kb":
+            total[name] = max(total.get(name, 0), usage[name])
+        else:
+            total[name] = total.get(name, 0) + usage[name]
+    return total
+
+
+__all__ = ["USAGE_FIELDS", "usage_from_rusage", "usage_delta", "usage_accumulate"]
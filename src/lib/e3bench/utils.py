@@ -1,12 +1,32 @@
 from pathlib import Path
+from typing import Iterable, List, Optional, Union
+import os
 import shutil
+import sys
 
 THIS_DIR = Path(__file__).parent.resolve()
 PROFILERS_DIR = THIS_DIR / "profilers"
+LIB_DIR = THIS_DIR.parent
+
+
+def uses_ina_sampler(profiler_name: str) -> bool:
+    # "inapy-<rail>[,<rail>...]" and "inaprof-<rail>[,<rail>...]" run the Python sampler, which reads
+    # all rails in one loop with one timestamp per row and flushes its output as it goes. The compiled
+    # single-rail profilers of ina_profiler/ are not started by the wrappers: the prebuilt binaries
+    # never flush, so the wrappers saw no sample before the readiness timeout.
+    return profiler_name.startswith(("inapy", "inaprof"))
+
+
+def smartpower3_port(profiler_name: str) -> str:
+    # "smartpower3" --> default port; "smartpower3-ttyACM0" --> /dev/ttyACM0; "smartpower3-/dev/pts/3" as is
+    parts = profiler_name.split("-", 1)
+    if len(parts) == 1 or not parts[1]:
+        return "/dev/ttyUSB0"
+    return parts[1] if parts[1].startswith("/") else f"/dev/{parts[1]}"
 
 
 def profiler_path_from_name(profiler_name: str) -> Path:
-    valid = ["tegrastats", "smiprof", "inaprof"]
+    valid = ["tegrastats", "smiprof", "inaprof", "inapy", "smartpower3"]
     if not any(profiler_name.startswith(v) for v in valid) :
         raise ValueError(f"Invalid option {profiler_name}. Use one of {valid}")
     
@@ -15,23 +35,67 @@ def profiler_path_from_name(profiler_name: str) -> Path:
         if shutil.which("tegrastats") is None:
             raise FileNotFoundError("The 'tegrastats' command was not found in PATH.")
         path = PROFILERS_DIR / "tegrastats/profiler.sh"
+    elif profiler_name == "tegrastats-pipe":
+        # tegrastats stdout read through a pipe, each line stamped on arrival
+        if shutil.which("tegrastats") is None:
+            raise FileNotFoundError("The 'tegrastats' command was not found in PATH.")
+        path = PROFILERS_DIR / "tegrastats/capture.py"
     elif profiler_name == "smiprof":
         # Check that nvidia-smi is available
         if shutil.which("nvidia-smi") is None:
             raise FileNotFoundError("The 'nvidia-smi' command was not found in PATH.")
         path = PROFILERS_DIR / "smiprof/profiler.sh"
-    else:
-        # Expect pattern like "inaprof-<rail>"
+    elif profiler_name.startswith("smartpower3"):
+        # Expect "smartpower3" or "smartpower3-<port>": Python serial reader
+        port = smartpower3_port(profiler_name)
+        if not Path(port).exists():
+            raise FileNotFoundError(f"SmartPower3 serial port {port} not found.")
+        path = PROFILERS_DIR / "smartpower3/profiler.py"
+    elif uses_ina_sampler(profiler_name):
+        # Expect pattern like "inaprof-<rail>" or "inaprof-<rail>,<rail>": Python sysfs sampler, no compiled binary needed
         parts = profiler_name.split("-", 1)
-        if len(parts) != 2 or not parts[1]:
-            raise ValueError("For 'inaprof', specify a rail name, e.g. 'inaprof-VDD_IN'")
-        rail_name = parts[1]
-        path = PROFILERS_DIR / f"inaprof/bin/{rail_name}"
+        if len(parts) != 2 or not all(parts[1].split(",")):
+            raise ValueError("Specify comma-separated rail names, e.g. 'inaprof-VDD_IN' or 'inaprof-VDD_IN,VDD_SOC'")
+        path = PROFILERS_DIR / "inaprof/sampler.py"
+    else:
+        raise ValueError(f"Invalid option {profiler_name}. Use one of {valid}")
 
     if not path.exists():
         raise FileNotFoundError(f"Profiler program {path} not found.")
     
     return path
-    
 
-__all__ = ["profiler_path_from_name"]
+
+def profiler_command_from_name(profiler_name: str, interval, output_path: Union[str, Path]) -> List[str]:
+    # Full command line following the `<profiler> <interval> <output_path>` convention
+    path = profiler_path_from_name(profiler_name)
+    if uses_ina_sampler(profiler_name):
+        rail_names = profiler_name.split("-", 1)[1]
+        return [sys.executable, "-m", "e3bench.profilers.inaprof.sampler", rail_names, str(interval), str(output_path)]
+    if profiler_name == "tegrastats-pipe":
+        return [sys.executable, "-m", "e3bench.profilers.tegrastats.capture", str(interval), str(output_path)]
+    if profiler_name.startswith("smartpower3"):
+        return [sys.executable, "-m", "e3bench.profilers.smartpower3.profiler", str(interval), str(output_path),
+                "--port", smartpower3_port(profiler_name)]
+    return [str(path), str(interval), str(output_path)]
+
+
+def profiler_env() -> dict:
+    # Environment for the profiler process: Python profilers import e3bench
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [str(LIB_DIR), env.get("PYTHONPATH")] if p)
+    return env
+
+
+def parse_tags(tags: Optional[Iterable[str]]) -> dict:
+    # ["model=resnet50", "gpu_mhz=918"] --> {"model": "resnet50", "gpu_mhz": "918"}
+    config = {}
+    for tag in tags or []:
+        key, sep, value = tag.partition("=")
+        if not sep or not key:
+            raise ValueError(f"Invalid tag {tag!r}. Use KEY=VALUE")
+        config[key.strip()] = value.strip()
+    return config
+
+
+__all__ = ["uses_ina_sampler", "smartpower3_port", "profiler_path_from_name", "profiler_command_from_name", "profiler_env", "parse_tags"]
@@ -1,10 +1,23 @@
-from .latency import basic_latency_wrap_prog, dynamic_latency_wrap_prog, mix_latency_wrap_prog
-from .power import basic_power_wrap_prog
+from e3bench._lazy import attach
+
+
+# Each wrapper is imported on first access (PEP 562): using the basic latency wrapper does not
+# load the autorange, power and energy modules, nor NumPy and pandas.
+_LAZY = {
+    "basic_latency_wrap_prog": ".latency.basic",
+    "dynamic_latency_wrap_prog": ".latency.dynamic",
+    "mix_latency_wrap_prog": ".latency.mix",
+    "basic_power_wrap_prog": ".power.basic",
+    "basic_energy_wrap_prog": ".energy.basic",
+}
+
+__getattr__, __dir__ = attach(__name__, _LAZY)
 
 
 __all__ = [
-    "basic_latency_wrap_prog", 
-    "dynamic_latency_wrap_prog", 
+    "basic_latency_wrap_prog",
+    "dynamic_latency_wrap_prog",
     "mix_latency_wrap_prog",
     "basic_power_wrap_prog",
+    "basic_energy_wrap_prog",
 ]
@@ -0,0 +1,16 @@
+from e3bench._lazy import attach
+
+
+# Imported on first access (PEP 562), see `e3bench.wrappers`
+_LAZY = {
+    "basic_energy_wrap_prog": ".basic",
+    "power_trace_path": ".basic",
+}
+
+__getattr__, __dir__ = attach(__name__, _LAZY)
+
+
+__all__ = [
+    "basic_energy_wrap_prog",
+    "power_trace_path",
+]
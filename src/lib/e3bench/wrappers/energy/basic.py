@@ -0,0 +1,77 @@
+from pathlib import Path
+from typing import Optional, Union
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+from e3bench.clock import clock_path, monotonic_ns, read_timebase
+from e3bench.energy import join_energy, tag_samples
+from e3bench.profilers.traces import load_power_trace
+from ..latency import basic_latency_wrap_prog
+from ..power import start_profiler, stop_profiler
+
+
+def power_trace_path(output_path: Union[str, Path], suffix: str = ".txt") -> Path:
+    # e.g. `w5_r30_ms100-energy.csv` --> `w5_r30_ms100-energy-power.txt` (raw) / `-power.csv` (parsed)
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}-power{suffix}")
+
+
+def basic_energy_wrap_prog(profiler_name: str, interval: int, prog_command: str, output_path: Union[str, Path],
+                           power_col: Optional[str] = None, grace_seconds=2, ready_timeout=10.0, post_samples=2,
+                           store=None, tags=None, **latency_kwargs):
+    # One sampling session around the whole latency session (warmup + measured runs).
+    # `latency_kwargs` are forwarded to `basic_latency_wrap_prog` (warmup, repeat, worker, target_ci, ...).
+    logger.info(f"[STARTED] Recording energy")
+    _start_ns = monotonic_ns()
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    raw_trace_path = power_trace_path(output_path)
+
+    profiler_proc, watcher = start_profiler(profiler_name, interval, raw_trace_path, ready_timeout)
+    if profiler_proc is None:
+        return None
+
+    try:
+        basic_latency_wrap_prog(prog_command, output_path, **latency_kwargs)
+    finally:
+        stop_profiler(profiler_proc, watcher, post_samples, ready_timeout, grace_seconds)
+
+    # Link runs and samples: both are stamped in the same (epoch ns) timebase
+    runs = pd.read_csv(output_path)
+    trace = load_power_trace(profiler_name, raw_trace_path)
+    if trace is None or trace.empty:
+        logger.error(f"No power samples in {raw_trace_path}; latency results left as is.")
+        return None
+
+    runs = join_energy(runs, trace, power_col)
+    runs.to_csv(output_path, index=False)
+
+    # Tag each sample with the run it falls in (-1 between runs)
+    ok = runs[runs["timestamp_ns"].notna() & runs["duration_ns"].notna()]
+    start_ns = ok["timestamp_ns"].to_numpy().astype(np.int64)
+    pos = tag_samples(trace["timestamp_ns"].to_numpy(), start_ns,
+                      start_ns + ok["duration_ns"].to_numpy().astype(np.int64))
+    trace["run_idx"] = np.where(pos >= 0, ok["run_idx"].to_numpy()[np.maximum(pos, 0)], -1)
+    trace.to_csv(power_trace_path(output_path, ".csv"), index=False)
+
+    measured = runs[(runs["is_warmup"] == 0) & (runs["returncode"] == 0)]
+    if not measured.empty:
+        logger.info(f"Energy per run: median={measured['energy_mj'].median():.3f} mJ  |  "
+                    f"avg power: median={measured['avg_power_mw'].median():.1f} mW  |  "
+                    f"coverage: min={measured['coverage'].min():.2f}")
+
+    # Index the session (parameters, tags, runs with their energy and the traces) in the results store
+    if store is not None:
+        from e3bench.store import record_session  # sqlite3 and the store are only loaded when a store is used
+        clock = read_timebase(clock_path(output_path))
+        config = {"profiler": profiler_name, "interval": interval, **latency_kwargs, **(tags or {})}
+        record_session(store, "basic_energy", output_path, config, prog_command, clock["start"]["wall_ns"],
+                       (clock["end"] or {}).get("wall_ns"), clock,
+                       traces={"power": raw_trace_path, "power_parsed": power_trace_path(output_path, ".csv"),
+                               "clock": clock_path(output_path)}, profiler=profiler_name)
+
+    _end_ns = monotonic_ns()
+    logger.info(f"[FINISHED] Recording energy. Took {(_end_ns - _start_ns)*1e-6:.3f} milliseconds")
+    return runs
@@ -1,6 +1,14 @@
-from .basic import basic_latency_wrap_prog
-from .dynamic import dynamic_latency_wrap_prog
-from .mix import mix_latency_wrap_prog
+from e3bench._lazy import attach
+
+
+# Imported on first access (PEP 562), see `e3bench.wrappers`
+_LAZY = {
+    "basic_latency_wrap_prog": ".basic",
+    "dynamic_latency_wrap_prog": ".dynamic",
+    "mix_latency_wrap_prog": ".mix",
+}
+
+__getattr__, __dir__ = attach(__name__, _LAZY)
 
 
 __all__ = [
@@ -1,11 +1,18 @@
-import csv
 from pathlib import Path
 from typing import Union
 from loguru import logger
 import time
 import shlex
-import subprocess
 import signal
+from statistics import median
+
+from e3bench.clock import Timebase, clock_path, monotonic_ns
+from e3bench.noise import NOISE_FIELDS, NoiseMonitor
+from e3bench.recorder import RunRecorder
+from e3bench.stats import SequentialStop, WarmupDetector
+from e3bench.usage import USAGE_FIELDS
+from .spawn import make_launcher, calibrate_launch_overhead, write_launch_overhead
+from .worker import LatencyWorker, WorkerError
 
 
 _stop_requested = False
@@ -17,72 +24,201 @@ def handle_sigint(sig, frame):
     _stop_requested = True
 
 
-def basic_latency_wrap_prog(prog_command: str, output_path: Union[str, Path], warmup=0, repeat=1):
+def basic_latency_wrap_prog(prog_command: str, output_path: Union[str, Path], warmup=0, repeat=1, worker=False,
+                            launcher="subprocess", calibrate=0, target_ci=None, confidence=0.95, ci_stat="median",
+                            max_repeat=None, max_warmup=50, max_failures=10, columnar=None, noise=False, store=None, tags=None):
     logger.info(f"[STARTED] Recording latency")
-    _start_ns = time.time_ns()
+    _start_ns = monotonic_ns()
+
+    # Timestamps are written in the session timebase, durations use the monotonic clock
+    timebase = Timebase()
 
     # Register Ctrl+C handler
     signal.signal(signal.SIGINT, handle_sigint)
 
     # Parse the command string into a list for subprocess
     cmd = shlex.split(prog_command)
-    total_runs = warmup + repeat
+
+    # With warmup="auto" the warmup ends when MSER-5 finds the steady state (at most `max_warmup` runs)
+    detector = None
+    if warmup == "auto":
+        detector = WarmupDetector(max_warmup=max_warmup)
+        warmup = None
+
+    # Sequential mode: `repeat` becomes the minimum number of measured runs (raised to the
+    # floor of the statistic, see `MIN_SAMPLES`) and `max_repeat` the budget. We stop as soon
+    # as the CI is narrow enough.
+    budget = repeat
+    stopping_rule = None
+    if target_ci is not None:
+        stopping_rule = SequentialStop(target_ci, confidence=confidence, stat=ci_stat, min_samples=repeat)
+        budget = max(stopping_rule.min_samples, max_repeat or 10 * repeat)
+        logger.debug(f"Target CI: +/-{target_ci*100:.2f}% on the {ci_stat} @ {confidence*100:.0f}% "
+                     f"|  Measured: {stopping_rule.min_samples} to {budget} runs")
 
     logger.debug(f"Running command: {prog_command}")
-    logger.debug(f"Warmup: {warmup}  |  Measured: {repeat}  |  Total: {total_runs}\n")
+    logger.debug(f"Warmup: {'auto' if warmup is None else warmup}  |  Measured: {repeat}  |  Budget: {budget}\n")
+
+    # In worker mode the program is started once and each run is timed inside it
+    latency_worker = LatencyWorker(prog_command).start() if worker else None
+    prog_launcher = make_launcher(cmd, launcher) if latency_worker is None else None
+
+    # Optional sidecar flagging runs contaminated by cpufreq changes, throttling or background load
+    monitor = NoiseMonitor().start() if noise else None
 
     # Prepare CSV
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = ["run_idx", "warmup", "repeat", "timestamp_ns", "duration_ns", "returncode"]
+    fieldnames = [
+        "run_idx", "warmup", "repeat", "timestamp_ns", "duration_ns", "returncode",
+        "launch_overhead_ns", "net_duration_ns", *USAGE_FIELDS, *(NOISE_FIELDS if noise else []), "is_warmup", "ci_rel_halfwidth", "stop_reason"]
 
-    with output_path.open("w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+    # Measure the spawn path cost so it can be subtracted from each run
+    overhead_ns = None
+    if calibrate > 0 and latency_worker is None:
+        overhead_runs = calibrate_launch_overhead(launcher, calibrate)
+        overhead_path = write_launch_overhead(output_path, launcher, overhead_runs)
+        overhead_ns = int(median(overhead_runs))
+        logger.debug(f"Launch overhead: {overhead_ns*1e-6:.3f} ms --> {overhead_path}")
+    elif latency_worker is not None:
+        overhead_ns = 0  # runs are timed inside the worker, no spawn to subtract
 
-        for i in range(total_runs):
-            row = {}
-            if _stop_requested:
-                break
+    def settle(row):
+        # Called once the warmup length is known
+        row["warmup"] = warmup
+        row["is_warmup"] = int(row["run_idx"] < warmup)
+        if stopping_rule is not None and not row["is_warmup"] and row["returncode"] == 0:
+            stopping_rule.update(row["duration_ns"])
+            row["ci_rel_halfwidth"] = stopping_rule.precision
+
+    pending = []   # rows held back until the warmup length is known
+    ok_runs = []   # indices of the successful runs fed to the warmup detector
+    failures = 0   # consecutive failed runs: they never reach the warmup detector
+
+    # Rows are buffered in memory and written by a background thread, away from the measured runs
+    with RunRecorder(output_path, fieldnames, columnar=columnar) as recorder:
+
+        i = 0
+        while True:
+            row = {"run_idx": i, "repeat": repeat}
+            worker_failed = False
 
             try:
-                start_ns = time.time_ns()
-                result = subprocess.run(cmd)
-                end_ns = time.time_ns()
-                duration_ns = end_ns - start_ns
-                rc = result.returncode
-                row = {
-                    "run_idx": i,
-                    "warmup": warmup,
-                    "repeat": repeat,
-                    "timestamp_ns": start_ns,
+                if monitor is not None:
+                    monitor.begin_run()
+                if latency_worker is not None:
+                    # A fixed warmup goes through the target's `warm` (auto: the length is not known yet)
+                    warming = warmup is not None and i < warmup
+                    run = (latency_worker.warm if warming else latency_worker.run)(1)[0]
+                    start_ns = run["start_mono_ns"]
+                    duration_ns = run["duration_ns"]
+                    end_ns = start_ns + duration_ns
+                    rc = run["returncode"]
+                    usage = {k: run[k] for k in USAGE_FIELDS if k in run}
+                else:
+                    start_ns = monotonic_ns()
+                    rc, usage = prog_launcher.run()
+                    end_ns = monotonic_ns()
+                    duration_ns = end_ns - start_ns
+                row.update({
+                    "timestamp_ns": timebase.to_wall_ns(start_ns),
                     "duration_ns": duration_ns,
                     "returncode": rc,
-                }
+                    **usage,
+                })
+                if monitor is not None:
+                    row.update(monitor.end_run())
+                if overhead_ns is not None:
+                    row["launch_overhead_ns"] = overhead_ns
+                    row["net_duration_ns"] = duration_ns - overhead_ns
                 logger.info(f"[Run {i:02d}] start_ns={start_ns} end_ns={end_ns} "
                 f"duration_ms={duration_ns*1e-6:.3f} returncode={rc}")
             except KeyboardInterrupt:
                 # User interrupted during child run
-                end_ns = time.time_ns()
-                row = {
-                    "run_idx": i,
-                    "warmup": warmup,
-                    "repeat": repeat,
-                    "returncode": -130,  # conventional code for SIGINT
-                }
+                end_ns = monotonic_ns()
+                row["returncode"] = -130  # conventional code for SIGINT
+            except WorkerError as e:
+                # The worker is gone, no further run can succeed
+                row["returncode"] = -1
+                worker_failed = True
+                logger.error(f"Worker failed: {e}")
             except Exception as e:
-                row = {
-                    "run_idx": i,
-                    "warmup": warmup,
-                    "repeat": repeat,
-                    "returncode": -1,
-                }
+                row["returncode"] = -1
                 logger.error(f"Command failed: {e}")
 
-            writer.writerow(row)
-            f.flush()  # ensure row is written promptly
+            failures = failures + 1 if row["returncode"] != 0 else 0
+
+            # Rows can only be classified once the warmup length is known
+            if warmup is None:
+                pending.append(row)
+                if row["returncode"] == 0:
+                    ok_runs.append(i)
+                    d = detector.update(row["duration_ns"])
+                    if d is not None:
+                        warmup = ok_runs[d] if d < len(ok_runs) else i + 1
+                        logger.info(f"Steady state detected: {warmup} warmup runs")
+                ready = [] if warmup is None else pending
+            else:
+                ready = [row]
+            if ready:
+                for r in ready:
+                    settle(r)
+                pending = []
+
+            # Record why the session ends on its last row
+            measured = 0 if warmup is None else i + 1 - warmup
+            stop_reason = None
+            if worker_failed:
+                stop_reason = "error"
+            elif _stop_requested:
+                stop_reason = "interrupted"
+            elif max_failures and failures >= max_failures:
+                stop_reason = "failed"
+                logger.error(f"Stopping after {failures} failed runs in a row")
+            elif stopping_rule is not None and stopping_rule.converged:
+                stop_reason = "converged"
+            elif warmup is not None and measured >= budget:
+                stop_reason = "budget" if stopping_rule is not None else "repeat"
+
+            if stop_reason is not None and warmup is None:
+                # Stopped before reaching the steady state: everything was warmup
+                warmup = i + 1
+                ready = pending
+                for r in ready:
+                    settle(r)
+                pending = []
+
+            if stop_reason is not None:
+                ready[-1]["stop_reason"] = stop_reason
+
+            for r in ready:
+                recorder.append(r)
+
+            if stop_reason is not None:
+                if stopping_rule is not None:
+                    logger.info(f"Stopped ({stop_reason}) after {len(stopping_rule.values)} measured runs, "
+                                f"CI: +/-{stopping_rule.precision*100:.2f}%")
+                break
+            i += 1
+
+    if latency_worker is not None:
+        latency_worker.shutdown()
     
+    if monitor is not None:
+        monitor.stop()
+
+    # Keep the (wall, monotonic) anchors next to the results
+    timebase.close()
+    timebase.write(clock_path(output_path))
+
+    # Index the session (parameters, tags and runs) in the results store
+    if store is not None:
+        from e3bench.store import record_session  # pandas is only loaded when a store is used
+        config = {"warmup": warmup, "warmup_auto": detector is not None, "repeat": repeat, "worker": worker,
+                  "launcher": launcher, "target_ci": target_ci, "ci_stat": ci_stat, "noise": noise, **(tags or {})}
+        record_session(store, "basic_latency", output_path, config, prog_command, timebase.start.wall_ns,
+                       timebase.end.wall_ns, timebase.to_dict(), traces={"clock": clock_path(output_path)})
+
     time.sleep(0.01)
-    _end_ns = time.time_ns()
+    _end_ns = monotonic_ns()
     logger.info(f"[FINISHED] Recording latency. Took {(_end_ns - _start_ns)*1e-6:.3f} milliseconds")
-
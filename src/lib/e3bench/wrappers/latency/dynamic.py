@@ -1,19 +1,19 @@
-import csv
 from pathlib import Path
 from typing import Union
 from loguru import logger
 import time
 import shlex
-import subprocess
 import signal
 import sys
+from statistics import median
 
-
-# Try to import torch.benchmark (optional)
-try:
-    import torch.utils.benchmark as torch_bench
-except Exception:
-    torch_bench = None
+from e3bench.autorange import make_autorange
+from e3bench.clock import Timebase, clock_path, monotonic_ns
+from e3bench.noise import NOISE_FIELDS, NoiseMonitor
+from e3bench.recorder import RunRecorder
+from e3bench.usage import USAGE_FIELDS
+from .spawn import make_launcher, calibrate_launch_overhead, write_launch_overhead
+from .worker import LatencyWorker
 
 _stop_requested = False
 
@@ -24,14 +24,15 @@ def handle_sigint(sig, frame):
     _stop_requested = True
 
 
-def dynamic_latency_wrap_prog(prog_command: str, output_path: Union[str, Path], min_ms=100):
+def dynamic_latency_wrap_prog(prog_command: str, output_path: Union[str, Path], min_ms=100, worker=False,
+                              launcher="subprocess", calibrate=0, method="adaptive", backend="native", columnar=None, noise=False,
+                              store=None, tags=None):
     logger.info(f"[STARTED] Recording latency")
-    _start_ns = time.time_ns()
+    _start_ns = monotonic_ns()
+
+    # Timestamps are written in the session timebase, durations use the monotonic clock
+    timebase = Timebase()
 
-    if not torch_bench:
-        logger.error("torch.utils.benchmark is not available. Please install PyTorch.")
-        sys.exit(1)
-    
     # Register SIGINT handler
     signal.signal(signal.SIGINT, handle_sigint)
     
@@ -40,32 +41,67 @@ def dynamic_latency_wrap_prog(prog_command: str, output_path: Union[str, Path],
 
     logger.debug(f"Running command: {prog_command}")
 
-    # Storage for per-run records and a counter (no class; use closure)
-    records = []
+    # In worker mode the program is started once and each run is timed inside it
+    latency_worker = LatencyWorker(prog_command).start() if worker else None
+    prog_launcher = make_launcher(cmd, launcher) if latency_worker is None else None
+
+    # Optional sidecar flagging runs contaminated by cpufreq changes, throttling or background load
+    monitor = NoiseMonitor().start() if noise else None
+
+    # Measure the spawn path cost so it can be subtracted from each run
+    overhead_ns = None
+    if calibrate > 0 and latency_worker is None:
+        overhead_runs = calibrate_launch_overhead(launcher, calibrate)
+        overhead_path = write_launch_overhead(output_path, launcher, overhead_runs)
+        overhead_ns = int(median(overhead_runs))
+        logger.debug(f"Launch overhead: {overhead_ns*1e-6:.3f} ms --> {overhead_path}")
+    elif latency_worker is not None:
+        overhead_ns = 0  # runs are timed inside the worker, no spawn to subtract
+
+    # Per-run records are buffered in memory and written by a background thread
+    output_path = Path(output_path)
+    recorder = RunRecorder(output_path, [
+        "run_idx", "min_ms", "timestamp_ns", "duration_ns", "returncode",
+        "launch_overhead_ns", "net_duration_ns", *USAGE_FIELDS, *(NOISE_FIELDS if noise else [])], columnar=columnar)
     run_idx = 0
 
     def fn():
         nonlocal run_idx
         try:
-            start_ns = time.time_ns()
-            result = subprocess.run(cmd)
-            end_ns = time.time_ns()
-            duration_ns = end_ns - start_ns
-            rc = result.returncode
-
-            records.append({
+            if monitor is not None:
+                monitor.begin_run()
+            if latency_worker is not None:
+                run = latency_worker.run(1)[0]
+                start_ns = run["start_mono_ns"]
+                duration_ns = run["duration_ns"]
+                rc = run["returncode"]
+                usage = {k: run[k] for k in USAGE_FIELDS if k in run}
+            else:
+                start_ns = monotonic_ns()
+                rc, usage = prog_launcher.run()
+                end_ns = monotonic_ns()
+                duration_ns = end_ns - start_ns
+
+            record = {
                 "run_idx": run_idx,
                 "min_ms": min_ms,
-                "timestamp_ns": start_ns,
+                "timestamp_ns": timebase.to_wall_ns(start_ns),
                 "duration_ns": duration_ns,
                 "returncode": rc,
-            })
+                **usage,
+            }
+            if monitor is not None:
+                record.update(monitor.end_run())
+            if overhead_ns is not None:
+                record["launch_overhead_ns"] = overhead_ns
+                record["net_duration_ns"] = duration_ns - overhead_ns
+            recorder.append(record)
             logger.debug(f"[Run {run_idx:03d}] ts={start_ns} ns  dur={duration_ns} ns  rc={rc}")
             run_idx += 1
         except KeyboardInterrupt:
             # User interrupted during child run
-            end_ns = time.time_ns()
-            records.append({
+            end_ns = monotonic_ns()
+            recorder.append({
                 "run_idx": run_idx,
                 "min_ms": min_ms,
                 "returncode": -130,  # conventional code for SIGINT
@@ -73,7 +109,7 @@ def dynamic_latency_wrap_prog(prog_command: str, output_path: Union[str, Path],
             run_idx += 1
             raise
         except Exception:
-            records.append({
+            recorder.append({
                 "run_idx": run_idx,
                 "min_ms": min_ms,
                 "returncode": -1,
@@ -85,25 +121,38 @@ def dynamic_latency_wrap_prog(prog_command: str, output_path: Union[str, Path],
             raise KeyboardInterrupt
 
 
-    # Timer that calls fn() once per iteration
-    t = torch_bench.Timer(stmt="fn()", globals={"fn": fn})
-
-    # Choose autorange variant
-    autorange = getattr(t, "adaptive_autorange", None) or t.blocked_autorange
+    # Timer that calls fn() once per iteration. The torch backend is only kept to cross-check the native one.
+    cache_key = f"{'worker' if worker else launcher}:{prog_command}"
+    try:
+        autorange = make_autorange(fn, method=method, backend=backend, cache_key=cache_key)
+    except ImportError:
+        logger.error("torch.utils.benchmark is not available. Please install PyTorch or use backend='native'.")
+        sys.exit(1)
 
     try:
         autorange(min_run_time=min_ms/1000)
     except KeyboardInterrupt:
         logger.warning("Interrupted -- writing partial results...")
-
-    # Write CSV
-    output_path = Path(output_path)
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=["run_idx", "min_ms", "timestamp_ns", "duration_ns", "returncode"])
-        writer.writeheader()
-        writer.writerows(records)
+    finally:
+        if latency_worker is not None:
+            latency_worker.shutdown()
+        recorder.close()
     
+    if monitor is not None:
+        monitor.stop()
+
+    # Keep the (wall, monotonic) anchors next to the results
+    timebase.close()
+    timebase.write(clock_path(output_path))
+
+    # Index the session (parameters, tags and runs) in the results store
+    if store is not None:
+        from e3bench.store import record_session  # pandas is only loaded when a store is used
+        config = {"min_ms": min_ms, "worker": worker, "launcher": launcher, "method": method, "backend": backend,
+                  "noise": noise, **(tags or {})}
+        record_session(store, "dynamic_latency", output_path, config, prog_command, timebase.start.wall_ns,
+                       timebase.end.wall_ns, timebase.to_dict(), traces={"clock": clock_path(output_path)})
+
     time.sleep(0.01)
-    _end_ns = time.time_ns()
+    _end_ns = monotonic_ns()
     logger.info(f"[FINISHED] Recording latency. Took {(_end_ns - _start_ns)*1e-6:.3f} milliseconds")
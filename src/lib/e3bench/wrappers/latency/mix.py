@@ -1,20 +1,20 @@
-import csv
 from pathlib import Path
 from typing import Union
 from loguru import logger
 import time
 import shlex
-import subprocess
 import signal
 import sys
-import numpy as np
+from statistics import median, pstdev
 
-
-# Try to import torch.benchmark (optional)
-try:
-    import torch.utils.benchmark as torch_bench
-except Exception:
-    torch_bench = None
+from e3bench.autorange import make_autorange
+from e3bench.clock import Timebase, clock_path, monotonic_ns
+from e3bench.noise import NOISE_FIELDS, NoiseMonitor
+from e3bench.recorder import RunRecorder
+from e3bench.stats import WarmupDetector
+from e3bench.usage import USAGE_FIELDS, usage_accumulate
+from .spawn import make_launcher, calibrate_launch_overhead, write_launch_overhead
+from .worker import LatencyWorker, WorkerError
 
 _stop_requested = False
 
@@ -25,34 +25,57 @@ def handle_sigint(sig, frame):
     _stop_requested = True
 
 
-def mix_latency_wrap_prog(prog_command: str, output_path: Union[str, Path], min_ms=100, warmup=0, repeat=1):
+def mix_latency_wrap_prog(prog_command: str, output_path: Union[str, Path], min_ms=100, warmup=0, repeat=1, worker=False,
+                          launcher="subprocess", calibrate=0, method="adaptive", backend="native", max_warmup=50, columnar=None,
+                          noise=False, max_failures=10, store=None, tags=None):
     logger.info(f"[STARTED] Recording latency")
-    _start_ns = time.time_ns()
+    _start_ns = monotonic_ns()
+
+    # Timestamps are written in the session timebase, durations use the monotonic clock
+    timebase = Timebase()
 
-    if not torch_bench:
-        logger.error("torch.utils.benchmark is not available. Please install PyTorch.")
-        sys.exit(1)
-    
     # Register SIGINT handler
     signal.signal(signal.SIGINT, handle_sigint)
     
     # Parse the command string into a list for subprocess
     cmd = shlex.split(prog_command)
 
-    total_runs = warmup + repeat
+    # With warmup="auto" the warmup ends when MSER-5 finds the steady state of the medians
+    detector = None
+    if warmup == "auto":
+        detector = WarmupDetector(max_warmup=max_warmup)
+        warmup = None
+
     logger.debug(f"Running command: {prog_command}")
-    logger.debug(f"Warmup: {warmup}  |  Measured: {repeat}  |  Total: {total_runs}\n")
+    logger.debug(f"Warmup: {'auto' if warmup is None else warmup}  |  Measured: {repeat}\n")
 
-    def fn():
-        subprocess.run(cmd).returncode
+    # In worker mode the program is started once and each call is a single harness run
+    latency_worker = LatencyWorker(prog_command).start() if worker else None
+    prog_launcher = make_launcher(cmd, launcher) if latency_worker is None else None
 
-    # Timer that calls fn() once per iteration
-    t = torch_bench.Timer(stmt="fn()", globals={"fn": fn})
+    # Optional sidecar flagging runs contaminated by cpufreq changes, throttling or background load
+    monitor = NoiseMonitor().start() if noise else None
 
-    # Prefer adaptive_autorange if available; else fallback to blocked_autorange
-    autorange = getattr(t, "adaptive_autorange", None)
-    if autorange is None:
-        autorange = t.blocked_autorange
+    # Resource usage summed over all the calls of one autorange measurement
+    usage = {}
+
+    warming = False  # a fixed warmup goes through the target's `warm` in worker mode
+
+    def fn():
+        if latency_worker is not None:
+            run = (latency_worker.warm if warming else latency_worker.run)(1)[0]
+            usage_accumulate(usage, run)
+        else:
+            _, run_usage = prog_launcher.run()
+            usage_accumulate(usage, run_usage)
+
+    # Timer that calls fn() once per iteration. The torch backend is only kept to cross-check the native one.
+    cache_key = f"{'worker' if worker else launcher}:{prog_command}"
+    try:
+        autorange = make_autorange(fn, method=method, backend=backend, cache_key=cache_key)
+    except ImportError:
+        logger.error("torch.utils.benchmark is not available. Please install PyTorch or use backend='native'.")
+        sys.exit(1)
     
     # Prepare CSV
     output_path = Path(output_path)
@@ -60,72 +83,156 @@ def mix_latency_wrap_prog(prog_command: str, output_path: Union[str, Path], min_
     fieldnames = [
         "run_idx", "warmup", "repeat", "min_ms", "timestamp_ns", "duration_ns", 
         "nb_iter", "nb_per_run", "duration__mean__ns", "duration__median__ns",
-        "duration__std__ns", "duration__iqr__ns", "returncode"]
-
-    with output_path.open("w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for i in range(total_runs):
+        "duration__std__ns", "duration__iqr__ns", "returncode",
+        "launch_overhead_ns", "net_duration__median__ns", *USAGE_FIELDS, *(NOISE_FIELDS if noise else []), "is_warmup", "stop_reason"]
+
+    # Measure the spawn path cost so it can be subtracted from each run
+    overhead_ns = None
+    if calibrate > 0 and latency_worker is None:
+        overhead_runs = calibrate_launch_overhead(launcher, calibrate)
+        overhead_path = write_launch_overhead(output_path, launcher, overhead_runs)
+        overhead_ns = int(median(overhead_runs))
+        logger.debug(f"Launch overhead: {overhead_ns*1e-6:.3f} ms --> {overhead_path}")
+    elif latency_worker is not None:
+        overhead_ns = 0  # runs are timed inside the worker, no spawn to subtract
+
+    # Rows are buffered in memory and written by a background thread, away from the measured runs
+    with RunRecorder(output_path, fieldnames, columnar=columnar) as recorder:
+
+        pending = []   # rows held back until the warmup length is known
+        ok_runs = []   # indices of the successful runs fed to the warmup detector
+        failures = 0   # consecutive failed runs: they never reach the warmup detector
+
+        i = 0
+        while not _stop_requested:
             row = {}
-            if _stop_requested:
-                break
-
+            worker_failed = False
             try:
-                start_ns = time.time_ns()
+                usage.clear()
+                warming = warmup is not None and i < warmup
+                if monitor is not None:
+                    monitor.begin_run()
+                start_ns = monotonic_ns()
                 measure = autorange(min_run_time=min_ms/1000)
-                end_ns = time.time_ns()
+                end_ns = monotonic_ns()
                 duration_ns = end_ns - start_ns
 
                 nb_iter = len(measure.raw_times)
                 nb_per_run = measure.number_per_run
                 dt_mean = measure.mean * 1e9
-                dt_std = np.std(measure.raw_times) * 1e9
+                dt_std = pstdev(measure.raw_times) * 1e9
                 dt_median = measure.median * 1e9
                 dt_iqr = measure.iqr * 1e9
 
                 row = {
                     "run_idx": i,
-                    "warmup": warmup,
                     "repeat": repeat,
                     "min_ms": min_ms,
                     "nb_iter": nb_iter,
                     "nb_per_run": nb_per_run,
-                    "timestamp_ns": start_ns,
+                    "timestamp_ns": timebase.to_wall_ns(start_ns),
                     "duration_ns": duration_ns,
                     "duration__mean__ns": dt_mean,
                     "duration__median__ns": dt_median,
                     "duration__std__ns": float(dt_std),
                     "duration__iqr__ns": dt_iqr,
                     "returncode": 0,
+                    **usage,
                 }
+                if monitor is not None:
+                    row.update(monitor.end_run())
+                if overhead_ns is not None:
+                    row["launch_overhead_ns"] = overhead_ns
+                    row["net_duration__median__ns"] = dt_median - overhead_ns
+                recorder.add_raw(i, measure.raw_times)
 
                 logger.info(f"[Run {i:02d}] start_ns={start_ns} end_ns={end_ns} "
                 f"duration_ms={duration_ns*1e-6:.3f} returncode={0}")
             except KeyboardInterrupt:
                 # User interrupted during child run
-                end_ns = time.time_ns()
+                end_ns = monotonic_ns()
                 row = {
                     "run_idx": i,
-                    "warmup": warmup,
                     "repeat": repeat,
                     "min_ms": min_ms,
                     "returncode": -130,  # conventional code for SIGINT
                 }
+            except WorkerError as e:
+                # The worker is gone, no further run can succeed
+                row = {
+                    "run_idx": i,
+                    "repeat": repeat,
+                    "min_ms": min_ms,
+                    "returncode": -1,
+                }
+                worker_failed = True
+                logger.error(f"Worker failed: {e}")
             except Exception as e:
                 row = {
                     "run_idx": i,
-                    "warmup": warmup,
                     "repeat": repeat,
                     "min_ms": min_ms,
                     "returncode": -1,
                 }
                 logger.error(f"Command failed: {e}")
+            failures = failures + 1 if row["returncode"] != 0 else 0
+
+            # Rows can only be classified once the warmup length is known
+            pending.append(row)
+            if warmup is None and row["returncode"] == 0:
+                ok_runs.append(i)
+                d = detector.update(row["duration__median__ns"])
+                if d is not None:
+                    warmup = ok_runs[d] if d < len(ok_runs) else i + 1
+                    logger.info(f"Steady state detected: {warmup} warmup runs")
+
+            # Record why the session ends on its last row
+            stop_reason = None
+            if worker_failed:
+                stop_reason = "error"
+            elif _stop_requested:
+                stop_reason = "interrupted"
+            elif max_failures and failures >= max_failures:
+                stop_reason = "failed"
+                logger.error(f"Stopping after {failures} failed runs in a row")
+            elif warmup is not None and i + 1 - warmup >= repeat:
+                stop_reason = "repeat"
+            if stop_reason is not None:
+                row["stop_reason"] = stop_reason
+                if warmup is None:
+                    warmup = i + 1  # stopped before reaching the steady state: everything was warmup
+
+            if warmup is not None:
+                for r in pending:
+                    r["warmup"] = warmup
+                    r["is_warmup"] = int(r["run_idx"] < warmup)
+                    recorder.append(r)
+                pending = []
+
+            if stop_reason is not None:
+                break
+            i += 1
+
+    if latency_worker is not None:
+        latency_worker.shutdown()
+
+    if monitor is not None:
+        monitor.stop()
+
+    # Keep the (wall, monotonic) anchors next to the results
+    timebase.close()
+    timebase.write(clock_path(output_path))
 
-            writer.writerow(row)
-            f.flush()  # ensure row is written promptly
+    # Index the session (parameters, tags and runs) in the results store
+    if store is not None:
+        from e3bench.store import record_session  # pandas is only loaded when a store is used
+        config = {"min_ms": min_ms, "warmup": warmup, "warmup_auto": detector is not None, "repeat": repeat,
+                  "worker": worker, "launcher": launcher, "method": method, "backend": backend, "noise": noise,
+                  **(tags or {})}
+        record_session(store, "mix_latency", output_path, config, prog_command, timebase.start.wall_ns,
+                       timebase.end.wall_ns, timebase.to_dict(), traces={"clock": clock_path(output_path)})
 
     time.sleep(0.01)
     
-    _end_ns = time.time_ns()
+    _end_ns = monotonic_ns()
     logger.info(f"[FINISHED] Recording latency. Took {(_end_ns - _start_ns)*1e-6:.3f} milliseconds")
@@ -0,0 +1,104 @@
+import csv
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from statistics import median
+from typing import List, Tuple, Union
+from loguru import logger
+
+from e3bench.clock import monotonic_ns
+from e3bench.usage import usage_from_rusage
+
+
+LAUNCHERS = ["subprocess", "posix_spawn"]
+
+# Command used to measure the cost of the spawn path itself
+NULL_COMMAND = ["true"]
+
+
+# Both launchers reap the child with wait4 so each run comes with its own rusage
+# (see `e3bench.usage.USAGE_FIELDS`) at the cost of no extra syscall.
+class SubprocessLauncher:
+    def __init__(self, cmd: List[str]):
+        self.cmd = list(cmd)
+
+    def run(self) -> Tuple[int, dict]:
+        proc = subprocess.Popen(self.cmd)
+        try:
+            _, status, ru = os.wait4(proc.pid, 0)
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        return proc.returncode, usage_from_rusage(ru)
+
+
+class PosixSpawnLauncher:
+    # Resolve the executable and snapshot the environment once, so that each run
+    # only pays for posix_spawn + wait4.
+    def __init__(self, cmd: List[str]):
+        path = shutil.which(cmd[0])
+        if path is None:
+            raise FileNotFoundError(f"The '{cmd[0]}' command was not found in PATH.")
+        self.path = path
+        self.argv = list(cmd)
+        self.env = dict(os.environ)
+
+    def run(self) -> Tuple[int, dict]:
+        pid = os.posix_spawn(self.path, self.argv, self.env)
+        _, status, ru = os.wait4(pid, 0)
+        return os.waitstatus_to_exitcode(status), usage_from_rusage(ru)
+
+
+def make_launcher(cmd: List[str], launcher: str = "subprocess"):
+    if launcher == "subprocess":
+        return SubprocessLauncher(cmd)
+    elif launcher == "posix_spawn":
+        return PosixSpawnLauncher(cmd)
+    raise ValueError(f"Invalid launcher {launcher}. Use one of {LAUNCHERS}")
+
+
+def calibrate_launch_overhead(launcher: str = "subprocess", nb_runs: int = 20) -> List[int]:
+    # Time a null command on the same spawn path as the measured program
+    null_launcher = make_launcher(NULL_COMMAND, launcher)
+    null_launcher.run()  # not recorded, warms up the page cache
+
+    durations_ns = []
+    for _ in range(nb_runs):
+        start_ns = monotonic_ns()
+        null_launcher.run()
+        durations_ns.append(monotonic_ns() - start_ns)
+
+    logger.debug(f"Launch overhead ({launcher}): median={median(durations_ns)*1e-6:.3f} ms "
+                 f"min={min(durations_ns)*1e-6:.3f} ms max={max(durations_ns)*1e-6:.3f} ms")
+    return durations_ns
+
+
+def launch_overhead_path(output_path: Union[str, Path]) -> Path:
+    # e.g. `w5_r30_ms100-latency.csv` --> `w5_r30_ms100-latency-launch.csv`
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}-launch.csv")
+
+
+def write_launch_overhead(output_path: Union[str, Path], launcher: str, durations_ns: List[int]) -> Path:
+    path = launch_overhead_path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["run_idx", "launcher", "duration_ns"])
+        writer.writeheader()
+        for i, duration_ns in enumerate(durations_ns):
+            writer.writerow({"run_idx": i, "launcher": launcher, "duration_ns": duration_ns})
+    return path
+
+
+__all__ = [
+    "LAUNCHERS",
+    "SubprocessLauncher",
+    "PosixSpawnLauncher",
+    "make_launcher",
+    "calibrate_launch_overhead",
+    "launch_overhead_path",
+    "write_launch_overhead",
+]
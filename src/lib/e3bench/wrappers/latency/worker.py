@@ -0,0 +1,98 @@
+import json
+import os
+import shlex
+import subprocess
+from loguru import logger
+
+from e3bench.harness import HARNESS_FDS_ENV
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+class LatencyWorker:
+    # Long-lived target process driven through the e3bench harness protocol
+    # (init, warm, run, shutdown). The target must call `e3bench.harness.serve`.
+
+    def __init__(self, prog_command: str):
+        self.prog_command = prog_command
+        self.cmd = shlex.split(prog_command)
+        self.proc = None
+        self._commands = None
+        self._results = None
+
+    def start(self):
+        cmd_r, cmd_w = os.pipe()  # wrapper --> worker
+        res_r, res_w = os.pipe()  # worker  --> wrapper
+
+        env = dict(os.environ)
+        env[HARNESS_FDS_ENV] = f"{cmd_r},{res_w}"
+
+        logger.debug(f"Starting worker: {self.prog_command}")
+        self.proc = subprocess.Popen(self.cmd, pass_fds=(cmd_r, res_w), env=env)
+
+        # Keep only our ends of the pipes
+        os.close(cmd_r)
+        os.close(res_w)
+        self._commands = os.fdopen(cmd_w, "w", buffering=1)
+        self._results = os.fdopen(res_r, "r")
+
+        self.request("init")
+        return self
+
+    def request(self, op: str, **kwargs) -> dict:
+        try:
+            self._commands.write(json.dumps({"op": op, **kwargs}) + "\n")
+        except BrokenPipeError:
+            raise WorkerError(f"Worker exited (returncode={self.proc.poll()}) before '{op}'")
+
+        line = self._results.readline()
+        if not line:
+            raise WorkerError(f"Worker exited (returncode={self.proc.poll()}) while handling '{op}'")
+
+        reply = json.loads(line)
+        if not reply.get("ok", False):
+            raise WorkerError(f"Worker failed on '{op}': {reply.get('error')}")
+        return reply
+
+    def warm(self, n: int = 1) -> list:
+        # Same entries as `run`, for the runs known to be warmup
+        return self.request("warm", n=n)["runs"]
+
+    def run(self, n: int = 1) -> list:
+        # Each entry holds the worker-side "start_mono_ns", "duration_ns", "returncode" and rusage
+        return self.request("run", n=n)["runs"]
+
+    def shutdown(self, timeout: float = 5.0):
+        if self.proc is None:
+            return
+
+        if self.proc.poll() is None:
+            try:
+                self.request("shutdown")
+            except WorkerError:
+                pass
+
+        for stream in (self._commands, self._results):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+        try:
+            self.proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("Worker did not exit after shutdown; killing it.")
+            self.proc.kill()
+            self.proc.wait()
+        logger.debug(f"Worker exited with code {self.proc.returncode}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+__all__ = ["LatencyWorker", "WorkerError"]
@@ -1,4 +1,18 @@
-from .basic import basic_power_wrap_prog
+from e3bench._lazy import attach
 
 
-__all__ = ["basic_power_wrap_prog"]
+# Imported on first access (PEP 562), see `e3bench.wrappers`
+_LAZY = {
+    "basic_power_wrap_prog": ".basic",
+    "start_profiler": ".basic",
+    "stop_profiler": ".basic",
+}
+
+__getattr__, __dir__ = attach(__name__, _LAZY)
+
+
+__all__ = [
+    "basic_power_wrap_prog",
+    "start_profiler",
+    "stop_profiler",
+]
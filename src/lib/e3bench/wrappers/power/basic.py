@@ -3,9 +3,12 @@ import subprocess
 import signal
 import os
 import time
+from pathlib import Path
 from loguru import logger
 
-from e3bench.utils import profiler_path_from_name
+from e3bench.clock import Timebase, clock_path, monotonic_ns
+from e3bench.utils import profiler_command_from_name, profiler_env
+from .ready import output_watcher
 
 
 def send_interrupt(proc: subprocess.Popen):
@@ -36,40 +39,53 @@ def force_kill(proc: subprocess.Popen):
             pass
 
 
-def basic_power_wrap_prog(profiler_name, interval, prog_command, output_path, grace_seconds=2):
-    logger.info(f"[STARTED] Recording power")
-    _start_ns = time.time_ns()
+def start_profiler(profiler_name, interval, output_path, ready_timeout=10.0):
+    # Start the profiler in its own process group and wait for its first valid sample.
+    # Returns (profiler_proc, watcher), or (None, None) if the profiler died before sampling.
+    _start_ns = monotonic_ns()
 
     # Define power profiler program
-    power_profiler = profiler_path_from_name(profiler_name)
-    profiler_prog = f"{power_profiler} {interval} {output_path}"
+    profiler_cmd = profiler_command_from_name(profiler_name, interval, output_path)
+    profiler_prog = shlex.join(profiler_cmd)
+
+    # Samples left over from a previous measurement must not count as readiness
+    from e3bench.profilers.tracewriter import clear_trace, is_trace_path
+    if is_trace_path(output_path):
+        clear_trace(output_path)  # refuses directories that are not e3bench traces
+    else:
+        Path(output_path).unlink(missing_ok=True)
+    watcher = output_watcher(profiler_name, output_path)
 
     # Start power profiler in the background
     logger.info(f"Starting power profiler (background): {profiler_prog}")
     # new session so we can signal the whole group
     profiler_proc = subprocess.Popen(
-        shlex.split(profiler_prog),
+        profiler_cmd,
         shell=False,
+        env=profiler_env(),
         preexec_fn=os.setsid,   # new process group/session
     )
 
-    time.sleep(4)
-
-    # Start main programn in the main thread
-    logger.info(f"Running main program (foreground): {prog_command}")
+    # Wait for the first valid sample instead of a fixed delay
     try:
-        result = subprocess.run(shlex.split(prog_command), shell=False)
-        rc1 = result.returncode
-    except KeyboardInterrupt:
-        # Already handled by on_sigint, but guard just in case
-        rc1 = -130
-    except Exception as e:
-        rc1 = -1
-        logger.error(f"An error occurred: {e}")
-
-    time.sleep(2)
-    
-    logger.info(f"main program exited with code {rc1}. Stopping power profiler...")
+        ready = watcher.wait_for(1, ready_timeout, profiler_proc)
+    except BaseException:
+        # e.g. Ctrl+C or an unreadable output: do not leave the profiler running in its session
+        watcher.close()
+        terminate_profiler(profiler_proc)
+        raise
+    if not ready:
+        if profiler_proc.poll() is not None:
+            logger.error(f"power profiler exited with code {profiler_proc.returncode} before its first sample.")
+            watcher.close()
+            return None, None
+        logger.warning(f"No sample from the power profiler after {ready_timeout} s; running anyway.")
+    logger.debug(f"power profiler ready after {(monotonic_ns() - _start_ns)*1e-6:.3f} milliseconds")
+    return profiler_proc, watcher
+
+
+def terminate_profiler(profiler_proc, grace_seconds=2):
+    logger.info("Stopping power profiler...")
     send_interrupt(profiler_proc)
 
     # Wait for graceful shutdown of profiler
@@ -84,8 +100,61 @@ def basic_power_wrap_prog(profiler_name, interval, prog_command, output_path, gr
         except Exception:
             pass
 
+
+def stop_profiler(profiler_proc, watcher, post_samples=2, ready_timeout=10.0, grace_seconds=2):
+    # Let the profiler record a few samples after the program ended; it is stopped in any case
+    try:
+        nb_samples = watcher.poll()
+        if not watcher.wait_for(nb_samples + post_samples, ready_timeout, profiler_proc):
+            logger.warning(f"Got {watcher.count - nb_samples}/{post_samples} samples after the program ended.")
+    finally:
+        watcher.close()
+        terminate_profiler(profiler_proc, grace_seconds)
+
+
+def basic_power_wrap_prog(profiler_name, interval, prog_command, output_path, grace_seconds=2,
+                          ready_timeout=10.0, post_samples=2, store=None, tags=None):
+    logger.info(f"[STARTED] Recording power")
+    _start_ns = monotonic_ns()
+
+    # Profilers stamp samples with the wall clock; keep (wall, monotonic) anchors to align them with latency runs
+    timebase = Timebase()
+
+    profiler_proc, watcher = start_profiler(profiler_name, interval, output_path, ready_timeout)
+    if profiler_proc is None:
+        return -1
+
+    # Start main programn in the main thread
+    logger.info(f"Running main program (foreground): {prog_command}")
+    try:
+        try:
+            result = subprocess.run(shlex.split(prog_command), shell=False)
+            rc1 = result.returncode
+        except KeyboardInterrupt:
+            # Already handled by on_sigint, but guard just in case
+            rc1 = -130
+        except Exception as e:
+            rc1 = -1
+            logger.error(f"An error occurred: {e}")
+        logger.info(f"main program exited with code {rc1}.")
+    finally:
+        stop_profiler(profiler_proc, watcher, post_samples, ready_timeout, grace_seconds)
+
+    timebase.close()
+    timebase.write(clock_path(output_path))
+    if timebase.drift_ns:
+        logger.debug(f"Wall clock drifted by {timebase.drift_ns*1e-6:.3f} ms during the measurement")
+
+    # Index the session and its trace in the results store
+    if store is not None:
+        from e3bench.store import record_session  # pandas is only loaded when a store is used
+        config = {"profiler": profiler_name, "interval": interval, "returncode": rc1, **(tags or {})}
+        record_session(store, "basic_power", output_path, config, prog_command, timebase.start.wall_ns,
+                       timebase.end.wall_ns, timebase.to_dict(),
+                       traces={"power": output_path, "clock": clock_path(output_path)}, profiler=profiler_name)
+
     time.sleep(0.01)
-    _end_ns = time.time_ns()
+    _end_ns = monotonic_ns()
     logger.info(f"[FINISHED] Recording power. Took {(_end_ns - _start_ns)*1e-6:.3f} milliseconds")
 
     # Forward main program's return code
@@ -0,0 +1,132 @@
+import json
+import os
+import re
+import subprocess
+import time
+from pathlib import Path
+from typing import Optional, Pattern, Union
+
+from e3bench.clock import monotonic_ns
+
+
+# What a valid sample line looks like in the output file of each profiler.
+# Kept free of the post-processing imports (pandas) so that waiting stays cheap.
+SAMPLE_PATTERNS = {
+    # "1764254521123456789\t11-27-2025 15:42:01 RAM ..." (arrival ns, then the tegrastats line)
+    "tegrastats-pipe": re.compile(r'^\d+\t\d{2}-\d{2}-\d{4} \d{2}:\d{2}:\d{2}\b'),
+    "tegrastats": re.compile(r'^\d{2}-\d{2}-\d{4} \d{2}:\d{2}:\d{2}\b'),  # "11-27-2025 15:42:01 RAM ..."
+    "smiprof": re.compile(r'^\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}'),      # "2025/11/27 15:42:01.123, 12.34 W, ..."
+    "inaprof": re.compile(r'^\d+(?:,-?\d+(?:\.\d+)?)+$'),               # "1764254521123,1234,5000" (not the header)
+}
+SAMPLE_PATTERNS["inapy"] = SAMPLE_PATTERNS["inaprof"]  # same output format
+SAMPLE_PATTERNS["smartpower3"] = SAMPLE_PATTERNS["inaprof"]  # "1764254521123,12345,15023,0412,..."
+
+
+def sample_pattern(profiler_name: str) -> Pattern:
+    for prefix, pattern in SAMPLE_PATTERNS.items():
+        if profiler_name.startswith(prefix):
+            return pattern
+    raise ValueError(f"No sample pattern for profiler {profiler_name}. Use one of {list(SAMPLE_PATTERNS)}")
+
+
+class SampleWatcher:
+    # Follows a profiler output file and counts the complete lines matching `pattern`.
+    # Only the bytes appended since the last poll are read.
+    def __init__(self, output_path: Union[str, Path], pattern: Pattern, poll_interval: float = 0.005):
+        self.output_path = Path(output_path)
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.count = 0
+        self._fd = None
+        self._offset = 0
+        self._partial = b""
+
+    def poll(self) -> int:
+        if self._fd is None:
+            try:
+                self._fd = os.open(self.output_path, os.O_RDONLY)
+            except FileNotFoundError:
+                return self.count
+
+        # The profiler truncates the file when it starts
+        if os.fstat(self._fd).st_size < self._offset:
+            self._offset, self._partial, self.count = 0, b"", 0
+
+        while True:
+            chunk = os.pread(self._fd, 65536, self._offset)
+            if not chunk:
+                break
+            self._offset += len(chunk)
+            *lines, self._partial = (self._partial + chunk).split(b"\n")
+            for line in lines:
+                if self.pattern.search(line.decode(errors="replace").strip()):
+                    self.count += 1
+        return self.count
+
+    def wait_for(self, nb_samples: int, timeout: float, proc: Optional[subprocess.Popen] = None) -> bool:
+        # Returns True once `nb_samples` valid samples were seen in total,
+        # False on timeout or if `proc` (the profiler) exits first.
+        deadline_ns = monotonic_ns() + int(timeout * 1e9)
+        while self.poll() < nb_samples:
+            if proc is not None and proc.poll() is not None:
+                return self.poll() >= nb_samples
+            if monotonic_ns() >= deadline_ns:
+                return False
+            time.sleep(self.poll_interval)
+        return True
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class TraceWatcher(SampleWatcher):
+    # Same for an e3bench trace (`.e3t` directory) being written: the complete rows are
+    # counted from the size of its time column file, nothing is read or parsed.
+    def __init__(self, output_path: Union[str, Path], time_col: str = "timestamp_ns", poll_interval: float = 0.005):
+        from e3bench.profilers.tracewriter import HEADER_NAME
+        super().__init__(output_path, None, poll_interval)
+        self.time_col = time_col
+        self._header_path = self.output_path / HEADER_NAME
+        self._column_path = None
+        self._itemsize = None
+
+    def poll(self) -> int:
+        if self._column_path is None:
+            # The columns are known once the first chunk is written
+            try:
+                with self._header_path.open() as f:
+                    header = json.load(f)
+            except (OSError, ValueError):
+                return self.count
+            spec = next((spec for spec in header.get("columns") or [] if spec["name"] == self.time_col), None)
+            if spec is None:
+                return self.count
+            if header.get("compression"):
+                raise ValueError(f"Cannot follow the compressed trace {self.output_path} while it is written")
+            self._column_path = self.output_path / f"{self.time_col}.bin"
+            self._itemsize = int(spec["dtype"][2:])  # e.g. "<i8"
+
+        try:
+            self.count = self._column_path.stat().st_size // self._itemsize
+        except FileNotFoundError:
+            pass
+        return self.count
+
+
+def output_watcher(profiler_name: str, output_path: Union[str, Path]) -> SampleWatcher:
+    # Watcher of the profiler output: lines of a text file, or rows of an e3bench trace
+    from e3bench.profilers.tracewriter import is_trace_path
+    if is_trace_path(output_path):
+        return TraceWatcher(output_path)
+    return SampleWatcher(output_path, sample_pattern(profiler_name))
+
+
+__all__ = ["SAMPLE_PATTERNS", "sample_pattern", "SampleWatcher", "TraceWatcher", "output_watcher"]
@@ -0,0 +1,6 @@
+from e3bench.cli import main
+
+
+# `python src/lib/main.py <command> ...`, same as `python -m e3bench` (see `e3bench.cli`)
+if __name__ == "__main__":
+    main()
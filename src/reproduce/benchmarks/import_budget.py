@@ -0,0 +1,95 @@
+from argparse import ArgumentParser, Namespace
+import json
+import os
+import subprocess
+from loguru import logger
+
+# Import local lib
+import sys
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / "../../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
+
+
+# What each `e3bench` command imports before it starts measuring, and the heavy modules
+# it must not load on the way (see the lazy imports in `e3bench.cli` and `e3bench.wrappers`)
+COMMANDS = {
+    "latency basic": ("from e3bench.wrappers.latency.basic import basic_latency_wrap_prog", ["numpy", "pandas", "torch"]),
+    "latency dynamic": ("from e3bench.wrappers.latency.dynamic import dynamic_latency_wrap_prog", ["numpy", "pandas", "torch"]),
+    "latency mix": ("from e3bench.wrappers.latency.mix import mix_latency_wrap_prog", ["numpy", "pandas", "torch"]),
+    "power": ("from e3bench.wrappers.power.basic import basic_power_wrap_prog", ["numpy", "pandas", "torch"]),
+    "energy": ("from e3bench.wrappers.energy.basic import basic_energy_wrap_prog", ["torch"]),
+    "process": ("from e3bench.profilers.tracefile import convert_trace", ["torch"]),
+}
+
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+import e3bench.cli
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1e3, "loaded": [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def child_env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [lib_dir, env.get("PYTHONPATH")] if p)
+    return env
+
+
+def measure(statement: str, forbidden) -> dict:
+    # Import time in a fresh interpreter (nothing cached in sys.modules), after its own startup
+    out = subprocess.run([sys.executable, "-c", CHILD.format(statement=statement, forbidden=forbidden)],
+                         capture_output=True, text=True, env=child_env(), check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(statement: str, top: int = 8):
+    # (cumulative ms, module) of the slowest top-level imports, from `python -X importtime`
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import e3bench.cli\n{statement}"],
+                         capture_output=True, text=True, env=child_env(), check=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        if name.startswith("  "):
+            continue  # nested import, already counted in its parent
+        rows.append((int(parts[1]) * 1e-3, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Check the import time of each e3bench command against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Maximum import time of the latency and power commands in ms (default: 100)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per command (default: 5)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+
+    failed = False
+    for command, (statement, forbidden) in COMMANDS.items():
+        # Best of `--repeat` runs: the minimum is the least disturbed by the rest of the system
+        results = [measure(statement, forbidden) for _ in range(args.repeat)]
+        best_ms = min(r["ms"] for r in results)
+        loaded = results[0]["loaded"]
+        budgeted = command.startswith(("latency", "power"))
+        over = budgeted and best_ms > args.budget_ms
+        status = "FAIL" if over or loaded else "ok"
+        logger.info(f"{command:16s} {best_ms:7.1f} ms{' (budget %.0f ms)' % args.budget_ms if budgeted else ''}  "
+                    f"{status}{'  loaded: ' + ', '.join(loaded) if loaded else ''}")
+        if over or loaded:
+            failed = True
+            for ms, name in heaviest_imports(statement):
+                logger.info(f"    {ms:7.1f} ms  {name}")
+
+    sys.exit(1 if failed else 0)
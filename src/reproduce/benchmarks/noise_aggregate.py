@@ -0,0 +1,58 @@
+from argparse import ArgumentParser, Namespace
+import importlib
+import math
+import tempfile
+from loguru import logger
+
+# Import local lib
+import sys
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / "../../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
+wait_ms_dir = str((Path(__file__).parent / "../wait_ms").resolve())
+if wait_ms_dir not in sys.path:
+    sys.path.insert(0, wait_ms_dir)
+
+from e3bench.wrappers.latency.basic import basic_latency_wrap_prog
+from e3bench.wrappers.latency.dynamic import dynamic_latency_wrap_prog
+from e3bench.wrappers.latency.mix import mix_latency_wrap_prog
+
+
+# Each latency wrapper, with and without --noise, must still aggregate with its process_exp script
+EXPERIMENTS = {
+    "process_exp1": (lambda prog, path, noise: basic_latency_wrap_prog(prog, path, warmup=1, repeat=8, noise=noise),
+                     {"warmup": "1", "repeat": "8", "ms": "1"}),
+    "process_exp2": (lambda prog, path, noise: dynamic_latency_wrap_prog(prog, path, min_ms=20, noise=noise),
+                     {"min_ms": "20", "ms": "1"}),
+    "process_exp3": (lambda prog, path, noise: mix_latency_wrap_prog(prog, path, min_ms=20, warmup=1, repeat=4, noise=noise),
+                     {"warmup": "1", "repeat": "4", "min_ms": "20", "ms": "1"}),
+}
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Check that the latency outputs aggregate with and without --noise.")
+    parser.add_argument("--prog", default="true", help="Program command to run (default: true)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        for script, (wrap, config) in EXPERIMENTS.items():
+            summarize = importlib.import_module(script).summarize
+            for noise in (False, True):
+                path = Path(tmp) / f"{script}-noise{int(noise)}-latency.csv"
+                wrap(args.prog, path, noise)
+                row = summarize(path, config)
+                # A noisy machine may flag every run with --noise; without it nothing may be dropped
+                ok = not math.isnan(row["duration_ns"]) or noise
+                failed |= not ok
+                logger.info(f"{script} noise={noise}: duration_ns={row['duration_ns']}  {'ok' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
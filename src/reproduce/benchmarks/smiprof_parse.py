@@ -0,0 +1,89 @@
+from argparse import ArgumentParser, Namespace
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from loguru import logger
+import numpy as np
+import pandas as pd
+
+# Import local lib
+import sys
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / "../../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
+
+from e3bench.profilers.quality import sampling_report
+from e3bench.profilers.smiprof.post_process import post_process_smiprof
+
+
+HEADER = "timestamp, power.draw.instant [W], temperature.gpu, utilization.gpu [%], utilization.memory [%], name"
+
+
+def write_synthetic_csv(path: Path, nb_lines: int, interval_ms: int, seed: int = 0):
+    # `nvidia-smi --format=csv` output of `smiprof/profiler.sh`, with jitter and a few unavailable readings
+    rng = random.Random(seed)
+    ts = datetime(2025, 11, 27, 15, 42, 1)
+    power = 50.0
+    with path.open("w") as f:
+        f.write(HEADER + "\n")
+        for i in range(nb_lines):
+            ts += timedelta(milliseconds=interval_ms + rng.randint(-2, 2))
+            if rng.random() < 0.3:  # the power reading is not refreshed at every query
+                power = rng.uniform(20, 300)
+            draw = "[N/A]" if rng.random() < 0.001 else f"{power:.2f} W"
+            f.write(f"{ts:%Y/%m/%d %H:%M:%S}.{ts.microsecond // 1000:03d}, {draw}, {rng.randint(30, 80)}, "
+                    f"{rng.randint(0, 100)} %, {rng.randint(0, 100)} %, NVIDIA GeForce RTX 3090\n")
+
+
+def parse_rows(path: Path) -> pd.DataFrame:
+    # Per-row reference: strptime per line, as e3bench did before the vectorized parser
+    df = pd.read_csv(path, skipinitialspace=True)
+    df["timestamp_ns"] = [int(datetime.strptime(ts, "%Y/%m/%d %H:%M:%S.%f").timestamp() * 1e9)
+                          for ts in df["timestamp"]]
+    power_col = next(c for c in df.columns if c.startswith("power.draw"))
+    df["power_mw"] = [float(v.rstrip(" W")) * 1e3 if v.endswith("W") else np.nan for v in df[power_col]]
+    return df
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Compare the smiprof parsers on a synthetic nvidia-smi CSV.")
+    parser.add_argument("--nb-lines", type=int, default=500_000, help="Number of samples (default: 500000)")
+    parser.add_argument("--interval", type=int, default=20, help="Simulated nvidia-smi loop in ms (default: 20)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs of each parser (default: 3)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = Path(tmp_dir) / "smiprof.csv"
+        write_synthetic_csv(csv_path, args.nb_lines, args.interval)
+        logger.info(f"Synthetic CSV: {args.nb_lines} lines, {csv_path.stat().st_size / 2**20:.1f} MiB")
+
+        # Best of `--repeat` runs: the minimum is the least disturbed by the rest of the system
+        rows_s, fast_s = float("inf"), float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            ref = parse_rows(csv_path)
+            rows_s = min(rows_s, time.perf_counter() - start)
+
+            start = time.perf_counter()
+            df = post_process_smiprof(csv_path)
+            fast_s = min(fast_s, time.perf_counter() - start)
+        logger.info(f"rows: {rows_s:.3f} s  ({args.nb_lines / rows_s:,.0f} lines/s)")
+        logger.info(f"fast: {fast_s:.3f} s  ({args.nb_lines / fast_s:,.0f} lines/s)")
+
+    # Same values (the reference goes through float seconds: sub-microsecond rounding)
+    assert np.abs(df["timestamp_ns"].to_numpy() - ref["timestamp_ns"].to_numpy()).max() < 1000
+    np.testing.assert_allclose(df["power_mw"].to_numpy(), ref["power_mw"].to_numpy(), equal_nan=True)
+    logger.info(f"Same timestamps and power. Speedup: x{rows_s / fast_s:.2f}")
+
+    report = sampling_report(df["timestamp_ns"], args.interval, df["power_mw"])
+    logger.info("Sampling quality: " + ", ".join(f"{k}={v:.3g}" if isinstance(v, float) else f"{k}={v}"
+                                                 for k, v in report.items()))
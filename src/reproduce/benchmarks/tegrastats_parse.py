@@ -0,0 +1,107 @@
+from argparse import ArgumentParser, Namespace
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from loguru import logger
+import pandas as pd
+
+# Import local lib
+import sys
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / "../../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
+
+from e3bench.profilers.tegrastats.post_process import post_process_tegra_jon
+
+
+def synthetic_line(ts: datetime, rng: random.Random) -> str:
+    # Jetson Orin-like tegrastats line (with an offline core and an unavailable sensor)
+    cpus = ",".join(f"{rng.randint(0, 100)}%@{rng.choice([729, 1190, 1510])}" for _ in range(4))
+    return (
+        f"{ts:%m-%d-%Y %H:%M:%S} RAM {rng.randint(2000, 7000)}/7620MB (lfb 12x4MB) SWAP 0/3810MB (cached 0MB) "
+        f"CPU [{cpus},off,off] EMC_FREQ {rng.randint(0, 60)}%@2133 GR3D_FREQ {rng.randint(0, 99)}%@[305] "
+        f"VIC_FREQ 729 APE 174 cpu@{rng.uniform(40, 70):.3f}C soc2@{rng.uniform(40, 70):.3f}C "
+        f"soc0@{rng.uniform(40, 70):.3f}C gpu@{rng.uniform(40, 70):.3f}C tj@{rng.uniform(40, 70):.3f}C "
+        f"cv0@-256C VDD_IN {rng.randint(4000, 15000)}mW/{rng.randint(4000, 15000)}mW "
+        f"VDD_CPU_GPU_CV {rng.randint(400, 8000)}mW/{rng.randint(400, 8000)}mW "
+        f"VDD_SOC {rng.randint(1000, 3000)}mW/{rng.randint(1000, 3000)}mW"
+    )
+
+
+def synthetic_nano_line(ts: datetime, rng: random.Random) -> str:
+    # Jetson Nano-like line: other sensors and POM_* rails, no cv0 sensor
+    cpus = ",".join(f"{rng.randint(0, 100)}%@1479" for _ in range(4))
+    return (
+        f"{ts:%m-%d-%Y %H:%M:%S} RAM {rng.randint(1000, 3900)}/3956MB (lfb 71x4MB) SWAP 0/1978MB (cached 0MB) "
+        f"IRAM 0/252kB(lfb 252kB) CPU [{cpus}] EMC_FREQ {rng.randint(0, 60)}%@1600 GR3D_FREQ {rng.randint(0, 99)}%@921 "
+        f"APE 25 PLL@{rng.uniform(20, 60):.1f}C CPU@{rng.uniform(20, 60):.1f}C PMIC@50C GPU@{rng.uniform(20, 60):.1f}C "
+        f"AO@{rng.uniform(20, 60):.1f}C thermal@{rng.uniform(20, 60):.2f}C "
+        f"POM_5V_IN {rng.randint(1000, 5000)}/{rng.randint(1000, 5000)} POM_5V_GPU {rng.randint(0, 2000)}/{rng.randint(0, 2000)} "
+        f"POM_5V_CPU {rng.randint(100, 2000)}/{rng.randint(100, 2000)}"
+    )
+
+
+def synthetic_xavier_line(ts: datetime, rng: random.Random) -> str:
+    # Jetson Xavier NX-like line: frequencies without @MHz, rails without the mW unit
+    cpus = ",".join(f"{rng.randint(0, 100)}%@1190" for _ in range(4))
+    return (
+        f"{ts:%m-%d-%Y %H:%M:%S} RAM {rng.randint(1000, 7700)}/7772MB (lfb 1011x4MB) SWAP 0/3886MB (cached 0MB) "
+        f"CPU [{cpus},off,off] EMC_FREQ {rng.randint(0, 60)}% GR3D_FREQ {rng.randint(0, 99)}% "
+        f"AO@{rng.uniform(30, 60):.1f}C GPU@{rng.uniform(30, 60):.1f}C PMIC@100C AUX@{rng.uniform(30, 60):.1f}C "
+        f"CPU@{rng.uniform(30, 60):.1f}C thermal@{rng.uniform(30, 60):.2f}C "
+        f"VDD_IN {rng.randint(3000, 9000)}/{rng.randint(3000, 9000)} VDD_CPU_GPU_CV {rng.randint(400, 4000)}/{rng.randint(400, 4000)} "
+        f"VDD_SOC {rng.randint(1000, 2000)}/{rng.randint(1000, 2000)}"
+    )
+
+
+# Board(s) whose lines make up each log. "mixed" interleaves them: columns missing from
+# some lines (e.g. temp_cv0_C, -256C on Orin) must come out as in the reference parser.
+LOGS = {
+    "orin": [synthetic_line],
+    "mixed": [synthetic_line, synthetic_nano_line, synthetic_xavier_line],
+}
+
+
+def write_synthetic_log(path: Path, nb_lines: int, interval_ms: int, boards=(synthetic_line,), seed: int = 0):
+    rng = random.Random(seed)
+    start = datetime(2025, 11, 27, 15, 42, 1)
+    with path.open("w") as f:
+        for i in range(nb_lines):
+            line = boards[i % len(boards)]
+            f.write(line(start + timedelta(milliseconds=i * interval_ms), rng) + "\n")
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Compare the tegrastats parsers on synthetic Orin and mixed-board logs.")
+    parser.add_argument("--nb-lines", type=int, default=100_000,
+                        help="Number of log lines (default: 100000, ~17 min at --interval 10)")
+    parser.add_argument("--interval", type=int, default=10, help="Simulated tegrastats interval in ms (default: 10)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+
+    for log_name, boards in LOGS.items():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_path = Path(tmp_dir) / f"tegrastats-{log_name}.txt"
+            write_synthetic_log(log_path, args.nb_lines, args.interval, boards)
+            logger.info(f"Synthetic {log_name} log: {args.nb_lines} lines, {log_path.stat().st_size / 2**20:.1f} MiB")
+
+            results = {}
+            for name, fast in [("rows", False), ("fast", True)]:
+                start = time.perf_counter()
+                df = post_process_tegra_jon(log_path, fast=fast)
+                elapsed = time.perf_counter() - start
+                results[name] = (df, elapsed)
+                logger.info(f"{name:>4}: {elapsed:.3f} s  ({args.nb_lines / elapsed:,.0f} lines/s)")
+
+        # Same schema and values
+        pd.testing.assert_frame_equal(results["rows"][0], results["fast"][0])
+        logger.info(f"{log_name}: identical output ({results['fast'][0].shape[1]} columns). "
+                    f"Speedup: x{results['rows'][1] / results['fast'][1]:.2f}")
@@ -0,0 +1,25 @@
+from argparse import ArgumentParser, Namespace
+
+
+# Import local lib
+import sys
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / "../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
+
+from e3bench.cli import add_energy_arguments, run_energy
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Run a command repeatedly inside one power sampling session and log latency and energy per run.")
+    add_energy_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    run_energy(args)
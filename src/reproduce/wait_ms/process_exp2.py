@@ -1,55 +1,81 @@
+from argparse import ArgumentParser, Namespace
 import glob
 import re
+from typing import Optional
 from pathlib import Path
 from loguru import logger
 import pandas as pd
-import csv
+import sys
+
+
+lib_dir = (Path(__file__).parent / "../../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
+
+from e3bench.aggregate import aggregate_files
+from e3bench.stats import bootstrap_ci
 
 THIS_DIR = Path(__file__).parent.resolve() 
 
 CONFIG_RE = re.compile(r'm(?P<min_ms>\d+)_ms(?P<ms>\d+)')
+FIELDNAMES = ["repeat", "min_ms", "ms", "duration_ns", "duration__std_ns", "duration__iqr_ns",
+    "duration__ci_lo_ns", "duration__ci_hi_ns", "duration__iqr__ci_lo_ns", "duration__iqr__ci_hi_ns"]
+
+
+def summarize(file_path: Path, config: dict) -> Optional[dict]:
+    logger.debug(f"Processing {file_path}")
+    try:
+        df = pd.read_csv(file_path)
+    except pd.errors.EmptyDataError:
+        df = pd.DataFrame()
+    if df.empty:
+        # e.g. a session interrupted before its first run
+        logger.warning(f"No runs in {file_path}; left out.")
+        return None
+    # Drop runs flagged by the noise monitor (--noise)
+    if "noisy" in df.columns:
+        df = df[df["noisy"].fillna(0) == 0]  # empty when recorded without --noise
+    repeat = df.shape[0]
+
+    duration_ns = df["duration_ns"].median()
+    duration__std_ns = df["duration_ns"].std()
+    q1 = df["duration_ns"].quantile(0.25)
+    q3 = df["duration_ns"].quantile(0.75)
+    duration__iqr_ns = q3-q1
+    # 95% bootstrap CIs of the median and the IQR, to tell configurations apart
+    ci = bootstrap_ci(df["duration_ns"], ["median", "iqr"])
+
+    logger.debug(f"Duration: {duration_ns} | Stdev: {duration__std_ns}")
+
+    return {
+        "repeat": repeat,
+        "min_ms": int(config["min_ms"]),
+        "ms": int(config["ms"]),
+        "duration_ns": duration_ns,
+        "duration__std_ns": duration__std_ns,
+        "duration__iqr_ns": duration__iqr_ns,
+        "duration__ci_lo_ns": ci["median"][1],
+        "duration__ci_hi_ns": ci["median"][2],
+        "duration__iqr__ci_lo_ns": ci["iqr"][1],
+        "duration__iqr__ci_hi_ns": ci["iqr"][2],
+    }
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Aggregate the dyn_lat_wrapper results (only new or changed files are read).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cached per-file summaries")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
+    args = get_args()
     output_dir = (THIS_DIR / "../../../outputs").resolve()
     path_regex = str(output_dir/"wait_ms/measurability/dyn_lat_wrapper/*-latency.csv")
     files = glob.glob(path_regex)
 
-    # Prepare CSV
     output_path = output_dir / "wait_ms/measurability/dyn_lat_wrapper.csv"
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = ["repeat", "min_ms", "ms", "duration_ns", "duration__std_ns", "duration__iqr_ns"]
-
-    with output_path.open("w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-
-        for file_path in files:
-            file_path = Path(file_path)
-
-            if m := CONFIG_RE.search(file_path.stem):
-                logger.debug(f"Processing {file_path}")
-                min_ms = int(m.group('min_ms'))
-                ms = int(m.group('ms'))
-
-                df = pd.read_csv(file_path)
-                repeat = df.shape[0]
-
-                duration_ns = df["duration_ns"].median()
-                duration__std_ns = df["duration_ns"].std()
-                q1 = df["duration_ns"].quantile(0.25)
-                q3 = df["duration_ns"].quantile(0.75)
-                duration__iqr_ns = q3-q1
-
-                logger.debug(f"Duration: {duration_ns} | Stdev: {duration__std_ns}")
-
-                writer.writerow({
-                    "repeat": repeat,
-                    "min_ms": min_ms,
-                    "ms": ms,
-                    "duration_ns": duration_ns,
-                    "duration__std_ns": duration__std_ns,
-                    "duration__iqr_ns": duration__iqr_ns,
-                })
-                f.flush()
-
+    aggregate_files(files, summarize, output_path, CONFIG_RE, version="4", workers=args.workers,
+                    rebuild=args.rebuild, columns=FIELDNAMES)
@@ -1,65 +1,95 @@
+from argparse import ArgumentParser, Namespace
 import glob
 import re
+from typing import Optional
 from pathlib import Path
 from loguru import logger
 import pandas as pd
-import csv
+import sys
 
-THIS_DIR = Path(__file__).parent.resolve()
 
-CONFIG_RE = re.compile(r'w(?P<warmup>\d+)_r(?P<repeat>\d+)_m(?P<min_ms>\d+)_ms(?P<ms>\d+)')
+lib_dir = (Path(__file__).parent / "../../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
 
+from e3bench.aggregate import aggregate_files
+from e3bench.stats import bootstrap_ci
 
-if __name__ == "__main__":
-    output_dir = (THIS_DIR / "../../../outputs").resolve()
-    path_regex = str(output_dir/"wait_ms/measurability/mix_lat_wrapper/*-latency.csv")
-    files = glob.glob(path_regex)
+THIS_DIR = Path(__file__).parent.resolve()
 
-    # Prepare CSV
-    output_path = output_dir / "wait_ms/measurability/mix_lat_wrapper.csv"
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    fieldnames = [
-        "warmup", "repeat", "min_ms", "ms", "nb_iter", "nb_per_run",
-        "duration_ns", "duration__std_ns", "duration__iqr_ns",
-    ]
+CONFIG_RE = re.compile(r'w(?P<warmup>\d+|auto)_r(?P<repeat>\d+)_m(?P<min_ms>\d+)_ms(?P<ms>\d+)')
+FIELDNAMES = [
+    "warmup", "repeat", "min_ms", "ms", "nb_iter", "nb_per_run",
+    "duration_ns", "duration__std_ns", "duration__iqr_ns",
+    "duration__ci_lo_ns", "duration__ci_hi_ns", "duration__iqr__ci_lo_ns", "duration__iqr__ci_hi_ns",
+]
 
-    with output_path.open("w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
 
-        for file_path in files:
-            file_path = Path(file_path)
+def summarize(file_path: Path, config: dict) -> Optional[dict]:
+    logger.debug(f"Processing {file_path}")
+    try:
+        df = pd.read_csv(file_path)
+    except pd.errors.EmptyDataError:
+        df = pd.DataFrame()
+    if df.empty:
+        # e.g. a session interrupted before its first run
+        logger.warning(f"No runs in {file_path}; left out.")
+        return None
+    # Newer outputs flag warmup runs explicitly (fixed or detected with --warmup auto)
+    if "is_warmup" in df.columns:
+        warmup = int(df["warmup"].iloc[0])
+        df = df[(df["is_warmup"] == 0) & (df["returncode"] == 0)]
+    else:
+        warmup = int(config["warmup"])
+        df = df[(df["run_idx"] >= warmup) & (df["returncode"] == 0)]
+    # Drop runs flagged by the noise monitor (--noise)
+    if "noisy" in df.columns:
+        df = df[df["noisy"].fillna(0) == 0]  # empty when recorded without --noise
 
-            if m := CONFIG_RE.search(file_path.stem):
-                logger.debug(f"Processing {file_path}")
-                warmup = int(m.group('warmup'))
-                repeat = int(m.group('repeat'))
-                min_ms = int(m.group('min_ms'))
-                ms = int(m.group('ms'))
+    duration_ns = df["duration__median__ns"].median()
+    duration__std_ns = df["duration__median__ns"].std()
+    q1 = df["duration__median__ns"].quantile(0.25)
+    q3 = df["duration__median__ns"].quantile(0.75)
+    duration__iqr_ns = q3-q1
+    # 95% bootstrap CIs of the median and the IQR, to tell configurations apart
+    ci = bootstrap_ci(df["duration__median__ns"], ["median", "iqr"])
+    nb_iter = df["nb_iter"].mean()
+    nb_per_run = df["nb_per_run"].mean()
 
-                df = pd.read_csv(file_path)
-                df = df[(df["run_idx"] >= warmup) & (df["returncode"] == 0)]
+    logger.debug(f"Duration: {duration_ns} | Stdev: {duration__std_ns}")
 
-                duration_ns = df["duration__median__ns"].median()
-                duration__std_ns = df["duration__median__ns"].std()
-                q1 = df["duration__median__ns"].quantile(0.25)
-                q3 = df["duration__median__ns"].quantile(0.75)
-                duration__iqr_ns = q3-q1
-                nb_iter = df["nb_iter"].mean()
-                nb_per_run = df["nb_per_run"].mean()
+    return {
+        "warmup": warmup,
+        "repeat": int(config["repeat"]),
+        "min_ms": int(config["min_ms"]),
+        "ms": int(config["ms"]),
+        "duration_ns": duration_ns,
+        "duration__std_ns": duration__std_ns,
+        "duration__iqr_ns": duration__iqr_ns,
+        "duration__ci_lo_ns": ci["median"][1],
+        "duration__ci_hi_ns": ci["median"][2],
+        "duration__iqr__ci_lo_ns": ci["iqr"][1],
+        "duration__iqr__ci_hi_ns": ci["iqr"][2],
+        "nb_iter": nb_iter,
+        "nb_per_run": nb_per_run,
+    }
 
-                logger.debug(f"Duration: {duration_ns} | Stdev: {duration__std_ns}")
 
-                writer.writerow({
-                    "warmup": warmup,
-                    "repeat": repeat,
-                    "min_ms": min_ms,
-                    "ms": ms,
-                    "duration_ns": duration_ns,
-                    "duration__std_ns": duration__std_ns,
-                    "duration__iqr_ns": duration__iqr_ns,
-                    "nb_iter": nb_iter,
-                    "nb_per_run": nb_per_run,
-                })
-                f.flush()
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Aggregate the mix_lat_wrapper results (only new or changed files are read).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the cached per-file summaries")
+    return parser.parse_args()
 
+
+if __name__ == "__main__":
+    args = get_args()
+    output_dir = (THIS_DIR / "../../../outputs").resolve()
+    path_regex = str(output_dir/"wait_ms/measurability/mix_lat_wrapper/*-latency.csv")
+    files = glob.glob(path_regex)
+
+    output_path = output_dir / "wait_ms/measurability/mix_lat_wrapper.csv"
+    aggregate_files(files, summarize, output_path, CONFIG_RE, version="4", workers=args.workers,
+                    rebuild=args.rebuild, columns=FIELDNAMES)
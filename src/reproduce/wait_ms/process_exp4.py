@@ -1,8 +1,9 @@
+from argparse import ArgumentParser, Namespace
+from functools import partial
 import glob
 from pathlib import Path
 from loguru import logger
 import sys
-import pandas as pd
 
 
 lib_dir = (Path(__file__).parent / "../../lib").resolve()
@@ -11,28 +12,67 @@ lib_dir = str(lib_dir)
 if lib_dir not in sys.path:
     sys.path.insert(0, lib_dir)
 
-from e3bench.profilers.tegrastats import post_process_tegra_jon
+from e3bench.aggregate import aggregate_files
+from e3bench.energy import power_column
+from e3bench.profilers.quality import sampling_report
+from e3bench.profilers.tracefile import convert_trace, read_trace
 
 THIS_DIR = Path(__file__).parent.resolve() 
 
+FIELDNAMES = ["profiler", "file", "trace", "nb_samples", "duration_s", "freq_Hz", "power_mw_mean"]
+
+
+def summarize(file_path: Path, config: dict, compress: bool = False, csv: bool = False) -> dict:
+    profiler_name = file_path.parts[-2]
+    if not (profiler_name.startswith(("inaprof", "tegrastats")) or profiler_name == "smiprof"):
+        return None
+
+    # Parsed once into an e3bench trace; later analyses memory-map it instead of parsing text
+    trace_path = convert_trace(profiler_name, file_path, compression="zlib" if compress else None)
+    if trace_path is None:
+        return None
+    logger.debug(f'Parsed {file_path} -> {trace_path}')
+
+    df = read_trace(trace_path)
+    if csv:
+        out_path = file_path.parent / f"{file_path.stem}.csv"
+        df.to_csv(out_path, index=False)
+        logger.debug(f'Wrote {len(df)} rows -> {out_path}')
+
+    report = sampling_report(df["timestamp_ns"].to_numpy())
+    try:
+        power_mw_mean = float(df[power_column(df)].mean())
+    except ValueError:
+        power_mw_mean = None  # no single power column (e.g. several rails without VDD_IN)
+    return {
+        "profiler": profiler_name,
+        "file": file_path.name,
+        "trace": str(trace_path),
+        "nb_samples": report["nb_samples"],
+        "duration_s": report.get("duration_s"),
+        "freq_Hz": report.get("freq_Hz"),
+        "power_mw_mean": power_mw_mean,
+    }
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Parse the raw power traces of the measurability experiment.")
+    parser.add_argument("--csv", action="store_true",
+                        help="Also write a CSV next to each trace (slower to write and to read back)")
+    parser.add_argument("--compress", action="store_true", help="zlib-compress the columns of the e3bench traces")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--force", action="store_true", help="Convert the traces that are already up to date")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
+    args = get_args()
     output_dir = (THIS_DIR / "../../../outputs").resolve()
     path_regex = str(output_dir/"wait_ms/measurability/pow_wrapper/*/*-power.txt")
     files = glob.glob(path_regex)
 
-    for file_path in files:
-        file_path = Path(file_path)
-        profiler_name = file_path.parts[-2]
-        df = None
-        if profiler_name.startswith("inaprof"):
-            df = pd.read_csv(file_path)
-            df = df.rename(columns={"timestamp": "timestamp_ns", "current": "cur_ma", "voltage": "vol_mv"})
-            df["power_mw"] = df["cur_ma"] * df["vol_mv"] * 1e-3
-        elif profiler_name == "tegrastats":
-            df = post_process_tegra_jon(file_path)
-
-        if df is not None:
-            out_path = file_path.parent / f"{file_path.stem}.csv"
-            df.to_csv(out_path, index=False)
-            logger.debug(f'Parsed {len(df)} rows -> {out_path}')
+    # One row per trace; only new or changed raw traces are converted
+    output_path = output_dir / "wait_ms/measurability/pow_wrapper.csv"
+    aggregate_files(files, partial(summarize, compress=args.compress, csv=args.csv), output_path,
+                    version=f"1:compress={args.compress}:csv={args.csv}", workers=args.workers,
+                    rebuild=args.force, columns=FIELDNAMES)
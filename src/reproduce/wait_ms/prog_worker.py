@@ -0,0 +1,30 @@
+from argparse import Namespace, ArgumentParser
+import time
+
+
+# Import local lib
+import sys
+from pathlib import Path
+
+lib_dir = (Path(__file__).parent / "../../lib").resolve()
+lib_dir = str(lib_dir)
+# Add to sys.path if not already there
+if lib_dir not in sys.path:
+    sys.path.insert(0, lib_dir)
+
+from e3bench.harness import serve
+
+
+def get_args() -> Namespace:
+    parser = ArgumentParser(description="Sleep for a given number of milliseconds (harness worker version).")
+    parser.add_argument("--ms", type=float, required=True, help="Time to wait (in milliseconds)")
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = get_args()
+    wait_s = args.ms / 1000.0
+
+    # Same workload as `prog.py`, but started once and driven by the latency wrapper
+    serve(run=lambda: time.sleep(wait_s))